@@ -0,0 +1,362 @@
+import asyncio
+import inspect
+import json
+import threading
+
+import numpy as np
+
+from config.settings import (
+    HEATWAVE_LST_THRESHOLD,
+    HEATWAVE_PERSISTENCE,
+    SMOG_AQI_THRESHOLD,
+    SMOG_PERSISTENCE,
+    ALERT_WINDOW,
+    ALERT_REPEAT_AFTER,
+    CITY_WIDE,
+)
+
+
+# --------------------------------------------------
+# RING BUFFER
+# --------------------------------------------------
+class RingBuffer:
+    """
+    Fixed-size window of readings with an O(1) running mean.
+    """
+
+    def __init__(self, capacity=ALERT_WINDOW):
+        self.values = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0
+        self.head = 0
+        self.total = 0.0
+
+    def push(self, value):
+        if self.count == self.capacity:
+            self.total -= self.values[self.head]
+        else:
+            self.count += 1
+
+        self.values[self.head] = value
+        self.total += value
+        self.head = (self.head + 1) % self.capacity
+
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+    def last(self):
+        return self.values[self.head - 1] if self.count else float("nan")
+
+
+# --------------------------------------------------
+# RULES
+# --------------------------------------------------
+# name, stream, statistic over the ring buffer, threshold, persistence
+RULES = [
+    {
+        "name": "heatwave",
+        "stream": "lst",
+        "stat": "last",
+        "threshold": HEATWAVE_LST_THRESHOLD,
+        "persistence": HEATWAVE_PERSISTENCE,
+    },
+    {
+        "name": "smog",
+        "stream": "aqi",
+        "stat": "mean",
+        "threshold": SMOG_AQI_THRESHOLD,
+        "persistence": SMOG_PERSISTENCE,
+    },
+]
+
+
+class _RuleState:
+    __slots__ = ("streak", "active", "since", "last_sent", "value")
+
+    def __init__(self):
+        self.streak = 0
+        self.active = False
+        self.since = None
+        self.last_sent = None
+        self.value = None
+
+
+# --------------------------------------------------
+# EVALUATOR
+# --------------------------------------------------
+class EarlyWarningEvaluator:
+    """
+    Incremental heatwave + smog early warning over event streams.
+
+    Events are dicts:
+      {"type": "aqi", "city": ..., "time": epoch_s, "aqi": ..., "ward": optional}
+      {"type": "lst", "city": ..., "time": epoch_s, "wards": {ward: lst_p90, ...}}
+
+    An optional "source" identifies the observation behind a reading (e.g.
+    the Landsat scenes of an LST composite); a reading whose source has not
+    changed since the last one of its (city, ward, stream) is skipped, so
+    re-feeding the same observation does not build up persistence.
+
+    Each (city, ward, stream) keeps a ring buffer; every rule keeps a running
+    streak of readings above threshold, so one event costs O(1). A combined
+    "heat_smog" alert fires for a ward when its heatwave and the city's (or
+    the ward's) smog alert are active together. Alerts are deduplicated:
+    sent when they start, when they clear, and again only after
+    ALERT_REPEAT_AFTER seconds while still active.
+
+    Events are fed one at a time with process() (thread-safe, so Streamlit
+    sessions can share one evaluator) or streamed with run(), which hands
+    every alert to a sink.
+    """
+
+    def __init__(self, sink=None, rules=RULES, window=ALERT_WINDOW, repeat_after=ALERT_REPEAT_AFTER):
+        self.sink = sink
+        self.rules = {}
+        for rule in rules:
+            self.rules.setdefault(rule["stream"], []).append(rule)
+
+        self.window = window
+        self.repeat_after = repeat_after
+        self.buffers = {}
+        self.sources = {}
+        self.states = {}
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------
+    # EVENT PROCESSING
+    # --------------------------------------------------
+    def process(self, event):
+        """
+        Update state with one event; returns the alerts it triggers.
+        """
+        with self._lock:
+            return self._process(event)
+
+    def _process(self, event):
+        city = event["city"]
+        time = event["time"]
+        stream = event["type"]
+        source = event.get("source")
+
+        if stream == "aqi":
+            readings = {event.get("ward", CITY_WIDE): event["aqi"]}
+        elif stream == "lst":
+            readings = event["wards"]
+        else:
+            raise ValueError(f"Unknown event type: {stream}")
+
+        alerts = []
+        for ward, value in readings.items():
+            key = (city, ward, stream)
+            if source is not None:
+                if self.sources.get(key) == source:
+                    continue
+                self.sources[key] = source
+
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                buffer = self.buffers[key] = RingBuffer(self.window)
+            buffer.push(value)
+
+            changed = False
+            for rule in self.rules.get(stream, []):
+                statistic = buffer.mean() if rule["stat"] == "mean" else buffer.last()
+                alert = self._update_rule(city, ward, rule["name"], time, statistic, rule)
+                if alert:
+                    alerts.append(alert)
+                    changed |= alert["status"] != "ongoing"
+
+            # The combined rule only depends on start/clear transitions
+            if changed:
+                alerts.extend(self._update_combined(city, ward, time))
+
+        return alerts
+
+    def _transition(self, city, ward, name, time, firing, value):
+        state = self.states.get((city, ward, name))
+        if state is None:
+            state = self.states[(city, ward, name)] = _RuleState()
+        state.value = value
+
+        if firing and not state.active:
+            state.active, state.since, state.last_sent = True, time, time
+            return self._alert("start", city, ward, name, time, value, state)
+
+        if firing and time - state.last_sent >= self.repeat_after:
+            state.last_sent = time
+            return self._alert("ongoing", city, ward, name, time, value, state)
+
+        if not firing and state.active:
+            state.active = False
+            return self._alert("clear", city, ward, name, time, value, state)
+
+        return None
+
+    def _update_rule(self, city, ward, name, time, value, rule):
+        state = self.states.get((city, ward, name))
+        if state is None:
+            state = self.states[(city, ward, name)] = _RuleState()
+
+        state.streak = state.streak + 1 if value >= rule["threshold"] else 0
+        return self._transition(city, ward, name, time, state.streak >= rule["persistence"], value)
+
+    def _is_active(self, city, ward, name):
+        state = self.states.get((city, ward, name))
+        return state is not None and state.active
+
+    def _update_combined(self, city, ward, time):
+        # Smog at city level affects every ward; ward-level smog only its own
+        wards = self._wards(city) if ward == CITY_WIDE else [ward]
+
+        alerts = []
+        for ward in wards:
+            heat = self._is_active(city, ward, "heatwave")
+            smog = self._is_active(city, ward, "smog") or self._is_active(city, CITY_WIDE, "smog")
+            alert = self._transition(city, ward, "heat_smog", time, heat and smog, None)
+            if alert:
+                alerts.append(alert)
+        return alerts
+
+    def _wards(self, city):
+        return sorted({
+            ward for (c, ward, name) in self.states
+            if c == city and name == "heatwave"
+        })
+
+    @staticmethod
+    def _alert(status, city, ward, name, time, value, state):
+        return {
+            "status": status,
+            "rule": name,
+            "city": city,
+            "ward": ward,
+            "time": time,
+            "since": state.since,
+            "value": None if value is None else float(value),
+        }
+
+    def active_alerts(self):
+        with self._lock:
+            return self._active_alerts()
+
+    def _active_alerts(self):
+        return [
+            {
+                "city": city,
+                "ward": ward,
+                "rule": name,
+                "since": state.since,
+                "value": None if state.value is None else float(state.value),
+            }
+            for (city, ward, name), state in self.states.items()
+            if state.active
+        ]
+
+    # --------------------------------------------------
+    # STREAMING
+    # --------------------------------------------------
+    @staticmethod
+    async def _emit(sink, alert):
+        if sink is None:
+            return
+        emit = getattr(sink, "emit", sink)
+        result = emit(alert)
+        if inspect.isawaitable(result):
+            await result
+
+    async def run(self, *streams, sink=None):
+        """
+        Consume async event streams concurrently until all are exhausted,
+        passing every alert to `sink` (default: the evaluator's sink), a
+        callable or an object with emit(), sync or async. Returns the
+        number of events processed.
+        """
+
+        sink = self.sink if sink is None else sink
+        queue = asyncio.Queue(maxsize=10_000)
+        done = object()
+
+        async def pump(stream):
+            try:
+                async for event in stream:
+                    await queue.put(event)
+            finally:
+                await queue.put(done)
+
+        tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+        remaining, processed = len(tasks), 0
+
+        while remaining:
+            event = await queue.get()
+            if event is done:
+                remaining -= 1
+                continue
+
+            for alert in self.process(event):
+                await self._emit(sink, alert)
+            processed += 1
+
+        await asyncio.gather(*tasks)
+        return processed
+
+
+# --------------------------------------------------
+# SHARED EVALUATORS
+# --------------------------------------------------
+_EVALUATORS = {}
+_EVALUATORS_LOCK = threading.Lock()
+
+
+def city_evaluator(city):
+    """
+    Process-wide evaluator of a city, shared by every session so readings
+    accumulate across sessions for as long as the server runs.
+    """
+    with _EVALUATORS_LOCK:
+        evaluator = _EVALUATORS.get(city)
+        if evaluator is None:
+            evaluator = _EVALUATORS[city] = EarlyWarningEvaluator()
+        return evaluator
+
+
+# --------------------------------------------------
+# EVENT HELPERS
+# --------------------------------------------------
+def lst_snapshot_event(city, df, time, source=None, ward_column="ward", quantile=0.9):
+    """
+    LST event from a grid snapshot: 90th percentile ST_B10 per ward
+    (the whole city when the grid has no ward column). source names the
+    observation the snapshot comes from, so repeats of it are skipped.
+    """
+
+    if ward_column in df:
+        wards = df.groupby(ward_column)["ST_B10"].quantile(quantile).to_dict()
+    else:
+        wards = {CITY_WIDE: df["ST_B10"].quantile(quantile)}
+
+    event = {"type": "lst", "city": city, "time": time, "wards": wards}
+    if source is not None:
+        event["source"] = source
+    return event
+
+
+async def replay_feed(path, speed=None):
+    """
+    Replay a JSON-lines event feed. With `speed`, events are spaced by their
+    recorded time gaps divided by speed; otherwise as fast as possible.
+    """
+
+    previous = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            event = json.loads(line)
+            if speed and previous is not None:
+                await asyncio.sleep(max(event["time"] - previous, 0) / speed)
+            else:
+                await asyncio.sleep(0)
+            previous = event["time"]
+
+            yield event
@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+
+from alerts.early_warning import (
+    EarlyWarningEvaluator,
+    RingBuffer,
+    city_evaluator,
+    lst_snapshot_event,
+    replay_feed,
+)
+from config.settings import (
+    CITY_WIDE,
+    HEATWAVE_LST_THRESHOLD,
+    HEATWAVE_PERSISTENCE,
+    SMOG_AQI_THRESHOLD,
+    SMOG_PERSISTENCE,
+)
+
+HOUR = 3600
+
+
+def _lst(time, value, source=None, ward=CITY_WIDE):
+    event = {"type": "lst", "city": "Delhi", "time": time, "wards": {ward: value}}
+    if source is not None:
+        event["source"] = source
+    return event
+
+
+def _aqi(time, value, source=None):
+    event = {"type": "aqi", "city": "Delhi", "time": time, "aqi": value}
+    if source is not None:
+        event["source"] = source
+    return event
+
+
+def _rules(evaluator):
+    return sorted(alert["rule"] for alert in evaluator.active_alerts())
+
+
+def test_ring_buffer_running_mean_over_window():
+    buffer = RingBuffer(3)
+    for value in [1, 2, 3, 4, 5]:
+        buffer.push(value)
+
+    assert buffer.count == 3
+    assert buffer.mean() == 4
+    assert buffer.last() == 5
+    assert np.isnan(RingBuffer(3).mean())
+
+
+def test_heatwave_needs_persistence():
+    evaluator = EarlyWarningEvaluator()
+    hot = HEATWAVE_LST_THRESHOLD + 1
+
+    for step in range(HEATWAVE_PERSISTENCE - 1):
+        assert evaluator.process(_lst(step * HOUR, hot, source=step)) == []
+
+    alerts = evaluator.process(_lst(HEATWAVE_PERSISTENCE * HOUR, hot, source="last"))
+    assert [(a["status"], a["rule"]) for a in alerts] == [("start", "heatwave")]
+
+    alerts = evaluator.process(_lst((HEATWAVE_PERSISTENCE + 1) * HOUR, hot - 2, source="cool"))
+    assert [(a["status"], a["rule"]) for a in alerts] == [("clear", "heatwave")]
+
+
+def test_repeated_source_is_not_a_new_observation():
+    evaluator = EarlyWarningEvaluator()
+    hot = HEATWAVE_LST_THRESHOLD + 1
+
+    # The same composite fed every hour must not build up persistence
+    for hour in range(HEATWAVE_PERSISTENCE * 3):
+        evaluator.process(_lst(hour * HOUR, hot, source="LC09_146040_20240501"))
+
+    assert _rules(evaluator) == []
+    assert evaluator.buffers[("Delhi", CITY_WIDE, "lst")].count == 1
+
+
+def test_heat_and_smog_combine():
+    evaluator = EarlyWarningEvaluator()
+
+    for step in range(HEATWAVE_PERSISTENCE):
+        evaluator.process(_lst(step * HOUR, HEATWAVE_LST_THRESHOLD + 1, source=step))
+    for step in range(SMOG_PERSISTENCE):
+        evaluator.process(_aqi(step * HOUR, SMOG_AQI_THRESHOLD + 50, source=step))
+
+    assert _rules(evaluator) == ["heat_smog", "heatwave", "smog"]
+
+
+def test_active_alert_is_resent_after_repeat_interval():
+    evaluator = EarlyWarningEvaluator(repeat_after=2 * HOUR)
+    hot = HEATWAVE_LST_THRESHOLD + 1
+
+    statuses = []
+    for step in range(HEATWAVE_PERSISTENCE + 2):
+        statuses += [a["status"] for a in evaluator.process(_lst(step * HOUR, hot))]
+
+    assert statuses == ["start", "ongoing"]
+
+
+def test_lst_snapshot_event_per_ward_and_city_wide():
+    df = pd.DataFrame({"ST_B10": np.arange(10.0), "ward": ["a"] * 5 + ["b"] * 5})
+
+    event = lst_snapshot_event("Delhi", df, 0, source="scene")
+    assert set(event["wards"]) == {"a", "b"}
+    assert event["source"] == "scene"
+
+    event = lst_snapshot_event("Delhi", df.drop(columns="ward"), 0)
+    assert list(event["wards"]) == [CITY_WIDE]
+    assert "source" not in event
+
+
+def _write_feed(path, events):
+    with open(path, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+        f.write("\n")
+    return str(path)
+
+
+def test_run_replays_recorded_feeds_into_a_sink(tmp_path):
+    hot, smoggy = HEATWAVE_LST_THRESHOLD + 1, SMOG_AQI_THRESHOLD + 50
+    days = max(HEATWAVE_PERSISTENCE, SMOG_PERSISTENCE)
+    lst_feed = _write_feed(tmp_path / "lst.jsonl", [
+        _lst(day * 24 * HOUR, hot, source=f"scene-{day}") for day in range(days)
+    ])
+    aqi_feed = _write_feed(tmp_path / "aqi.jsonl", [
+        _aqi(hour * HOUR, smoggy, source=hour) for hour in range(days)
+    ])
+
+    received = []
+
+    async def sink(alert):
+        received.append(alert)
+
+    evaluator = EarlyWarningEvaluator()
+    processed = asyncio.run(evaluator.run(replay_feed(lst_feed), replay_feed(aqi_feed), sink=sink))
+
+    assert processed == 2 * days
+    starts = sorted(a["rule"] for a in received if a["status"] == "start")
+    assert starts == ["heat_smog", "heatwave", "smog"]
+    assert all(a["status"] != "clear" for a in received)
+    assert _rules(evaluator) == ["heat_smog", "heatwave", "smog"]
+
+
+def test_run_uses_the_evaluator_sink_with_emit(tmp_path):
+    class Sink:
+        def __init__(self):
+            self.alerts = []
+
+        def emit(self, alert):
+            self.alerts.append(alert)
+
+    feed = _write_feed(tmp_path / "lst.jsonl", [
+        _lst(step * HOUR, HEATWAVE_LST_THRESHOLD + 1) for step in range(HEATWAVE_PERSISTENCE)
+    ])
+    sink = Sink()
+
+    asyncio.run(EarlyWarningEvaluator(sink=sink).run(replay_feed(feed, speed=3600 * 1000)))
+
+    assert [a["rule"] for a in sink.alerts] == ["heatwave"]
+
+
+def test_city_evaluator_is_shared_per_city():
+    assert city_evaluator("Delhi") is city_evaluator("Delhi")
+    assert city_evaluator("Delhi") is not city_evaluator("Pune")
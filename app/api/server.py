@@ -0,0 +1,479 @@
+"""
+JSON / Arrow query API over saved analysis results.
+
+Run from the app/ directory:
+
+    python -m api.server --port 8765
+
+Endpoints (GET):
+    /cities?bbox=               registered cities (optionally those intersecting
+                                min_lon,min_lat,max_lon,max_lat) and run dates
+    /grid?city=&date=           per-cell results (format=arrow for Arrow IPC)
+    /summary?city=&date=        city summary
+    /scenario?city=&date=&green_cover=&cool_roof=&green_roof=&water_bodies=&cool_pavement=
+    /budget?budget=&actions=cool_roof,green_roof,...
+    /history/runs?city=&start=&end=
+    /history/top?city=&column=ST_B10&k=100&start=&end=&ascending=0
+    /history/bbox?bbox=min_lon,min_lat,max_lon,max_lat&city=&start=&end=
+    /history/persistent?city=&level=High&runs=3&column=risk_level
+    /history/cell?city=&cell_id=&start=&end=
+
+Results come from grid snapshots and the run history store written by
+the dashboard, so requests never touch Earth Engine.
+"""
+import argparse
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pyarrow as pa
+
+from config.settings import (
+    API_HOST,
+    API_PORT,
+    API_WORKERS,
+    API_MAX_PENDING,
+    API_CACHE_SIZE,
+    PERSISTENT_RISK_RUNS,
+)
+from config.costs import COST_MODEL
+from cities.registry import get_registry
+from processing.heat_score import summarize_grid
+from simulation.mitigation import simulate_temperature
+from simulation.budget_impact import estimate_budget_impact
+from storage.results_store import get_store
+from storage.snapshots import (
+    DATE_PATTERN,
+    load_snapshot,
+    snapshot_dates,
+    snapshot_version,
+)
+
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------------------------
+# RESPONSE CACHE
+# --------------------------------------------------
+class ResponseCache:
+    """
+    Bounded LRU of (etag, content_type, body) keyed on endpoint + parameters.
+    """
+
+    def __init__(self, size=API_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        return None
+
+    def put(self, key, response):
+        with self._lock:
+            self._items[key] = response
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+# --------------------------------------------------
+# PARAMETERS
+# --------------------------------------------------
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _flag(params, name):
+    return _param(params, name, "0").lower() in ("1", "true", "yes")
+
+
+def _number(params, name, default, cast=float):
+    try:
+        return cast(_param(params, name, default))
+    except ValueError:
+        raise ApiError(400, f"Invalid number for '{name}'")
+
+
+def _snapshot(params):
+    """
+    Resolve city/date to a stored snapshot and its version. Only
+    registered cities and YYYY-MM-DD dates are accepted, as both become
+    parts of the snapshot's file path.
+    """
+
+    city = _param(params, "city")
+    if not city:
+        raise ApiError(400, "Missing 'city'")
+    if city not in get_registry():
+        raise ApiError(404, f"Unknown city {city}")
+    city = get_registry().get(city)["name"]
+
+    date = _param(params, "date")
+    if date is not None and not DATE_PATTERN.fullmatch(date):
+        raise ApiError(400, "'date' must be YYYY-MM-DD")
+
+    date = date or (snapshot_dates(city) or [None])[-1]
+    version = snapshot_version(city, date) if date else None
+    if version is None:
+        raise ApiError(404, f"No results for {city} on {date or 'any date'}")
+
+    return city, date, version
+
+
+def _load(city, date):
+    # The snapshot can be removed between the version check and the read
+    df = load_snapshot(city, date)
+    if df is None:
+        raise ApiError(404, f"No results for {city} on {date}")
+    return df
+
+
+def _etags(header):
+    """
+    Entity tags listed in an If-None-Match header (weak tags compare by
+    their opaque value).
+    """
+    tags = [tag.strip() for tag in (header or "").split(",")]
+    return [tag[2:] if tag.startswith("W/") else tag for tag in tags if tag]
+
+
+def _json_safe(value):
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+# --------------------------------------------------
+# ENDPOINTS
+# Each returns (content_type, body bytes)
+# --------------------------------------------------
+def _frame_body(df, params):
+    columns = _param(params, "columns")
+    if columns:
+        missing = set(columns.split(",")) - set(df.columns)
+        if missing:
+            raise ApiError(400, f"Unknown columns: {', '.join(sorted(missing))}")
+        df = df[columns.split(",")]
+
+    if _param(params, "format", "json") == "arrow":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return ARROW_TYPE, sink.getvalue().to_pybytes()
+
+    return "application/json", df.to_json(orient="records").encode()
+
+
+def _json_body(payload):
+    return "application/json", json.dumps(payload, default=_json_safe).encode()
+
+
+def _bbox(params, required=True):
+    """
+    min_lon,min_lat,max_lon,max_lat from the bbox parameter.
+    """
+    if not _param(params, "bbox") and not required:
+        return None
+    try:
+        bounds = [float(v) for v in _param(params, "bbox", "").split(",")]
+    except ValueError:
+        bounds = []
+    if len(bounds) != 4:
+        raise ApiError(400, "'bbox' must be min_lon,min_lat,max_lon,max_lat")
+    return bounds
+
+
+def cities_endpoint(params):
+    registry = get_registry()
+    bounds = _bbox(params, required=False)
+    names = registry.find_in_bbox(*bounds) if bounds else registry.names()
+
+    return _json_body([
+        {
+            "name": name,
+            "longitude": registry.center(name)[0],
+            "latitude": registry.center(name)[1],
+            "dates": snapshot_dates(name),
+        }
+        for name in names
+    ])
+
+
+def grid_endpoint(params):
+    city, date, _ = _snapshot(params)
+    return _frame_body(_load(city, date), params)
+
+
+def summary_endpoint(params):
+    city, date, _ = _snapshot(params)
+    summary = summarize_grid(_load(city, date))
+    return _json_body({"city": city, "date": date, **{k: _json_safe(v) for k, v in summary.items()}})
+
+
+def scenario_endpoint(params):
+    city, date, _ = _snapshot(params)
+    df = _load(city, date)
+
+    temp_after = simulate_temperature(
+        df,
+        _number(params, "green_cover", 0),
+        _flag(params, "cool_roof"),
+        _flag(params, "green_roof"),
+        _flag(params, "water_bodies"),
+        _flag(params, "cool_pavement"),
+    )
+
+    if _flag(params, "cells"):
+        cells = df[["cell_id", "longitude", "latitude", "ST_B10"]].assign(temp_after=temp_after.to_numpy())
+        return _frame_body(cells, params)
+
+    return _json_body({
+        "city": city,
+        "date": date,
+        "mean_temp": _json_safe(df["ST_B10"].mean()),
+        "mean_temp_after": _json_safe(temp_after.mean()),
+        "mean_cooling": _json_safe((df["ST_B10"] - temp_after).mean()),
+    })
+
+
+def budget_endpoint(params):
+    budget = _number(params, "budget", 5)
+    requested = [a for a in _param(params, "actions", "").split(",") if a]
+
+    unknown = set(requested) - set(COST_MODEL)
+    if unknown:
+        raise ApiError(400, f"Unknown actions: {', '.join(sorted(unknown))}")
+
+    actions = {action: action in requested for action in COST_MODEL}
+    used_budget, cooling, selected = estimate_budget_impact(budget, actions)
+
+    return _json_body({
+        "budget": budget,
+        "used_budget": used_budget,
+        "estimated_cooling": cooling,
+        "selected_actions": selected,
+    })
+
+
+# --------------------------------------------------
+# RUN HISTORY ENDPOINTS
+# --------------------------------------------------
+def _city(params, required=True):
+    city = _param(params, "city")
+    if not city:
+        if required:
+            raise ApiError(400, "Missing 'city'")
+        return None
+    return get_registry().get(city)["name"] if city in get_registry() else city
+
+
+def _range(params):
+    return _param(params, "start"), _param(params, "end")
+
+
+def history_runs_endpoint(params):
+    return _frame_body(get_store().runs(_city(params, required=False), *_range(params)), params)
+
+
+def history_top_endpoint(params):
+    try:
+        top = get_store().top_k(
+            _city(params),
+            _param(params, "column", "ST_B10"),
+            _number(params, "k", 100, int),
+            *_range(params),
+            ascending=_flag(params, "ascending"),
+        )
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    return _frame_body(top, params)
+
+
+def history_bbox_endpoint(params):
+    cells = get_store().query_bbox(_bbox(params), _city(params, required=False), *_range(params))
+    return _frame_body(cells, params)
+
+
+def history_persistent_endpoint(params):
+    try:
+        cells = get_store().persistent_cells(
+            _city(params),
+            _param(params, "level", "High"),
+            _number(params, "runs", PERSISTENT_RISK_RUNS, int),
+            _param(params, "column", "risk_level"),
+            _param(params, "end"),
+        )
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    return _frame_body(cells, params)
+
+
+def history_cell_endpoint(params):
+    cell_id = _number(params, "cell_id", None, int) if _param(params, "cell_id") else None
+    if cell_id is None:
+        raise ApiError(400, "Missing 'cell_id'")
+    return _frame_body(get_store().cell_history(_city(params), cell_id, *_range(params)), params)
+
+
+ROUTES = {
+    "/cities": cities_endpoint,
+    "/grid": grid_endpoint,
+    "/summary": summary_endpoint,
+    "/scenario": scenario_endpoint,
+    "/budget": budget_endpoint,
+    "/history/runs": history_runs_endpoint,
+    "/history/top": history_top_endpoint,
+    "/history/bbox": history_bbox_endpoint,
+    "/history/persistent": history_persistent_endpoint,
+    "/history/cell": history_cell_endpoint,
+}
+
+# Endpoints whose answer depends on a stored snapshot
+SNAPSHOT_ROUTES = {"/grid", "/summary", "/scenario"}
+
+
+# --------------------------------------------------
+# HTTP HANDLER
+# --------------------------------------------------
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "UrbanHeatAPI/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        route = ROUTES.get(url.path)
+
+        if route is None:
+            return self._send_error(404, f"Unknown endpoint {url.path}")
+
+        try:
+            # Snapshot version in the key: new results invalidate old entries
+            version = None
+            if url.path in SNAPSHOT_ROUTES:
+                city, date, version = _snapshot(params)
+                params = {**params, "city": [city], "date": [date]}
+            if url.path == "/cities":
+                version = tuple(tuple(snapshot_dates(name)) for name in get_registry().names())
+            if url.path.startswith("/history/"):
+                version = get_store().version()
+
+            key = (url.path, tuple(sorted((k, tuple(v)) for k, v in params.items())), version)
+            response = self.server.cache.get(key)
+
+            if response is None:
+                content_type, body = route(params)
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                response = (etag, content_type, body)
+                self.server.cache.put(key, response)
+
+        except ApiError as e:
+            return self._send_error(e.status, str(e))
+        except ValueError as e:
+            return self._send_error(400, str(e))
+        except Exception:
+            self.server.handle_error(self.request, self.client_address)
+            return self._send_error(500, "Internal server error")
+
+        etag, content_type, body = response
+
+        if_none_match = _etags(self.headers.get("If-None-Match"))
+        if etag in if_none_match or "*" in if_none_match:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# --------------------------------------------------
+# SERVER WITH BOUNDED CONCURRENCY
+# --------------------------------------------------
+class BoundedHTTPServer(HTTPServer):
+    """
+    HTTP server that handles at most `max_workers` requests at once and
+    queues up to `max_pending` more; beyond that clients get 503.
+    """
+
+    def __init__(self, address, handler=ApiHandler, max_workers=API_WORKERS, max_pending=API_MAX_PENDING):
+        super().__init__(address, handler)
+        self.cache = ResponseCache()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self.slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            request.sendall(b"HTTP/1.0 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Length: 0\r\n\r\n")
+            self.shutdown_request(request)
+            return
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def serve(host=API_HOST, port=API_PORT, max_workers=API_WORKERS):
+    server = BoundedHTTPServer((host, port), max_workers=max_workers)
+    print(f"Serving analysis results on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Urban Heat & Pollution results API")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers)
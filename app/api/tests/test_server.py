@@ -0,0 +1,101 @@
+import http.client
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from api import server
+from storage import snapshots
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_ROOT", str(tmp_path / "results"))
+    snapshots.save_snapshot(pd.DataFrame({
+        "cell_id": [1, 2],
+        "longitude": [73.85, 73.86],
+        "latitude": [18.52, 18.53],
+        "ST_B10": [30.0, 32.0],
+        "risk_level": ["Low", "High"],
+        "pm25": [40.0, 60.0],
+        "health_risk": [0.2, 0.6],
+    }), "Pune", "2024-05-01")
+
+    httpd = server.BoundedHTTPServer(("127.0.0.1", 0), max_workers=2)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    def get(path, headers=None):
+        connection = http.client.HTTPConnection(*httpd.server_address, timeout=10)
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    yield get
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_summary_of_latest_snapshot(api):
+    response, body = api("/summary?city=pune")
+
+    assert response.status == 200
+    summary = json.loads(body)
+    assert (summary["city"], summary["date"], summary["cells"]) == ("Pune", "2024-05-01", 2)
+
+
+@pytest.mark.parametrize("query", [
+    "city=../../etc&date=2024-05-01",
+    "city=Atlantis",
+    "city=Pune/../Delhi",
+])
+def test_unregistered_city_is_not_found(api, query):
+    response, _ = api(f"/grid?{query}")
+    assert response.status == 404
+
+
+@pytest.mark.parametrize("date", ["..%2F..%2Fsecret", "2024-5-1", "latest", "2024-05-01%0A"])
+def test_malformed_date_is_rejected(api, date):
+    response, body = api(f"/grid?city=Pune&date={date}")
+    assert response.status == 400
+    assert "error" in json.loads(body)
+
+
+def test_unexpected_errors_return_500(api, monkeypatch):
+    def broken(params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(server.ROUTES, "/budget", broken)
+    monkeypatch.setattr(server.BoundedHTTPServer, "handle_error", lambda *args: None)
+
+    response, body = api("/budget?budget=5")
+    assert response.status == 500
+    assert json.loads(body) == {"error": "Internal server error"}
+
+
+def test_snapshot_removed_after_version_check(api, monkeypatch):
+    monkeypatch.setattr(server, "load_snapshot", lambda city, date: None)
+
+    response, _ = api("/grid?city=Pune&date=2024-05-01")
+    assert response.status == 404
+
+
+def test_if_none_match_compares_whole_tags(api):
+    response, _ = api("/grid?city=Pune")
+    etag = response.getheader("ETag")
+
+    assert api("/grid?city=Pune", {"If-None-Match": f'"x", {etag}'})[0].status == 304
+    assert api("/grid?city=Pune", {"If-None-Match": f"W/{etag}"})[0].status == 304
+    assert api("/grid?city=Pune", {"If-None-Match": "*"})[0].status == 304
+
+    # A header merely containing the current tag does not match it
+    assert api("/grid?city=Pune", {"If-None-Match": f"{etag}x"})[0].status == 200
+    assert api("/grid?city=Pune", {"If-None-Match": etag[1:-1]})[0].status == 200
+
+
+def test_etags_parsing():
+    assert server._etags(None) == []
+    assert server._etags('"a", W/"b" ,,"c"') == ['"a"', '"b"', '"c"']
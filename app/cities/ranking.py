@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+import pandas as pd
+
+from processing.pipeline import analyze_city
+from processing.heat_score import summarize_grid
+from utils.singleflight import single_flight
+
+
+def _city_summary(registry, name):
+    # Earth Engine failures (quota, timeouts, no imagery) are reported per
+    # city; anything else is a bug and propagates
+    try:
+        df = single_flight(("analyze_city", name), analyze_city, name, registry.roi(name))
+    except ee.EEException as e:
+        return {"city": name, "error": str(e)}
+
+    if df is None or df.empty:
+        return {"city": name}
+
+    return {"city": name, **summarize_grid(df)}
+
+
+def rank_cities(registry, names=None, max_workers=8):
+    """
+    Score registered cities in parallel and rank them by share of
+    high heat-risk cells, then by mean PM2.5.
+    Cities without data are listed last, with the Earth Engine error if any.
+    """
+
+    names = names or registry.names()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        rows = list(pool.map(lambda name: _city_summary(registry, name), names))
+
+    ranking = pd.DataFrame(rows).reindex(
+        columns=["city", "cells", "mean_temp", "high_risk_share", "mean_pm25", "mean_health_risk", "error"]
+    )
+    ranking = ranking.sort_values(
+        ["high_risk_share", "mean_pm25"], ascending=False, na_position="last"
+    ).reset_index(drop=True)
+    ranking.index += 1
+
+    return ranking
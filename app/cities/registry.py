@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Polygon, box
+
+from config.settings import GRID_SCALE, ROI_BUFFER
+from processing.cells import lonlat_to_mercator, cell_center, encode_cell_id
+
+CITIES_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "cities.json")
+
+_METERS_PER_DEGREE = 111320.0
+
+
+# --------------------------------------------------
+# ROI POLYGONS
+# --------------------------------------------------
+def _buffer_polygon(lon, lat, radius, segments=64):
+    """
+    Circle of `radius` meters around (lon, lat) as a lon/lat polygon.
+    """
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    dlat = radius * np.sin(angles) / _METERS_PER_DEGREE
+    dlon = radius * np.cos(angles) / (_METERS_PER_DEGREE * np.cos(np.radians(lat)))
+    return Polygon(np.column_stack([lon + dlon, lat + dlat]))
+
+
+# --------------------------------------------------
+# CITY REGISTRY
+# --------------------------------------------------
+class CityRegistry:
+    """
+    Cities loaded from data/cities.json. Each entry has name, state,
+    longitude, latitude and optionally `roi` (list of [lon, lat] vertices),
+    `buffer` (meters, used when there is no roi) and `guidelines`
+    (list of policy bullet points for the PDF action plan).
+    """
+
+    def __init__(self, cities):
+        self._cities = sorted(cities, key=lambda c: c["name"])
+        self._by_name = {c["name"].lower(): c for c in self._cities}
+
+        self._polygons = [self._polygon(c) for c in self._cities]
+        self._index = shapely.STRtree(self._polygons)
+
+        self._grids = {}
+        self._grids_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=CITIES_FILE):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _polygon(city):
+        if city.get("roi"):
+            return Polygon(city["roi"])
+        return _buffer_polygon(city["longitude"], city["latitude"], city.get("buffer", ROI_BUFFER))
+
+    def __len__(self):
+        return len(self._cities)
+
+    def __contains__(self, name):
+        return name.lower() in self._by_name
+
+    def names(self):
+        return [c["name"] for c in self._cities]
+
+    def get(self, name):
+        return self._by_name[name.lower()]
+
+    def center(self, name):
+        city = self.get(name)
+        return city["longitude"], city["latitude"]
+
+    def polygon(self, name):
+        return self._polygons[self._cities.index(self.get(name))]
+
+    def bounds(self, name):
+        """
+        (min_lon, min_lat, max_lon, max_lat) of the city ROI.
+        """
+        return self.polygon(name).bounds
+
+    def roi(self, name):
+        """
+        Earth Engine geometry of the city ROI.
+        """
+        import ee
+
+        city = self.get(name)
+        if city.get("roi"):
+            return ee.Geometry.Polygon([city["roi"]])
+        return ee.Geometry.Point([city["longitude"], city["latitude"]]).buffer(
+            city.get("buffer", ROI_BUFFER)
+        )
+
+    def guidelines(self, name):
+        if name not in self:
+            return []
+        return self.get(name).get("guidelines", [])
+
+    # --------------------------------------------------
+    # SPATIAL LOOKUP
+    # --------------------------------------------------
+    def find_at(self, lon, lat):
+        """
+        Cities whose ROI contains the point (sidebar coordinate lookup),
+        nearest centre first.
+        """
+        hits = self._index.query(shapely.Point(lon, lat), predicate="intersects")
+        cities = [self._cities[i] for i in hits]
+        cities.sort(key=lambda c: (c["longitude"] - lon) ** 2 + (c["latitude"] - lat) ** 2)
+        return [c["name"] for c in cities]
+
+    def find_in_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        """
+        Cities whose ROI intersects the box (API /cities?bbox=).
+        """
+        hits = self._index.query(box(min_lon, min_lat, max_lon, max_lat), predicate="intersects")
+        return sorted(self._cities[i]["name"] for i in hits)
+
+    # --------------------------------------------------
+    # PRECOMPUTED GRIDS
+    # --------------------------------------------------
+    def cell_grid(self, name, scale=GRID_SCALE):
+        """
+        Grid cells (cell_id, row, col, centre lon/lat) covering the city ROI:
+        every GRID_CRS cell the ROI overlaps, the same layout as the
+        coveringGrid of processing.grid_analysis.create_grid.
+        Computed once per city and scale.
+        """
+
+        key = (self.get(name)["name"], scale)
+        with self._grids_lock:
+            if key in self._grids:
+                return self._grids[key]
+
+        polygon = shapely.transform(
+            self.polygon(name), lambda xy: np.column_stack(lonlat_to_mercator(xy[:, 0], xy[:, 1]))
+        )
+        x0, y0, x1, y1 = polygon.bounds
+
+        rows = np.arange(np.floor(y0 / scale), np.floor(y1 / scale) + 1, dtype=np.int64)
+        cols = np.arange(np.floor(x0 / scale), np.floor(x1 / scale) + 1, dtype=np.int64)
+        row, col = (a.ravel() for a in np.meshgrid(rows, cols, indexing="ij"))
+
+        # Cells sharing only an edge or corner with the ROI are not covered
+        cells = shapely.box(col * scale, row * scale, (col + 1) * scale, (row + 1) * scale)
+        covered = shapely.intersects(polygon, cells) & ~shapely.touches(polygon, cells)
+        row, col = row[covered], col[covered]
+
+        lon, lat = cell_center(row, col, scale)
+        grid = pd.DataFrame({
+            "cell_id": encode_cell_id(row, col),
+            "row": row,
+            "col": col,
+            "longitude": lon,
+            "latitude": lat,
+        })
+
+        with self._grids_lock:
+            return self._grids.setdefault(key, grid)
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry():
+    """
+    Process-wide registry loaded from CITIES_FILE.
+    """
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = CityRegistry.load()
+        return _REGISTRY
@@ -0,0 +1,78 @@
+import numpy as np
+
+from cities.registry import CityRegistry, get_registry
+from processing.cells import cell_index, encode_cell_id, lonlat_to_mercator
+
+CITIES = [
+    {"name": "Pune", "state": "Maharashtra", "longitude": 73.8567, "latitude": 18.5204, "buffer": 10000},
+    {"name": "Mumbai", "state": "Maharashtra", "longitude": 72.8777, "latitude": 19.0760,
+     "roi": [[72.7, 18.9], [73.0, 18.9], [73.0, 19.3], [72.7, 19.3]],
+     "guidelines": ["Cool roofs"]},
+]
+
+
+def test_lookup_by_name_is_case_insensitive():
+    registry = CityRegistry(CITIES)
+
+    assert "pune" in registry
+    assert registry.get("MUMBAI")["name"] == "Mumbai"
+    assert registry.names() == ["Mumbai", "Pune"]
+
+
+def test_find_at_uses_buffer_and_roi_polygons():
+    registry = CityRegistry(CITIES)
+
+    assert registry.find_at(73.86, 18.53) == ["Pune"]
+    assert registry.find_at(72.72, 19.25) == ["Mumbai"]
+    assert registry.find_at(80.0, 13.0) == []
+
+
+def test_find_in_bbox():
+    registry = CityRegistry(CITIES)
+
+    assert registry.find_in_bbox(72.0, 18.0, 75.0, 20.0) == ["Mumbai", "Pune"]
+    assert registry.find_in_bbox(73.5, 18.0, 75.0, 19.0) == ["Pune"]
+
+
+def test_bounds_of_buffer_roi():
+    min_lon, min_lat, max_lon, max_lat = CityRegistry(CITIES).bounds("Pune")
+
+    # 10 km is about 0.09 degrees of latitude
+    assert abs((max_lat - min_lat) / 2 - 0.0898) < 0.001
+    assert min_lon < 73.8567 < max_lon
+
+
+def test_guidelines():
+    registry = CityRegistry(CITIES)
+
+    assert registry.guidelines("Mumbai") == ["Cool roofs"]
+    assert registry.guidelines("Pune") == []
+    assert registry.guidelines("Atlantis") == []
+
+
+def test_bundled_registry_loads():
+    registry = get_registry()
+
+    assert "Delhi" in registry
+    assert registry.find_at(*registry.center("Delhi"))[0] == "Delhi"
+
+
+def test_cell_grid_covers_every_cell_the_roi_overlaps():
+    registry = CityRegistry(CITIES)
+    grid = registry.cell_grid("Mumbai", scale=500)
+
+    # Cell centres round-trip to their own cell IDs
+    row, col = cell_index(grid["longitude"].to_numpy(), grid["latitude"].to_numpy(), 500)
+    assert (encode_cell_id(row, col) == grid["cell_id"].to_numpy()).all()
+
+    # Edge cells whose centre lies outside the box are still covered
+    x0, y0 = lonlat_to_mercator(72.7, 18.9)
+    corner = encode_cell_id(np.floor(y0 / 500).astype(np.int64), np.floor(x0 / 500).astype(np.int64))
+    assert corner in set(grid["cell_id"])
+    assert grid["cell_id"].is_unique
+
+    x1, y1 = lonlat_to_mercator(73.0, 19.3)
+    assert len(grid) == len(np.arange(np.floor(y0 / 500), np.floor(y1 / 500) + 1)) * \
+        len(np.arange(np.floor(x0 / 500), np.floor(x1 / 500) + 1))
+
+    assert registry.cell_grid("mumbai", scale=500) is grid
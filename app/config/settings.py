@@ -5,7 +5,16 @@
 START_DATE = "2024-01-01"
 END_DATE = "2024-12-31"
 
+COMPOSITE_DAYS = 90               # look-back window for the cloud-free composite
+COMPOSITE_MAX_SCENE_CLOUD = 70    # % scene cloud cover; remaining clouds are masked per pixel
+COMPOSITE_PERCENTILE = 50         # 50 = median composite
+COMPOSITE_MEMORY_BUDGET = 512 * 1024 ** 2   # bytes for local raster compositing windows
+
 GRID_SCALE = 500          # meters
+GRID_CRS = "EPSG:3857"    # grid cells are GRID_SCALE squares in this projection
+PYRAMID_LEVELS = [2000, 1000, 500, 100]   # meters; each a multiple of the next finer
+PYRAMID_PIXEL_SCALE = 30  # meters, native Landsat pixels summed into pyramid cells
+GRID_STATE_DIR = "data/grid_state"  # relative to app/; per-city pyramid base stats
 ROI_BUFFER = 15000        # meters
 
 # ----------------------------------------
@@ -31,3 +40,155 @@ HIGH_RISK_THRESHOLD = 0.7
 MODERATE_RISK_THRESHOLD = 0.4
 SDG_HIGH_IMPACT = 1.5
 SDG_MODERATE_IMPACT = 0.7
+
+# ----------------------------------------
+# HEALTH RISK & POLLUTION FUSION
+# ----------------------------------------
+
+HEAT_HEALTH_WEIGHT = 0.6
+POLLUTION_HEALTH_WEIGHT = 0.4
+
+PM25_NORM_MAX = 250       # µg/m³ mapped to pm_norm = 1
+PM25_MODERATE = 30        # µg/m³
+PM25_HIGH = 60            # µg/m³
+
+IDW_NEIGHBORS = 8         # nearest stations per grid cell
+IDW_POWER = 2
+NO2_BLEND_WEIGHT = 0.3    # share of Sentinel-5P NO2 in the pollution index
+STATION_SEARCH_PAD = 0.1  # degrees around the grid when looking up stations
+
+SEVERE_HEALTH_THRESHOLD = 0.75
+HIGH_HEALTH_THRESHOLD = 0.55
+MODERATE_HEALTH_THRESHOLD = 0.35
+
+# ----------------------------------------
+# HOTSPOT ANALYSIS
+# ----------------------------------------
+
+HOTSPOT_NEIGHBORS = "queen"   # queen | rook | distance
+HOTSPOT_DISTANCE_BAND = 1000  # meters, used when HOTSPOT_NEIGHBORS = "distance"
+HOTSPOT_PERMUTATIONS = 99
+HOTSPOT_ALPHA = 0.05
+
+# ----------------------------------------
+# INCREMENTAL UPDATES
+# ----------------------------------------
+
+MIN_VALID_PIXELS = 10     # cloud-free pixels a cell needs before a new scene replaces its stats
+
+# ----------------------------------------
+# CHARTS
+# ----------------------------------------
+
+CHART_CACHE_SIZE = 64     # rendered images kept in memory
+CHART_WORKERS = 2         # Agg rendering threads
+CHART_DPI = 100
+
+# ----------------------------------------
+# HEAT + SMOG EARLY WARNING
+# ----------------------------------------
+
+HEATWAVE_LST_THRESHOLD = 42   # °C, 90th percentile surface temperature of a ward
+HEATWAVE_PERSISTENCE = 2      # consecutive LST snapshots above threshold
+SMOG_AQI_THRESHOLD = 200      # rolling mean AQI ("Very Poor" and above)
+SMOG_PERSISTENCE = 3          # consecutive AQI readings above threshold
+ALERT_WINDOW = 24             # readings kept per ward/city ring buffer
+ALERT_REPEAT_AFTER = 6 * 3600 # seconds before an unchanged active alert is re-sent
+
+# Ward label of city-wide readings and rankings (grids carry no ward column)
+CITY_WIDE = "ALL"
+
+# ----------------------------------------
+# RESULTS & API
+# ----------------------------------------
+
+RESULTS_DIR = "data/results"  # relative to app/; per-city grid snapshots
+RESULTS_DB = "data/results/results.sqlite"  # relative to app/; run history
+PERSISTENT_RISK_RUNS = 3      # consecutive runs for "persistently High" cells
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_WORKERS = 8               # requests handled concurrently
+API_MAX_PENDING = 64          # queued requests before answering 503
+API_CACHE_SIZE = 256          # cached responses
+
+# ----------------------------------------
+# POPULATION EXPOSURE
+# ----------------------------------------
+
+POPULATION_RASTER = "data/population.tif"  # relative to app/; people per pixel (WorldPop ppp)
+POPULATION_WINDOW_ROWS = 1024              # raster rows read per block
+
+# ----------------------------------------
+# SENSITIVITY ANALYSIS
+# ----------------------------------------
+
+SENSITIVITY_SAMPLES = 2000              # weight/threshold combinations
+SENSITIVITY_CONCENTRATION = 50          # Dirichlet concentration around the weights
+SENSITIVITY_THRESHOLD_SPREAD = 0.05     # +/- range for thresholds and health weight
+SENSITIVITY_ROBUST_SHARE = 0.9          # High in >= 90% of settings = robustly High
+SENSITIVITY_RANK_SAMPLES = 200          # settings used for rank correlation / top-k overlap
+SENSITIVITY_MEMORY_BUDGET = 256 * 1024 ** 2  # bytes of score matrix per chunk
+
+# ----------------------------------------
+# TEMPORAL TRENDS
+# ----------------------------------------
+
+TREND_STACK_DIR = "data/trends"    # relative to app/; <city>/{dates,cell_ids,<band>}.npy
+TREND_MIN_OBS = 3                  # valid observations for a trend / climatology
+TREND_SEASON_MONTHS = 1            # climatology season: latest scene's month +/- this
+TREND_MEMORY_BUDGET = 512 * 1024 ** 2  # bytes per worker chunk
+TREND_WARMING_RATE = 0.3           # °C per year (Theil-Sen) counted as warming
+ANOMALY_Z = 2.0                    # latest scene z-score counted as anomalous
+CHRONIC_HEAT_QUANTILE = 0.9        # seasonal climatology quantile counted as chronic
+
+# ----------------------------------------
+# RECORD / REPLAY
+# ----------------------------------------
+
+REPLAY_DIR = "data/replay"  # relative to app/; recorded HTTP responses
+# Query parameters left out of request keys and the archive (credentials)
+REPLAY_IGNORED_PARAMS = {"token", "key", "api_key", "access_token"}
+# OAuth token endpoints (host + path): keyed by method and URL only, since
+# their bodies carry signed JWTs with fresh iat / exp claims on every call
+REPLAY_TOKEN_URLS = {
+    "oauth2.googleapis.com/token",
+    "www.googleapis.com/oauth2/v4/token",
+    "accounts.google.com/o/oauth2/token",
+}
+# Fields of token responses replaced before they are written to the archive
+REPLAY_REDACTED_FIELDS = {"access_token", "id_token", "refresh_token", "client_secret"}
+# Response headers replaced before they are written to the archive
+REPLAY_REDACTED_HEADERS = {"authorization", "proxy-authorization", "x-goog-api-key"}
+
+# ----------------------------------------
+# SHARED RESULTS ACROSS SESSIONS
+# ----------------------------------------
+
+SHARED_RESULT_TTL = 3600    # seconds satellite / grid results are reused
+SHARED_RESULT_SIZE = 64     # results kept (LRU)
+AQI_SHARED_TTL = 600        # seconds AQI readings are reused
+GRID_REFRESH_TTL = 86400    # seconds between checks for a newer Landsat scene
+
+# ----------------------------------------
+# INTERVENTION SITING
+# ----------------------------------------
+
+SITING_PROGRAM_CELLS = 100      # grid cells one COST_MODEL programme covers
+SITING_MAX_COOLING = 2.5        # °C scale at which stacked interventions saturate
+SITING_BUILT_NDBI = 0.2         # NDBI treated as fully built-up (roofs / pavements)
+SITING_GREEN_NDVI = 0.6         # NDVI treated as fully vegetated (no room to green)
+SITING_COST_STEP = 0.001        # ₹ crore budget resolution of the exact solver
+SITING_EXACT_MAX_PAIRS = 1000   # (cell, intervention) pairs solved exactly in "auto"
+SITING_EXACT_MAX_STATES = 20_000_000  # cells x budget steps of the exact solver
+SITING_MAP_SITES = 2000         # top-ranked sites drawn on the map
+
+# ----------------------------------------
+# RASTER EXPORT
+# ----------------------------------------
+
+EXPORT_DIR = "data/exports"      # relative to app/; Cloud-Optimized GeoTIFFs
+EXPORT_BLOCK_SIZE = 512          # COG tile size (pixels)
+EXPORT_COMPRESS = "DEFLATE"
+EXPORT_WINDOW_ROWS = 512         # raster rows per windowed write
+EXPORT_CHUNK_ROWS = 500_000      # grid rows read per chunk
+EXPORT_GDAL_CACHE = 256 * 1024 ** 2  # bytes of GDAL block cache while writing
@@ -3,21 +3,63 @@
 # ==================================================
 import streamlit as st
 import streamlit.components.v1 as components
-import ee
-import geemap.foliumap as geemap
+import io
+import os
+import tempfile
+import time
+import zipfile
+import numpy as np
 import pandas as pd
 import folium
 import matplotlib.pyplot as plt
 
+from utils.replay import install_from_env
+from utils.singleflight import single_flight, shared_view, enable_copy_on_write
 from satellite.gee_auth import initialize_gee
-from satellite.fetch_data import fetch_landsat, calculate_lst, fetch_pollution
+from cities.registry import get_registry
+from cities.ranking import rank_cities
 from satellite.fetch_aqi import fetch_city_aqi
-from processing.indices import calculate_ndvi, calculate_ndbi
+from processing.pipeline import (
+    build_feature_image,
+    load_pyramid,
+    refresh_pyramid,
+    fetch_grid_stations,
+    score_grid,
+)
+from processing.hotspots import detect_hotspots
+from processing.sensitivity import sensitivity_analysis, sensitivity_summary
+from processing.trends import directory_trends, classify_heat_persistence
+from processing.exposure import population_by_cell, exposure_summary, ward_exposure
+from storage.snapshots import save_snapshot
+from storage.results_store import get_store
+from alerts.early_warning import city_evaluator, lst_snapshot_event
 from simulation.mitigation import simulate_temperature
 from simulation.budget_impact import estimate_budget_impact
-from visualization.heatmap import create_heatmap
+from simulation.siting import optimize_siting, siting_summary
+from visualization.heatmap import create_heatmap, create_cluster_map, PERSISTENCE_COLORS, SITING_COLORS
+from visualization.charts import render_chart, render_charts
 from sdg.impact import sdg_mapping
 from reporting.heat_action_plan import generate_heat_pollution_action_plan
+from reporting.raster_export import export_rasters, EXPORT_ROOT
+from config.settings import (
+    GRID_SCALE,
+    PERSISTENT_RISK_RUNS,
+    POPULATION_RASTER,
+    TEMP_WEIGHT,
+    NDBI_WEIGHT,
+    NDVI_WEIGHT,
+    HIGH_RISK_THRESHOLD,
+    MODERATE_RISK_THRESHOLD,
+    SENSITIVITY_ROBUST_SHARE,
+    TREND_STACK_DIR,
+    TREND_WARMING_RATE,
+    ANOMALY_Z,
+    CHRONIC_HEAT_QUANTILE,
+    AQI_SHARED_TTL,
+    GRID_REFRESH_TTL,
+    SITING_MAP_SITES,
+    CITY_WIDE,
+)
 
 # ==================================================
 # STREAMLIT PAGE CONFIG (MUST BE FIRST)
@@ -46,6 +88,18 @@ st.markdown(
     """
 )
 
+# ==================================================
+# PROCESS-WIDE SETUP (FIRST RUN OF THE SERVER PROCESS)
+# ==================================================
+# Grid frames are shared between sessions (utils/singleflight.py), so pandas
+# copy-on-write must be on before any of them is built; see the README
+enable_copy_on_write()
+
+# ==================================================
+# RECORD / REPLAY OF EXTERNAL CALLS (UHI_REPLAY=record|replay)
+# ==================================================
+http_replay = install_from_env()
+
 # ==================================================
 # INITIALIZE GOOGLE EARTH ENGINE
 # ==================================================
@@ -56,23 +110,32 @@ initialize_gee()
 # ==================================================
 st.sidebar.header("🌍 Select City")
 
-city = st.sidebar.selectbox("City", ["Pune", "Mumbai", "Delhi"])
+registry = get_registry()
+city_names = registry.names()
 
-city_coords = {
-    "Pune": [73.8567, 18.5204],
-    "Mumbai": [72.8777, 19.0760],
-    "Delhi": [77.1025, 28.7041],
-}
+st.session_state.setdefault("city", "Pune")
+
+with st.sidebar.expander("📍 Find city by coordinates"):
+    pick_lat = st.number_input("Latitude", value=18.5204, format="%.4f")
+    pick_lon = st.number_input("Longitude", value=73.8567, format="%.4f")
+    if st.button("Find city"):
+        matches = registry.find_at(pick_lon, pick_lat)
+        if matches:
+            st.session_state["city"] = matches[0]
+        else:
+            st.warning("No registered city covers this point.")
+
+city = st.sidebar.selectbox("City", city_names, key="city")
 
-lon, lat = city_coords[city]
-roi = ee.Geometry.Point([lon, lat]).buffer(15000)
+lon, lat = registry.center(city)
+roi = registry.roi(city)
 
 # ==================================================
 # REAL-TIME AQI
 # ==================================================
 st.subheader("🌫️ Real-Time Air Quality Index (AQI)")
 
-aqi_df = fetch_city_aqi(city)
+aqi_df = single_flight(("aqi", city), fetch_city_aqi, city, ttl=AQI_SHARED_TTL)
 
 if aqi_df is None or aqi_df.empty:
     st.error("AQI data unavailable.")
@@ -108,6 +171,10 @@ if use_ground_aqi:
 # ==================================================
 # COOLING INTERVENTIONS
 # ==================================================
+if http_replay is not None:
+    with st.sidebar.expander(f"⏱️ External calls ({http_replay.mode})"):
+        st.dataframe(http_replay.call_stats(), use_container_width=True)
+
 st.sidebar.header("🌱 Cooling Interventions")
 
 green_cover = st.sidebar.slider("Increase green cover (%)", 0, 50, 20)
@@ -133,87 +200,105 @@ actions = {
 # ==================================================
 # FETCH SATELLITE DATA
 # ==================================================
+# The composite is rebuilt daily so newly arrived scenes enter it
+today = time.strftime("%Y-%m-%d", time.gmtime())
 with st.spinner("🔄 Fetching satellite data..."):
-    image = fetch_landsat(roi)
+    final_image = single_flight(("feature_image", city, today), build_feature_image, roi, ttl=GRID_REFRESH_TTL)
 
-if image is None:
+if final_image is None:
     st.error("Satellite data could not be loaded.")
     st.stop()
 
-lst = calculate_lst(image).rename("ST_B10")
-ndvi = calculate_ndvi(image)
-ndbi = calculate_ndbi(image)
-pollution = fetch_pollution(roi)
-
-final_image = lst.addBands([ndvi, ndbi])
-if pollution is not None:
-    final_image = final_image.addBands(pollution)
-
 # ==================================================
-# GRID ANALYSIS
+# GRID ANALYSIS (MULTI-RESOLUTION PYRAMID)
 # ==================================================
-grid = geemap.create_grid(roi, scale=500)
+# One pyramid per city shared by all sessions, so concurrent users trigger
+# a single reduction and reuse each other's drill-downs. Its base stats are
+# saved, so the full reduction runs only the first time a city is analysed.
+with st.spinner("🔄 Reducing satellite data to the analysis grid..."):
+    cells = registry.cell_grid(city)
+    pyramid = single_flight(("pyramid", city, GRID_SCALE), load_pyramid, city, final_image, roi, GRID_SCALE, cells)
 
-def add_lat_lon(feature):
-    centroid = feature.geometry().centroid(100)
-    coords = centroid.coordinates()
-    return feature.set({
-        "longitude": coords.get(0),
-        "latitude": coords.get(1)
-    })
+# Daily refresh: fold a Landsat scene the pyramid has not seen yet, reducing
+# only the cells inside its footprint (once per city/day)
+with st.spinner("🔄 Checking for a newer Landsat scene..."):
+    grid_changes = single_flight(
+        ("grid_refresh", city, today), refresh_pyramid, city, pyramid, final_image, roi, cells,
+        ttl=GRID_REFRESH_TTL
+    )
 
-stats = (
-    final_image
-    .reduceRegions(grid, ee.Reducer.mean(), 500)
-    .map(add_lat_lon)
-)
+if "scene" in grid_changes.attrs:
+    st.caption(
+        f"Latest scene {grid_changes.attrs['scene']} folded in: "
+        f"{len(grid_changes)} cells changed risk class"
+    )
 
-df = geemap.ee_to_df(stats).dropna()
+# Shallow, copy-on-write view: scoring adds columns without copying the grid
+df = shared_view(pyramid.level(GRID_SCALE))
 
 # ==================================================
-# HEAT RISK
+# HEAT + HEALTH RISK (HEAT + INTERPOLATED PM2.5 + NO2)
 # ==================================================
-df["temp_norm"] = (df["ST_B10"] - df["ST_B10"].min()) / (df["ST_B10"].max() - df["ST_B10"].min())
-df["ndvi_norm"] = 1 - df["NDVI"]
-df["ndbi_norm"] = df["NDBI"]
-
-df["heat_risk"] = 0.5 * df["temp_norm"] + 0.3 * df["ndbi_norm"] + 0.2 * df["ndvi_norm"]
-
-df["risk_level"] = df["heat_risk"].apply(
-    lambda x: "High" if x > 0.7 else "Moderate" if x > 0.4 else "Low"
+stations = (
+    single_flight(("stations", city), fetch_grid_stations, df, aqi_df, ttl=AQI_SHARED_TTL)
+    if use_ground_aqi else None
 )
+df = score_grid(df, stations)
 
 # ==================================================
-# HEALTH RISK (HEAT + REAL AQI)
+# SPATIAL HOTSPOTS (GETIS-ORD Gi* + LOCAL MORAN'S I)
 # ==================================================
-if use_ground_aqi and avg_pm25 is not None:
-    pm_norm = min(avg_pm25 / 250, 1)
-else:
-    pm_norm = 0
+df = detect_hotspots(df)
 
-df["health_risk"] = 0.6 * df["heat_risk"] + 0.4 * pm_norm
+# ==================================================
+# TEMPORAL TRENDS (LOCAL SCENE STACKS, IF PRESENT)
+# ==================================================
+trend_dir = os.path.join(os.path.dirname(__file__), TREND_STACK_DIR, city)
+has_trends = os.path.exists(os.path.join(trend_dir, "ST_B10.npy"))
+
+if has_trends:
+    trend_cache = st.session_state.setdefault("trends", {})
+    if city not in trend_cache:
+        with st.spinner("🔄 Computing per-cell trends and anomalies..."):
+            trend_cache[city] = directory_trends(trend_dir)
+    df = df.merge(trend_cache[city], on="cell_id", how="left")
+    df["heat_persistence"] = classify_heat_persistence(df)
+
+# Publish the scored grid for the results API and keep it in the run
+# history store, once per city/day/mode for the whole process
+def publish_run(df, city, date):
+    path = save_snapshot(df, city, date)
+    get_store().insert_run(df, city, date)
+    return path
+
+
+single_flight(("publish_run", city, today, use_ground_aqi), publish_run, df, city, today, ttl=GRID_REFRESH_TTL)
 
-df["health_risk_level"] = df["health_risk"].apply(
-    lambda x: "Severe" if x > 0.75 else
-              "High" if x > 0.55 else
-              "Moderate" if x > 0.35 else
-              "Low"
-)
 # ==================================================
-# POLLUTION LEVEL CLASSIFICATION (PM2.5)
+# HEAT + SMOG EARLY WARNING
 # ==================================================
-def pm25_to_level(pm):
-    if pm <= 30:
-        return "Low"
-    elif pm <= 60:
-        return "Moderate"
-    else:
-        return "High"
+# One evaluator per city for the whole server process, so readings build
+# up across sessions and days. Each reading carries its source: AQI is a new
+# observation every hour, the LST snapshot only when a new Landsat scene is
+# folded in (or the composite is rebuilt the next day), so reruns and other
+# sessions re-feeding the same observation do not count as new readings.
+evaluator = city_evaluator(city)
 
-if use_ground_aqi and avg_pm25 is not None:
-    df["pollution_level"] = pm25_to_level(avg_pm25)
-else:
-    df["pollution_level"] = "Unknown"
+reading_time = int(time.time() // 3600 * 3600)
+if use_ground_aqi:
+    evaluator.process({"type": "aqi", "city": city, "time": reading_time, "aqi": avg_aqi, "source": reading_time})
+lst_source = ",".join(sorted(pyramid.scenes)) or today
+evaluator.process(lst_snapshot_event(city, df, reading_time, source=lst_source))
+
+city_alerts = [a for a in evaluator.active_alerts() if a["city"] == city]
+
+st.subheader("🚨 Heat + Smog Early Warning")
+if not city_alerts:
+    st.success("No active heatwave or smog warnings.")
+for alert in city_alerts:
+    label = {"heatwave": "Heatwave", "smog": "Smog", "heat_smog": "Heatwave + Smog"}[alert["rule"]]
+    area = "city-wide" if alert["ward"] == CITY_WIDE else f"ward {alert['ward']}"
+    st.error(f"**{label} warning** ({area}) active since {pd.to_datetime(alert['since'], unit='s')} UTC")
 
 # ==================================================
 # HEALTH RISK HOTSPOTS MAP
@@ -239,7 +324,8 @@ for _, row in df.iterrows():
         popup=f"""
         Heat risk: {row['risk_level']}<br>
         Health risk: {row['health_risk_level']}<br>
-        Temp: {row['ST_B10']:.1f} °C
+        Temp: {row['ST_B10']:.1f} °C<br>
+        PM2.5: {row['pm25']:.0f} µg/m³
         """
     ).add_to(health_map)
 
@@ -251,29 +337,171 @@ components.html(health_map._repr_html_(), height=500)
 st.subheader("🔥 Urban Heat Hotspots")
 heatmap = create_heatmap(df)
 components.html(heatmap._repr_html_(), height=600)
+
 # ==================================================
-# 🌫️ POLLUTION LEVEL DISTRIBUTION
+# POPULATION EXPOSURE
 # ==================================================
-st.subheader("🌫️ Pollution Level Distribution (PM2.5)")
+exposure = None
+exposed_pct = None
+population = None
+population_path = os.path.join(os.path.dirname(__file__), POPULATION_RASTER)
+
+if os.path.exists(population_path):
+    st.subheader("👥 Population Exposure")
+
+    # Population per cell only depends on the city's precomputed grid, not on
+    # the scores, so it is aggregated once per city for all sessions
+    with st.spinner("🔄 Aggregating population onto the grid..."):
+        city_population = single_flight(
+            ("population", city, GRID_SCALE), population_by_cell, cells, population_path, ttl=GRID_REFRESH_TTL
+        )
+    population = pd.Series(city_population, index=cells["cell_id"]).reindex(df["cell_id"], fill_value=0).to_numpy()
+
+    exposure = exposure_summary(df, population)
+    # NaN when the raster has no people over the grid
+    if np.isfinite(exposure["people_high_risk_pct"]):
+        exposed_pct = exposure["people_high_risk_pct"]
+    health_risk = exposure.get("pop_health_risk", np.nan)
+
+    if not exposure["population"]:
+        st.warning("The population raster does not cover this city's grid.")
+
+    e1, e2, e3 = st.columns(3)
+    e1.metric("Population", f"{exposure['population'] / 1e6:.2f} M" if exposure["population"] else "N/A")
+    e2.metric("People in High heat risk", f"{exposed_pct:.1f}%" if exposed_pct is not None else "N/A")
+    e3.metric("Population-weighted health risk", f"{health_risk:.2f}" if np.isfinite(health_risk) else "N/A")
+
+    if "ward" not in df:
+        st.caption("The grid has no ward boundaries, so the ward ranking is a single city-wide row.")
+
+    st.dataframe(
+        ward_exposure(df, population).head(10).rename(columns={
+            "ward": "Ward",
+            "population": "Population",
+            "people_high_risk": "People in High heat risk",
+            "pop_heat_risk": "Pop.-weighted heat risk",
+            "pop_health_risk": "Pop.-weighted health risk",
+        }),
+        use_container_width=True
+    )
+
+# ==================================================
+# SENSITIVITY OF HEAT RISK CLASSES
+# ==================================================
+st.subheader("🎯 Robustness of Heat Risk Classes")
+
+sensitivity = None
+if st.checkbox("Test heat-risk weights and thresholds"):
+    # Re-run only when the scored grid changes (city, hour of AQI data, mode)
+    sensitivity_runs = st.session_state.setdefault("sensitivity", {})
+    sensitivity_key = (city, reading_time, use_ground_aqi)
+    if sensitivity_key not in sensitivity_runs:
+        with st.spinner("🔄 Scoring the grid under alternative weights and thresholds..."):
+            sensitivity_cells, per_setting = sensitivity_analysis(df)
+            sensitivity_runs[sensitivity_key] = (
+                sensitivity_cells, sensitivity_summary(sensitivity_cells, per_setting)
+            )
+    sensitivity_cells, sensitivity = sensitivity_runs[sensitivity_key]
+
+    r1, r2, r3 = st.columns(3)
+    r1.metric(
+        "Robustly High cells",
+        sensitivity["robust_high_cells"],
+        f"{sensitivity['robust_high_pct']:.0f}% of {sensitivity['baseline_high_cells']} High",
+        delta_color="off"
+    )
+    r2.metric("Cells with a stable class", f"{sensitivity['stable_cell_share']:.0f}%")
+    r3.metric("Median hotspot overlap (top-k Jaccard)", f"{sensitivity.get('jaccard_median', float('nan')):.2f}")
+
+    st.caption(
+        f"{sensitivity['settings']} weight/threshold combinations around "
+        f"{TEMP_WEIGHT}/{NDBI_WEIGHT}/{NDVI_WEIGHT} and cut-offs "
+        f"{HIGH_RISK_THRESHOLD}/{MODERATE_RISK_THRESHOLD}. Robustly High = High in at least "
+        f"{SENSITIVITY_ROBUST_SHARE:.0%} of them. Median rank correlation with the "
+        f"default ranking: {sensitivity.get('spearman_median', float('nan')):.3f}."
+    )
+
+# ==================================================
+# MULTI-RESOLUTION HEAT VIEW
+# ==================================================
+st.subheader("🔍 Multi-Resolution Heat View")
+
+view_scale = st.select_slider(
+    "Cell size (m)", options=pyramid.scales, value=GRID_SCALE
+)
+
+if view_scale in pyramid.fine_scales:
+    st.caption("Fine cells are computed only for the area you drill into.")
+    col1, col2, col3 = st.columns(3)
+    drill_lat = col1.number_input("Latitude", value=float(lat), format="%.4f")
+    drill_lon = col2.number_input("Longitude", value=float(lon), format="%.4f")
+    drill_km = col3.slider("Area half-width (km)", 0.5, 5.0, 1.5)
+
+    dlat = drill_km / 111.32
+    dlon = drill_km / (111.32 * max(np.cos(np.radians(drill_lat)), 0.1))
+
+    with st.spinner(f"🔄 Computing {view_scale} m cells..."):
+        view_df = pyramid.drill_down(
+            (drill_lon - dlon, drill_lat - dlat, drill_lon + dlon, drill_lat + dlat),
+            view_scale
+        )
+else:
+    view_df = pyramid.level(view_scale)
 
-pollution_counts = df["pollution_level"].value_counts().reindex(
-    ["Low", "Moderate", "High"], fill_value=0
+view_df = view_df.dropna(subset=["ST_B10"])
+if view_df.empty:
+    st.warning("No grid cells with data in the selected area.")
+else:
+    view_map = create_heatmap(view_df)
+    components.html(view_map._repr_html_(), height=500)
+# ==================================================
+# STATISTICALLY SIGNIFICANT HOTSPOTS
+# ==================================================
+st.subheader("📍 Statistically Significant Hotspots (Getis-Ord Gi*)")
+
+hotspot_variable = st.radio(
+    "Variable", ["Heat risk", "Health risk"], horizontal=True
 )
+hotspot_column = "heat_risk" if hotspot_variable == "Heat risk" else "health_risk"
 
-fig, ax = plt.subplots(figsize=(6, 4))
-ax.bar(
-    pollution_counts.index,
-    pollution_counts.values,
-    color=["#2ecc71", "#f1c40f", "#e74c3c"],
-    edgecolor="black"
+hotspot_map = create_cluster_map(df, f"{hotspot_column}_hotspot")
+components.html(hotspot_map._repr_html_(), height=500)
+
+st.caption(
+    "Hot/cold spots are clusters of neighbouring cells with significantly "
+    "high/low values, not just individual cells above a threshold."
 )
 
-ax.set_ylabel("Number of Locations")
-ax.set_xlabel("Pollution Level")
-ax.set_title("Ground-Level Air Pollution (PM2.5)")
-ax.grid(axis="y", linestyle="--", alpha=0.4)
+# ==================================================
+# CHRONIC vs ANOMALOUS HEAT
+# ==================================================
+persistence = None
+if has_trends:
+    st.subheader("📈 Chronic vs Anomalous Heat")
+
+    persistence = (df["heat_persistence"].value_counts(normalize=True) * 100).to_dict()
 
-st.pyplot(fig)
+    p1, p2, p3 = st.columns(3)
+    p1.metric("Chronically hot cells", f"{persistence.get('Chronic', 0):.1f}%")
+    p2.metric("Anomalous in latest scene", f"{persistence.get('Anomaly', 0):.1f}%")
+    p3.metric("Median warming trend", f"{df['ST_B10_sen_slope'].median():+.2f} °C/yr")
+
+    persistence_map = create_cluster_map(df, "heat_persistence", PERSISTENCE_COLORS, "Heat Persistence")
+    components.html(persistence_map._repr_html_(), height=500)
+
+    st.caption(
+        "Chronic: seasonal LST climatology in the city's hottest "
+        f"{1 - CHRONIC_HEAT_QUANTILE:.0%}. Anomaly: latest scene at least "
+        f"{ANOMALY_Z:g}σ above that climatology. Warming: Theil–Sen trend of at least "
+        f"{TREND_WARMING_RATE} °C/yr."
+    )
+
+# ==================================================
+# 🌫️ POLLUTION LEVEL DISTRIBUTION
+# ==================================================
+st.subheader("🌫️ Pollution Level Distribution (PM2.5)")
+
+st.image(render_chart("pollution_levels", df))
 
 st.caption(
     "🟢 Low (≤30 µg/m³)   🟡 Moderate (31–60 µg/m³)   🔴 High (>60 µg/m³)"
@@ -329,6 +557,17 @@ df["temp_after"] = simulate_temperature(
 df["temp_change"] = df["ST_B10"] - df["temp_after"]
 df["sdg_impact"] = df["temp_change"].apply(sdg_mapping)
 
+st.subheader("📈 Cooling Scenario Charts")
+
+scenario_charts = render_charts([
+    ("risk_distribution", df, {}),
+    ("temperature_comparison", df, {}),
+    ("sdg_impact", df, {}),
+])
+
+for column, image in zip(st.columns(3), scenario_charts):
+    column.image(image)
+
 # ==================================================
 # BUDGET VS COOLING IMPACT
 # ==================================================
@@ -345,6 +584,37 @@ st.info(
     """
 )
 
+# ==================================================
+# WHERE TO SPEND THE BUDGET
+# ==================================================
+st.subheader("📍 Intervention Siting Plan")
+
+# Enabled interventions only; all of them when none is selected
+siting_interventions = [action for action, enabled in actions.items() if enabled] or None
+siting_plan = optimize_siting(
+    df,
+    budget,
+    interventions=siting_interventions,
+    population=population,
+)
+
+if siting_plan.empty:
+    st.info("No suitable sites for the selected interventions.")
+else:
+    st.caption(
+        f"{len(siting_plan)} sites ranked by risk-weighted cooling per ₹ crore "
+        f"({siting_plan.attrs['mode']} solver, ₹{siting_plan['cost'].sum():.2f} of ₹{budget} crore)"
+    )
+    st.dataframe(siting_summary(siting_plan), use_container_width=True)
+
+    siting_map = create_cluster_map(
+        siting_plan.head(SITING_MAP_SITES), "intervention", SITING_COLORS, "Siting Plan"
+    )
+    components.html(siting_map._repr_html_(), height=500)
+
+    with st.expander("Ranked sites"):
+        st.dataframe(siting_plan, use_container_width=True)
+
 # ==================================================
 # HEAT & POLLUTION ACTION PLAN
 # ==================================================
@@ -355,6 +625,7 @@ st.markdown(
     **City:** {city}  
     **Average Surface Temperature:** {df['ST_B10'].mean():.1f} °C  
     **High Heat Risk Areas:** {(df['risk_level'] == 'High').mean() * 100:.1f}%  
+    **People in High Heat Risk:** {f"{exposed_pct:.1f}%" if exposed_pct is not None else 'N/A'}  
     **Average PM2.5:** {avg_pm25 if avg_pm25 else 'N/A'} µg/m³
     """
 )
@@ -392,7 +663,16 @@ if st.button("📄 Generate Heat & Pollution Action Plan (PDF)"):
         avg_pm25,
         budget,
         estimated_cooling,
-        selected_actions
+        selected_actions,
+        exposed_pct=exposed_pct,
+        wards="ward" in df,
+        sensitivity=sensitivity,
+        persistence=persistence,
+        charts=[
+            ("Heat Risk Distribution", scenario_charts[0]),
+            ("Temperature Before vs After Cooling", scenario_charts[1]),
+            ("SDG Impact Assessment", scenario_charts[2]),
+        ]
     )
 
     with open(pdf_path, "rb") as f:
@@ -403,6 +683,52 @@ if st.button("📄 Generate Heat & Pollution Action Plan (PDF)"):
             mime="application/pdf"
         )
 
+# ==================================================
+# RUN HISTORY
+# ==================================================
+st.subheader("🗂️ Run History")
+
+store = get_store()
+city_runs = store.runs(city)
+persistent = store.persistent_cells(city, "High", PERSISTENT_RISK_RUNS)
+
+h1, h2 = st.columns(2)
+h1.metric("Stored runs", len(city_runs))
+h2.metric(f"High risk in last {PERSISTENT_RISK_RUNS} runs", f"{len(persistent)} cells")
+
+if len(city_runs):
+    st.caption(f"Top 10 hottest cells across all runs ({city_runs['run_date'].iloc[0]} – {city_runs['run_date'].iloc[-1]})")
+    st.dataframe(
+        store.top_k(city, "ST_B10", 10)[["run_date", "cell_id", "latitude", "longitude", "ST_B10", "risk_level"]],
+        use_container_width=True
+    )
+
+# ==================================================
+# CROSS-CITY RANKING
+# ==================================================
+st.subheader("🏙️ Cross-City Ranking")
+
+ranking_cities = st.multiselect(
+    "Cities to rank", city_names, default=["Delhi", "Mumbai", "Pune"]
+)
+
+if st.button("Rank selected cities") and ranking_cities:
+    with st.spinner("🔄 Scoring cities..."):
+        ranking = rank_cities(registry, ranking_cities)
+
+    st.dataframe(
+        ranking.rename(columns={
+            "city": "City",
+            "cells": "Grid cells",
+            "mean_temp": "Mean LST (°C)",
+            "high_risk_share": "High heat risk (%)",
+            "mean_pm25": "Mean PM2.5 (µg/m³)",
+            "mean_health_risk": "Mean health risk",
+            "error": "Error",
+        }),
+        use_container_width=True
+    )
+
 # ==================================================
 # CSV DOWNLOAD
 # ==================================================
@@ -412,3 +738,29 @@ st.download_button(
     "urban_heat_policy_report.csv",
     "text/csv",
 )
+
+# ==================================================
+# GIS RASTER DOWNLOAD
+# ==================================================
+if st.button("🗺️ Export GIS rasters (Cloud-Optimized GeoTIFF)"):
+    prefix = city.lower().replace(" ", "_")
+    os.makedirs(EXPORT_ROOT, exist_ok=True)
+
+    # A directory per export, so concurrent sessions never write the same
+    # files; it is removed once the rasters are bundled
+    archive = io.BytesIO()
+    with tempfile.TemporaryDirectory(prefix=f"{prefix}_", dir=EXPORT_ROOT) as directory:
+        with st.spinner("🔄 Writing rasters..."):
+            raster_paths = export_rasters(df, directory, prefix=prefix)
+
+        # COGs are already compressed, so the archive only bundles them
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as bundle:
+            for path in raster_paths.values():
+                bundle.write(path, os.path.basename(path))
+
+    st.download_button(
+        "📥 Download GIS rasters (ZIP)",
+        archive.getvalue(),
+        f"{prefix}_rasters.zip",
+        "application/zip",
+    )
@@ -0,0 +1,67 @@
+import numpy as np
+
+from config.settings import GRID_SCALE
+
+# Spherical (web) mercator, matching GRID_CRS
+EARTH_RADIUS = 6378137.0
+
+# Row/col offset so that cell IDs stay non-negative
+_CELL_OFFSET = 1 << 24
+
+
+# --------------------------------------------------
+# CELL INDEXING
+# --------------------------------------------------
+def lonlat_to_mercator(lon, lat):
+    x = np.radians(lon) * EARTH_RADIUS
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS
+    return x, y
+
+
+def mercator_to_lonlat(x, y):
+    lon = np.degrees(np.asarray(x) / EARTH_RADIUS)
+    lat = np.degrees(2 * np.arctan(np.exp(np.asarray(y) / EARTH_RADIUS)) - np.pi / 2)
+    return lon, lat
+
+
+def cell_index(lon, lat, scale=GRID_SCALE):
+    """
+    Row/column of the grid cell containing each (lon, lat) point.
+    """
+    x, y = lonlat_to_mercator(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+    col = np.floor(x / scale).astype(np.int64)
+    row = np.floor(y / scale).astype(np.int64)
+    return row, col
+
+
+def encode_cell_id(row, col):
+    row = np.asarray(row, dtype=np.int64) + _CELL_OFFSET
+    col = np.asarray(col, dtype=np.int64) + _CELL_OFFSET
+    return (row << 26) | col
+
+
+def decode_cell_id(cell_id):
+    cell_id = np.asarray(cell_id, dtype=np.int64)
+    row = (cell_id >> 26) - _CELL_OFFSET
+    col = (cell_id & ((1 << 26) - 1)) - _CELL_OFFSET
+    return row, col
+
+
+def cell_center(row, col, scale=GRID_SCALE):
+    """
+    Longitude/latitude of cell centres.
+    """
+    x = (np.asarray(col) + 0.5) * scale
+    y = (np.asarray(row) + 0.5) * scale
+    return mercator_to_lonlat(x, y)
+
+
+def assign_cell_ids(df, scale=GRID_SCALE):
+    """
+    Add row, col and cell_id columns from the cell centroids.
+    """
+    row, col = cell_index(df["longitude"].to_numpy(), df["latitude"].to_numpy(), scale)
+    df["row"] = row
+    df["col"] = col
+    df["cell_id"] = encode_cell_id(row, col)
+    return df
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.crs import CRS
+from rasterio.errors import WindowError
+from rasterio.windows import Window, from_bounds
+
+from config.settings import GRID_SCALE, GRID_CRS, POPULATION_WINDOW_ROWS, CITY_WIDE
+from processing.cells import lonlat_to_mercator, mercator_to_lonlat, decode_cell_id
+
+RISK_LEVELS = ["Low", "Moderate", "High"]
+HEALTH_LEVELS = ["Low", "Moderate", "High", "Severe"]
+
+
+# --------------------------------------------------
+# POPULATION -> GRID CELLS
+# --------------------------------------------------
+def _position_table(cell_ids):
+    """
+    Dense (row, col) -> grid position lookup over the grid's extent (-1 = no cell).
+    """
+
+    rows, cols = decode_cell_id(cell_ids)
+    row0, col0 = rows.min(), cols.min()
+
+    table = np.full((rows.max() - row0 + 1, cols.max() - col0 + 1), -1, dtype=np.int64)
+    table[rows - row0, cols - col0] = np.arange(len(rows))
+    return table, row0, col0
+
+
+def _lookup(cells, offset, size):
+    """
+    Index into the position table, -1 where outside the grid extent.
+    """
+    index = cells - offset
+    return np.where((index >= 0) & (index < size), index, -1)
+
+
+def population_by_cell(df, path, scale=GRID_SCALE, window_rows=POPULATION_WINDOW_ROWS):
+    """
+    People per grid cell (aligned with df rows) from a population-count
+    raster (e.g. WorldPop "ppp" GeoTIFF, in EPSG:4326 or GRID_CRS).
+
+    Only the window covering the grid is read, in row blocks. Pixel
+    centres map to cells with the same web-mercator indexing as the zonal
+    stats; row and column indices are separable, so each block costs one
+    table gather and one bincount. Cells the raster does not cover get zero.
+    """
+
+    table, row0, col0 = _position_table(df["cell_id"].to_numpy())
+    population = np.zeros(len(df))
+
+    # Grid extent (cell edges) in lon/lat and in mercator metres
+    x_min, x_max = col0 * scale, (col0 + table.shape[1]) * scale
+    y_min, y_max = row0 * scale, (row0 + table.shape[0]) * scale
+
+    with rasterio.open(path) as src:
+        if src.crs is not None and src.crs.is_geographic:
+            (lon_min, lon_max), (lat_min, lat_max) = mercator_to_lonlat([x_min, x_max], [y_min, y_max])
+            bounds = lon_min, lat_min, lon_max, lat_max
+            geographic = True
+        elif src.crs == CRS.from_string(GRID_CRS):
+            bounds = x_min, y_min, x_max, y_max
+            geographic = False
+        else:
+            raise ValueError(f"Population raster must be in EPSG:4326 or {GRID_CRS}, not {src.crs}")
+
+        # One pixel of padding so rounding never drops a partially covered edge
+        window = from_bounds(*bounds, transform=src.transform).round_offsets().round_lengths()
+        window = Window(window.col_off - 1, window.row_off - 1, window.width + 2, window.height + 2)
+        try:
+            window = window.intersection(Window(0, 0, src.width, src.height))
+        except WindowError:
+            # The raster does not reach the grid at all
+            return population
+
+        transform = src.window_transform(window)
+        x = transform.c + (np.arange(window.width) + 0.5) * transform.a
+        if geographic:
+            x, _ = lonlat_to_mercator(x, 0.0)
+        col_index = _lookup(np.floor(x / scale).astype(np.int64), col0, table.shape[1])
+
+        for start in range(0, window.height, window_rows):
+            height = min(window_rows, window.height - start)
+            block = src.read(
+                1, window=Window(window.col_off, window.row_off + start, window.width, height)
+            ).astype(float)
+
+            y = transform.f + (start + np.arange(height) + 0.5) * transform.e
+            if geographic:
+                _, y = lonlat_to_mercator(0.0, y)
+            row_index = _lookup(np.floor(y / scale).astype(np.int64), row0, table.shape[0])
+
+            position = table[row_index[:, None], col_index[None, :]]
+            position[(row_index < 0)[:, None] | (col_index < 0)[None, :]] = -1
+
+            keep = (position >= 0) & np.isfinite(block) & (block > 0)
+            if src.nodata is not None:
+                keep &= block != src.nodata
+
+            population += np.bincount(position[keep], weights=block[keep], minlength=len(df))
+
+    return population
+
+
+# --------------------------------------------------
+# EXPOSURE METRICS
+# --------------------------------------------------
+def _weighted_mean(values, weights):
+    values = np.asarray(values, dtype=float)
+    keep = np.isfinite(values) & (weights > 0)
+    if not keep.any():
+        return float("nan")
+    return float(np.average(values[keep], weights=weights[keep]))
+
+
+def exposure_summary(df, population):
+    """
+    Population-weighted heat / health risk and people per risk class.
+    """
+
+    population = np.asarray(population, dtype=float)
+    total = population.sum()
+
+    people_risk = pd.Series(population).groupby(df["risk_level"].to_numpy()).sum()
+    people_risk = people_risk.reindex(RISK_LEVELS, fill_value=0)
+
+    summary = {
+        "population": total,
+        "pop_heat_risk": _weighted_mean(df["heat_risk"], population),
+        "people_by_risk": people_risk.to_dict(),
+        "people_high_risk_pct": people_risk["High"] / total * 100 if total else float("nan"),
+    }
+
+    if "health_risk" in df:
+        people_health = pd.Series(population).groupby(df["health_risk_level"].to_numpy()).sum()
+        summary["pop_health_risk"] = _weighted_mean(df["health_risk"], population)
+        summary["people_by_health_risk"] = people_health.reindex(HEALTH_LEVELS, fill_value=0).to_dict()
+
+    return summary
+
+
+def ward_exposure(df, population, ward_column="ward"):
+    """
+    Wards ranked by people in High heat risk, with population-weighted
+    heat / health risk. Without a ward column the city is one row.
+    """
+
+    population = np.asarray(population, dtype=float)
+    wards = df[ward_column].to_numpy() if ward_column in df else np.full(len(df), CITY_WIDE)
+
+    heat = df["heat_risk"].to_numpy(dtype=float)
+    health = df["health_risk"].to_numpy(dtype=float) if "health_risk" in df else np.full(len(df), np.nan)
+
+    # Weighted sums and weights per ward; NaN scores drop out of both
+    frame = pd.DataFrame({
+        "ward": wards,
+        "population": population,
+        "people_high_risk": np.where(df["risk_level"].to_numpy() == "High", population, 0),
+        "heat_weighted": np.where(np.isfinite(heat), heat * population, 0),
+        "heat_weight": np.where(np.isfinite(heat), population, 0),
+        "health_weighted": np.where(np.isfinite(health), health * population, 0),
+        "health_weight": np.where(np.isfinite(health), population, 0),
+    })
+    totals = frame.groupby("ward", sort=False).sum()
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ranking = pd.DataFrame({
+            "population": totals["population"],
+            "people_high_risk": totals["people_high_risk"],
+            "pop_heat_risk": totals["heat_weighted"] / totals["heat_weight"],
+            "pop_health_risk": totals["health_weighted"] / totals["health_weight"],
+        })
+
+    return ranking.sort_values(
+        ["people_high_risk", "pop_heat_risk"], ascending=False
+    ).reset_index()
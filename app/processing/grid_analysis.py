@@ -1,8 +1,22 @@
 from satellite.gee_auth import ee
-import geemap
 
-def grid_stats(image, roi, scale=500):
-    grid = geemap.create_grid(roi, scale)
+from config.settings import GRID_SCALE, GRID_CRS
+
+
+# --------------------------------------------------
+# GRID CONSTRUCTION
+# --------------------------------------------------
+def create_grid(roi, scale=GRID_SCALE):
+    """
+    Square GRID_SCALE cells in GRID_CRS. Cells are aligned to the projection
+    origin, so the same location always falls in the same cell across runs
+    (see processing.cells for the matching row/col indexing).
+    """
+    return roi.coveringGrid(ee.Projection(GRID_CRS).atScale(scale))
+
+
+def grid_stats(image, roi, scale=GRID_SCALE):
+    grid = create_grid(roi, scale)
     return image.reduceRegions(
         collection=grid,
         reducer=ee.Reducer.mean(),
@@ -1,7 +1,57 @@
+import numpy as np
+
+from config.settings import (
+    TEMP_WEIGHT,
+    NDBI_WEIGHT,
+    NDVI_WEIGHT,
+    HIGH_RISK_THRESHOLD,
+    MODERATE_RISK_THRESHOLD,
+    HEAT_HEALTH_WEIGHT,
+    POLLUTION_HEALTH_WEIGHT,
+    SEVERE_HEALTH_THRESHOLD,
+    HIGH_HEALTH_THRESHOLD,
+    MODERATE_HEALTH_THRESHOLD,
+)
+
+
 def calculate_heat_risk(df):
     df["heat_risk"] = (
-        0.5 * df["temp_norm"] +
-        0.3 * df["ndbi_norm"] +
-        0.2 * df["ndvi_norm"]
+        TEMP_WEIGHT * df["temp_norm"] +
+        NDBI_WEIGHT * df["ndbi_norm"] +
+        NDVI_WEIGHT * df["ndvi_norm"]
     )
     return df
+
+
+def classify_heat_risk(heat_risk):
+    return np.select(
+        [heat_risk > HIGH_RISK_THRESHOLD, heat_risk > MODERATE_RISK_THRESHOLD],
+        ["High", "Moderate"],
+        default="Low"
+    )
+
+
+def calculate_health_risk(heat_risk, pollution_index):
+    return HEAT_HEALTH_WEIGHT * heat_risk + POLLUTION_HEALTH_WEIGHT * pollution_index
+
+
+def classify_health_risk(health_risk):
+    return np.select(
+        [
+            health_risk > SEVERE_HEALTH_THRESHOLD,
+            health_risk > HIGH_HEALTH_THRESHOLD,
+            health_risk > MODERATE_HEALTH_THRESHOLD,
+        ],
+        ["Severe", "High", "Moderate"],
+        default="Low"
+    )
+
+
+def summarize_grid(df):
+    return {
+        "cells": len(df),
+        "mean_temp": df["ST_B10"].mean(),
+        "high_risk_share": (df["risk_level"] == "High").mean() * 100,
+        "mean_pm25": df["pm25"].mean(),
+        "mean_health_risk": df["health_risk"].mean(),
+    }
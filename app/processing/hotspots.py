@@ -0,0 +1,275 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+from scipy.stats import norm
+
+from config.settings import (
+    GRID_SCALE,
+    HOTSPOT_NEIGHBORS,
+    HOTSPOT_DISTANCE_BAND,
+    HOTSPOT_PERMUTATIONS,
+    HOTSPOT_ALPHA,
+)
+from processing.cells import encode_cell_id
+
+QUEEN_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ROOK_OFFSETS = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+
+_WEIGHTS_CACHE = OrderedDict()
+_WEIGHTS_CACHE_SIZE = 8
+_WEIGHTS_LOCK = threading.Lock()
+
+
+# --------------------------------------------------
+# SPARSE NEIGHBOUR WEIGHTS
+# --------------------------------------------------
+def _adjacency_edges(row, col, offsets):
+    keys = encode_cell_id(row, col)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    src, dst = [], []
+    for dr, dc in offsets:
+        target = encode_cell_id(row + dr, col + dc)
+        pos = np.searchsorted(sorted_keys, target)
+        pos = np.minimum(pos, len(sorted_keys) - 1)
+        found = sorted_keys[pos] == target
+        src.append(np.flatnonzero(found))
+        dst.append(order[pos[found]])
+
+    return np.concatenate(src), np.concatenate(dst)
+
+
+def _distance_edges(row, col, distance, scale):
+    xy = np.column_stack([col, row]).astype(float) * scale
+    pairs = cKDTree(xy).query_pairs(distance, output_type="ndarray")
+    src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    return src, dst
+
+
+def spatial_weights(row, col, method=HOTSPOT_NEIGHBORS, distance=HOTSPOT_DISTANCE_BAND, scale=GRID_SCALE):
+    """
+    Binary neighbour matrix (CSR, no self-neighbours) for grid cells given
+    by row/col index. method is "queen", "rook" or "distance" (band in meters).
+    Matrices are cached per grid layout, so repeated runs skip the build.
+    """
+
+    row = np.asarray(row, dtype=np.int64)
+    col = np.asarray(col, dtype=np.int64)
+
+    digest = hashlib.sha1()
+    digest.update(row.tobytes())
+    digest.update(col.tobytes())
+    digest.update(f"{method}|{distance}|{scale}".encode())
+    key = digest.hexdigest()
+
+    with _WEIGHTS_LOCK:
+        if key in _WEIGHTS_CACHE:
+            _WEIGHTS_CACHE.move_to_end(key)
+            return _WEIGHTS_CACHE[key]
+
+    if method == "queen":
+        src, dst = _adjacency_edges(row, col, QUEEN_OFFSETS)
+    elif method == "rook":
+        src, dst = _adjacency_edges(row, col, ROOK_OFFSETS)
+    elif method == "distance":
+        src, dst = _distance_edges(row, col, distance, scale)
+    else:
+        raise ValueError(f"Unknown neighbour method: {method}")
+
+    n = len(row)
+    weights = sparse.csr_matrix(
+        (np.ones(len(src)), (src, dst)), shape=(n, n)
+    )
+
+    with _WEIGHTS_LOCK:
+        _WEIGHTS_CACHE[key] = weights
+        if len(_WEIGHTS_CACHE) > _WEIGHTS_CACHE_SIZE:
+            _WEIGHTS_CACHE.popitem(last=False)
+
+    return weights
+
+
+# --------------------------------------------------
+# GETIS-ORD Gi*
+# --------------------------------------------------
+def getis_ord_gi_star(values, weights):
+    """
+    Gi* z-scores and two-sided p-values (each cell counts as its own neighbour).
+    """
+
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+
+    lag = weights @ x + x
+    w_sum = np.asarray(weights.sum(axis=1)).ravel() + 1
+
+    mean = x.mean()
+    s = np.sqrt((x ** 2).mean() - mean ** 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Binary weights: sum of squared weights equals the weight sum
+        denom = s * np.sqrt((n * w_sum - w_sum ** 2) / (n - 1))
+        z = (lag - mean * w_sum) / denom
+    z = np.nan_to_num(z)
+
+    return z, 2 * norm.sf(np.abs(z))
+
+
+def gi_star_labels(z, p):
+    conditions, labels = [], []
+    for confidence, alpha in [(99, 0.01), (95, 0.05), (90, 0.10)]:
+        conditions += [(p < alpha) & (z > 0), (p < alpha) & (z < 0)]
+        labels += [f"Hot Spot ({confidence}%)", f"Cold Spot ({confidence}%)"]
+    return np.select(conditions, labels, default="Not Significant")
+
+
+# --------------------------------------------------
+# LOCAL MORAN'S I
+# --------------------------------------------------
+def _distinct_draws(rng, n, cells, k):
+    """
+    k distinct random indices per cell from the other n - 1 cells.
+
+    Columns are drawn one at a time and entries repeating an earlier
+    column are redrawn, which samples without replacement; with k much
+    smaller than n the redraws are rare.
+    """
+
+    draws = np.empty((len(cells), k), dtype=np.int64)
+    for j in range(k):
+        column = rng.integers(0, n - 1, size=len(cells))
+        repeated = (draws[:, :j] == column[:, None]).any(axis=1)
+        while repeated.any():
+            column[repeated] = rng.integers(0, n - 1, size=int(repeated.sum()))
+            repeated = (draws[:, :j] == column[:, None]).any(axis=1)
+        draws[:, j] = column
+
+    draws += draws >= cells[:, None]  # skip the cell itself
+    return draws
+
+
+def _permutation_counts(z, cells, cardinality, observed, permutations, seed):
+    """
+    Conditional randomization for a block of cells: each cell keeps its value
+    and draws its neighbours' values from distinct other cells.
+    """
+
+    n = len(z)
+    if n < 2:
+        return np.zeros(len(cells), dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    k_max = max(int(cardinality[cells].max()), 1)
+    mask = np.arange(k_max) < cardinality[cells, None]
+    k = np.maximum(cardinality[cells], 1)
+    full = mask.all()
+
+    larger = np.zeros(len(cells), dtype=np.int64)
+    for _ in range(permutations):
+        draws = _distinct_draws(rng, n, cells, k_max)
+        neighbor_z = z[draws] if full else np.where(mask, z[draws], 0.0)
+        lag = neighbor_z.sum(axis=1) / k
+        larger += z[cells] * lag >= observed
+
+    return larger
+
+
+def local_moran(values, weights, permutations=HOTSPOT_PERMUTATIONS, seed=None, chunk_size=100_000, max_workers=4):
+    """
+    Local Moran's I with row-standardised weights and pseudo p-values
+    from conditional permutations, run in parallel over blocks of cells.
+    Returns (I, p, spatial lag of the standardised values).
+    """
+
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+
+    z = x - x.mean()
+    m2 = (z ** 2).mean()
+    if m2 > 0:
+        z = z / np.sqrt(m2)
+
+    cardinality = np.diff(weights.indptr)
+    with np.errstate(divide="ignore"):
+        row_scale = np.where(cardinality > 0, 1.0 / cardinality, 0.0)
+    lag = row_scale * (weights @ z)
+    local_i = z * lag
+
+    if permutations <= 0:
+        return local_i, np.ones(n), lag
+
+    blocks = [np.arange(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        counts = pool.map(
+            lambda args: _permutation_counts(
+                z, args[0], cardinality, local_i[args[0]], permutations, args[1]
+            ),
+            zip(blocks, seeds)
+        )
+        larger = np.concatenate(list(counts))
+
+    extreme = np.minimum(larger, permutations - larger)
+    p = (extreme + 1) / (permutations + 1)
+    p[cardinality == 0] = 1.0
+
+    return local_i, p, lag
+
+
+def lisa_labels(z_lag, z, p, alpha=HOTSPOT_ALPHA):
+    significant = p < alpha
+    return np.select(
+        [
+            significant & (z > 0) & (z_lag > 0),
+            significant & (z < 0) & (z_lag < 0),
+            significant & (z > 0) & (z_lag < 0),
+            significant & (z < 0) & (z_lag > 0),
+        ],
+        ["High-High", "Low-Low", "High-Low", "Low-High"],
+        default="Not Significant"
+    )
+
+
+# --------------------------------------------------
+# HOTSPOT DETECTION
+# --------------------------------------------------
+def detect_hotspots(
+    df,
+    columns=("heat_risk", "health_risk"),
+    method=HOTSPOT_NEIGHBORS,
+    distance=HOTSPOT_DISTANCE_BAND,
+    permutations=HOTSPOT_PERMUTATIONS,
+    alpha=HOTSPOT_ALPHA,
+    seed=None
+):
+    """
+    Getis-Ord Gi* and local Moran's I for each column.
+    Needs row/col from assign_cell_ids. For every column adds
+    <col>_gi, <col>_gi_p, <col>_hotspot (Gi* label),
+    <col>_lisa, <col>_lisa_p and <col>_cluster (LISA quadrant label).
+    """
+
+    weights = spatial_weights(df["row"].to_numpy(), df["col"].to_numpy(), method, distance)
+
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+
+        gi, gi_p = getis_ord_gi_star(values, weights)
+        df[f"{column}_gi"] = gi
+        df[f"{column}_gi_p"] = gi_p
+        df[f"{column}_hotspot"] = gi_star_labels(gi, gi_p)
+
+        local_i, lisa_p, lag = local_moran(values, weights, permutations, seed)
+        df[f"{column}_lisa"] = local_i
+        df[f"{column}_lisa_p"] = lisa_p
+        df[f"{column}_cluster"] = lisa_labels(lag, values - values.mean(), lisa_p, alpha)
+
+    return df
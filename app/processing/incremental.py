@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+from config.settings import GRID_SCALE, MIN_VALID_PIXELS
+from processing.cells import cell_index, encode_cell_id
+from processing.heat_score import (
+    calculate_heat_risk,
+    classify_heat_risk,
+    calculate_health_risk,
+    classify_health_risk,
+)
+
+BANDS = ["ST_B10", "NDVI", "NDBI"]
+CHANGE_COLUMNS = [
+    "cell_id", "old_risk_level", "risk_level",
+    "old_health_risk_level", "health_risk_level",
+]
+
+
+# --------------------------------------------------
+# PIXEL -> CELL MAPPING (LOCAL RASTERS)
+# --------------------------------------------------
+def pixel_cell_ids(transform, shape, scale=GRID_SCALE):
+    """
+    Cell ID of every pixel centre of a lon/lat raster.
+    transform is the GDAL-style (x0, dx, 0, y0, 0, dy) geotransform.
+    """
+
+    x0, dx, _, y0, _, dy = transform
+    rows, cols = shape
+
+    lon = x0 + (np.arange(cols) + 0.5) * dx
+    lat = y0 + (np.arange(rows) + 0.5) * dy
+    lon, lat = np.meshgrid(lon, lat)
+
+    row, col = cell_index(lon, lat, scale)
+    return encode_cell_id(row, col)
+
+
+def zonal_means(bands, pixel_cells, valid, min_valid_pixels=MIN_VALID_PIXELS):
+    """
+    Per-cell mean of each band over valid pixels only.
+    Cells with fewer than min_valid_pixels valid pixels are left out.
+    """
+
+    keep = np.asarray(valid, dtype=bool).ravel()
+    for values in bands.values():
+        keep &= np.isfinite(np.asarray(values, dtype=float).ravel())
+
+    cells = np.asarray(pixel_cells).ravel()[keep]
+    cell_ids, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+
+    stats = pd.DataFrame({"cell_id": cell_ids, "valid_pixels": counts})
+    for name, values in bands.items():
+        sums = np.bincount(inverse, weights=np.asarray(values, dtype=float).ravel()[keep], minlength=len(cell_ids))
+        stats[name] = sums / counts
+
+    return stats[stats["valid_pixels"] >= min_valid_pixels].reset_index(drop=True)
+
+
+# --------------------------------------------------
+# INCREMENTAL GRID STATE
+# --------------------------------------------------
+class IncrementalGrid:
+    """
+    Per-cell grid state that absorbs new scenes without a full recompute.
+    Only cells covered by a new scene get new zonal stats and scores; the
+    ST_B10 min/max normaliser is maintained incrementally and all cells are
+    rescored only when it actually moves.
+    """
+
+    def __init__(self, df):
+        self.df = df.sort_values("cell_id").reset_index(drop=True)
+        self.cell_ids = self.df["cell_id"].to_numpy()
+        self.scenes = set(df.attrs.get("scenes", []))
+
+        temp = self.df["ST_B10"].to_numpy(dtype=float)
+        finite = temp[np.isfinite(temp)]
+        self.temp_min = finite.min() if len(finite) else np.nan
+        self.temp_max = finite.max() if len(finite) else np.nan
+
+    # --------------------------------------------------
+    # NORMALISER
+    # --------------------------------------------------
+    def _update_normalizer(self, old_temp, new_temp):
+        """
+        Update ST_B10 min/max after `old_temp` values were replaced by `new_temp`.
+        Returns True when the range changed.
+        """
+
+        lo, hi = self.temp_min, self.temp_max
+
+        # An extreme cell moved inward: the true extreme is elsewhere
+        if np.any((old_temp == lo) & (new_temp > lo)) or np.any((old_temp == hi) & (new_temp < hi)):
+            temp = self.df["ST_B10"].to_numpy()
+            self.temp_min, self.temp_max = np.nanmin(temp), np.nanmax(temp)
+        else:
+            self.temp_min = np.fmin(lo, np.nanmin(new_temp))
+            self.temp_max = np.fmax(hi, np.nanmax(new_temp))
+
+        return (self.temp_min, self.temp_max) != (lo, hi)
+
+    # --------------------------------------------------
+    # SCORING
+    # --------------------------------------------------
+    def _score(self, pos):
+        cells = self.df.loc[pos, ["ST_B10", "NDVI", "NDBI", "pollution_index"]]
+
+        span = self.temp_max - self.temp_min
+        cells["temp_norm"] = (cells["ST_B10"] - self.temp_min) / span if span else 0.0
+        cells["ndvi_norm"] = 1 - cells["NDVI"]
+        cells["ndbi_norm"] = cells["NDBI"]
+
+        cells = calculate_heat_risk(cells)
+        cells["risk_level"] = classify_heat_risk(cells["heat_risk"])
+        cells["health_risk"] = calculate_health_risk(cells["heat_risk"], cells["pollution_index"])
+        cells["health_risk_level"] = classify_health_risk(cells["health_risk"])
+
+        for column in ["temp_norm", "ndvi_norm", "ndbi_norm", "heat_risk", "risk_level", "health_risk", "health_risk_level"]:
+            if len(pos) == len(self.df):
+                self.df[column] = cells[column].to_numpy()
+            else:
+                self.df.loc[pos, column] = cells[column].to_numpy()
+
+    # --------------------------------------------------
+    # UPDATES
+    # --------------------------------------------------
+    def update(self, stats, scene_id=None):
+        """
+        Merge fresh zonal stats (cell_id + band columns) for the cells a new
+        scene covers and rescore. Returns the change set: cells whose
+        risk_level or health_risk_level moved.
+        """
+
+        if scene_id is not None:
+            self.scenes.add(scene_id)
+
+        if len(self.cell_ids) == 0 or len(stats) == 0:
+            return self._changes([], None, None)
+
+        pos = np.searchsorted(self.cell_ids, stats["cell_id"].to_numpy())
+        pos = np.minimum(pos, len(self.cell_ids) - 1)
+        known = self.cell_ids[pos] == stats["cell_id"].to_numpy()
+        pos, stats = pos[known], stats[known]
+
+        if len(pos) == 0:
+            return self._changes(pos, None, None)
+
+        old_levels = self.df[["risk_level", "health_risk_level"]].copy()
+        old_temp = self.df["ST_B10"].to_numpy()[pos].copy()
+
+        for band in BANDS:
+            if band in stats:
+                self.df.loc[pos, band] = stats[band].to_numpy()
+
+        # Scenes without a thermal band leave the normaliser alone
+        if "ST_B10" in stats and self._update_normalizer(old_temp, stats["ST_B10"].to_numpy()):
+            rescored = np.arange(len(self.df))
+        else:
+            rescored = pos
+        self._score(rescored)
+
+        return self._changes(rescored, old_levels.loc[rescored], self.df.loc[rescored])
+
+    def apply_scene(self, bands, pixel_cells, valid, scene_id=None, min_valid_pixels=MIN_VALID_PIXELS):
+        """
+        Local raster path: `bands` maps ST_B10/NDVI/NDBI to pixel arrays,
+        `pixel_cells` holds each pixel's cell ID (see pixel_cell_ids) and
+        `valid` is the scene's valid-pixel (cloud-free) mask.
+        """
+
+        stats = zonal_means(bands, pixel_cells, valid, min_valid_pixels)
+        return self.update(stats, scene_id)
+
+    @staticmethod
+    def _changes(pos, old, new):
+        if len(pos) == 0:
+            return pd.DataFrame(columns=CHANGE_COLUMNS)
+
+        moved = (
+            (old["risk_level"].to_numpy() != new["risk_level"].to_numpy()) |
+            (old["health_risk_level"].to_numpy() != new["health_risk_level"].to_numpy())
+        )
+
+        return pd.DataFrame({
+            "cell_id": new["cell_id"].to_numpy()[moved],
+            "old_risk_level": old["risk_level"].to_numpy()[moved],
+            "risk_level": new["risk_level"].to_numpy()[moved],
+            "old_health_risk_level": old["health_risk_level"].to_numpy()[moved],
+            "health_risk_level": new["health_risk_level"].to_numpy()[moved],
+        })
+
+    # --------------------------------------------------
+    # PERSISTENCE
+    # --------------------------------------------------
+    def save(self, path):
+        df = self.df.copy()
+        df.attrs["scenes"] = sorted(self.scenes)
+        df.to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path))
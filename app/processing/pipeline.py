@@ -0,0 +1,301 @@
+import os
+
+import ee
+import numpy as np
+import pandas as pd
+import geemap.foliumap as geemap
+
+from config.settings import (
+    GRID_SCALE,
+    GRID_CRS,
+    GRID_STATE_DIR,
+    PYRAMID_PIXEL_SCALE,
+    STATION_SEARCH_PAD,
+)
+from satellite.fetch_data import (
+    fetch_landsat,
+    fetch_latest_scene,
+    calculate_lst,
+    fetch_pollution,
+)
+from satellite.fetch_aqi import fetch_city_aqi, fetch_station_aqi
+from processing.indices import calculate_ndvi, calculate_ndbi
+from processing.grid_analysis import create_grid
+from processing.cells import assign_cell_ids, encode_cell_id
+from processing.heat_score import calculate_heat_risk, classify_heat_risk
+from processing.pollution_fusion import fuse_pollution
+from processing.pyramid import GridPyramid, STATS
+from processing.incremental import IncrementalGrid, CHANGE_COLUMNS
+
+GRID_STATE_ROOT = os.path.join(os.path.dirname(__file__), "..", GRID_STATE_DIR)
+
+
+# --------------------------------------------------
+# SATELLITE FEATURE IMAGE
+# --------------------------------------------------
+def build_feature_image(roi):
+    """
+    LST, NDVI, NDBI (and NO2 when available) stacked into one image.
+    Returns None when no Landsat scene is available.
+    """
+
+    image = fetch_landsat(roi)
+    if image is None:
+        return None
+
+    lst = calculate_lst(image).rename("ST_B10")
+    ndvi = calculate_ndvi(image)
+    ndbi = calculate_ndbi(image)
+    pollution = fetch_pollution(roi)
+
+    final_image = lst.addBands([ndvi, ndbi])
+    if pollution is not None:
+        final_image = final_image.addBands(pollution)
+
+    return final_image
+
+
+# --------------------------------------------------
+# GRID ANALYSIS
+# --------------------------------------------------
+def _add_lat_lon(feature):
+    centroid = feature.geometry().centroid(100)
+    coords = centroid.coordinates()
+    return feature.set({
+        "longitude": coords.get(0),
+        "latitude": coords.get(1)
+    })
+
+
+def reduce_to_grid(final_image, roi, scale=GRID_SCALE):
+    """
+    Per-cell mean of every band, with cell centroids and cell IDs.
+    """
+
+    grid = create_grid(roi, scale)
+
+    stats = (
+        final_image
+        .reduceRegions(grid, ee.Reducer.mean(), scale)
+        .map(_add_lat_lon)
+    )
+
+    df = geemap.ee_to_df(stats).dropna()
+    return assign_cell_ids(df, scale)
+
+
+# --------------------------------------------------
+# MULTI-RESOLUTION GRID
+# --------------------------------------------------
+def reduce_grid_stats(final_image, region, scale, pixel_scale=PYRAMID_PIXEL_SCALE, cells=None):
+    """
+    Exact per-cell pixel sum/count/min/max of every band at native resolution,
+    so cells can later be merged into coarser levels without another reduction.
+    With `cells` (row/col of precomputed cells, see CityRegistry.cell_grid)
+    those cells are reduced instead of the covering grid of `region`.
+    """
+
+    reducer = (
+        ee.Reducer.sum().unweighted()
+        .combine(ee.Reducer.count(), sharedInputs=True)
+        .combine(ee.Reducer.min(), sharedInputs=True)
+        .combine(ee.Reducer.max(), sharedInputs=True)
+    )
+
+    if cells is None:
+        stats = (
+            final_image
+            .reduceRegions(create_grid(region, scale), reducer, pixel_scale)
+            .map(_add_lat_lon)
+        )
+        df = assign_cell_ids(geemap.ee_to_df(stats), scale)
+    else:
+        # Precomputed cells carry their row/col, so no centroids are needed
+        df = geemap.ee_to_df(final_image.reduceRegions(_cells_collection(cells, scale), reducer, pixel_scale))
+
+    bands = final_image.bandNames().getInfo()
+    columns = [f"{band}_{stat}" for band in bands for stat in STATS]
+
+    # Same rule as reduce_to_grid: drop cells with any band missing
+    df = df.reindex(columns=["row", "col"] + columns).dropna()
+    return df[(df[[f"{band}_count" for band in bands]] > 0).all(axis=1)].reset_index(drop=True)
+
+
+def _cell_rectangle(row, col, scale):
+    x0, y0 = col * scale, row * scale
+    return [[[x0, y0], [x0 + scale, y0], [x0 + scale, y0 + scale], [x0, y0 + scale], [x0, y0]]]
+
+
+def _cells_collection(cells, scale):
+    """
+    Grid cells as features with their row/col, in GRID_CRS.
+    """
+
+    return ee.FeatureCollection([
+        ee.Feature(
+            ee.Geometry.Polygon(_cell_rectangle(row, col, scale), GRID_CRS, False),
+            {"row": int(row), "col": int(col)},
+        )
+        for row, col in zip(cells["row"], cells["col"])
+    ])
+
+
+def _cells_geometry(cells, scale):
+    """
+    Exact footprints of grid cells as one multipolygon in GRID_CRS.
+    """
+
+    rectangles = [_cell_rectangle(row, col, scale) for row, col in zip(cells["row"], cells["col"])]
+    return ee.Geometry.MultiPolygon(rectangles, GRID_CRS, False)
+
+
+def _fine_reducer(final_image, scale):
+    def fine_fn(parents, fine_scale):
+        return reduce_grid_stats(final_image, _cells_geometry(parents, scale), fine_scale)
+    return fine_fn
+
+
+def build_pyramid(final_image, roi, scale=GRID_SCALE, cells=None):
+    """
+    Grid pyramid with an exact base level at `scale` (over the precomputed
+    `cells` when given); finer cells are reduced on demand for the parent
+    cells being drilled into.
+    """
+
+    base = reduce_grid_stats(final_image, roi, scale, cells=cells)
+    bands = final_image.bandNames().getInfo()
+
+    return GridPyramid(base, bands, scale, fine_fn=_fine_reducer(final_image, scale))
+
+
+def pyramid_path(city, scale=GRID_SCALE):
+    """
+    Saved pyramid base of a city; raises ValueError for names that would
+    resolve outside GRID_STATE_ROOT.
+    """
+
+    root = os.path.realpath(GRID_STATE_ROOT)
+    path = os.path.realpath(os.path.join(root, f"{city}_{scale}.parquet"))
+    if os.path.dirname(path) != root:
+        raise ValueError(f"Invalid city name: {city!r}")
+    return path
+
+
+def load_pyramid(city, final_image, roi, scale=GRID_SCALE, cells=None):
+    """
+    The city's saved pyramid, or a full reduction (then saved) the first time.
+    """
+
+    path = pyramid_path(city, scale)
+    if os.path.exists(path):
+        return GridPyramid.load(path, fine_fn=_fine_reducer(final_image, scale))
+
+    pyramid = build_pyramid(final_image, roi, scale, cells)
+
+    # The composite already includes the latest scene
+    _, scene_id = _latest_scene(roi)
+    if scene_id is not None:
+        pyramid.scenes.add(scene_id)
+
+    pyramid.save(path)
+    return pyramid
+
+
+def _latest_scene(roi):
+    image = fetch_latest_scene(roi)
+    if image is None:
+        return None, None
+    return image, image.get("system:index").getInfo()
+
+
+def refresh_pyramid(city, pyramid, final_image, roi, cells=None):
+    """
+    Fold the latest Landsat scene into a city's pyramid if it has not been
+    seen yet. Only the base cells inside the scene footprint are reduced
+    again, from the current composite and with the same exact reducer as the
+    full build, so they stay consistent with the rest of the grid. Returns
+    the change set (cells whose risk_level or health_risk_level moved,
+    scored without ground stations), empty when there is no new scene.
+    With `cells`, footprint cells outside the city's precomputed grid are
+    left out.
+    """
+
+    image, scene_id = _latest_scene(roi)
+    if image is None or scene_id in pyramid.scenes:
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+
+    scale = pyramid.base_scale
+    state = IncrementalGrid(score_grid(pyramid.level(scale).copy()))
+
+    stats = reduce_grid_stats(final_image, image.geometry().intersection(roi, 1), scale)
+    if cells is not None:
+        stats = stats[np.isin(encode_cell_id(stats["row"], stats["col"]), cells["cell_id"].to_numpy())]
+    pyramid.fine_fn = _fine_reducer(final_image, scale)
+    pyramid.update_base(stats, scene_id)
+    pyramid.save(pyramid_path(city, scale))
+
+    fresh = pyramid.level(scale)
+    fresh = fresh[fresh["cell_id"].isin(encode_cell_id(stats["row"], stats["col"]))]
+    changes = state.update(fresh, scene_id)
+    changes.attrs["scene"] = scene_id
+    return changes
+
+
+# --------------------------------------------------
+# RISK SCORING
+# --------------------------------------------------
+def fetch_grid_stations(df, fallback=None):
+    """
+    Ground stations around the grid, or the city-level reading
+    in `fallback` when none respond.
+    """
+
+    stations = fetch_station_aqi((
+        df["longitude"].min() - STATION_SEARCH_PAD,
+        df["latitude"].min() - STATION_SEARCH_PAD,
+        df["longitude"].max() + STATION_SEARCH_PAD,
+        df["latitude"].max() + STATION_SEARCH_PAD,
+    ))
+
+    if stations is None or stations.empty:
+        return fallback
+    return stations
+
+
+def score_grid(df, stations=None):
+    """
+    Heat risk, per-cell pollution and health risk for a reduced grid.
+    """
+
+    df["temp_norm"] = (df["ST_B10"] - df["ST_B10"].min()) / (df["ST_B10"].max() - df["ST_B10"].min())
+    df["ndvi_norm"] = 1 - df["NDVI"]
+    df["ndbi_norm"] = df["NDBI"]
+
+    df = calculate_heat_risk(df)
+    df["risk_level"] = classify_heat_risk(df["heat_risk"])
+
+    return fuse_pollution(df, stations)
+
+
+# --------------------------------------------------
+# FULL CITY ANALYSIS
+# --------------------------------------------------
+def analyze_city(city, roi, scale=GRID_SCALE):
+    """
+    Run the whole grid pipeline for one city without any UI.
+    Returns None when satellite data is unavailable.
+    """
+
+    final_image = build_feature_image(roi)
+    if final_image is None:
+        return None
+
+    df = reduce_to_grid(final_image, roi, scale)
+    if df.empty:
+        return None
+
+    aqi_df = fetch_city_aqi(city)
+    stations = fetch_grid_stations(df, aqi_df) if aqi_df is not None else None
+
+    return score_grid(df, stations)
+
@@ -0,0 +1,141 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from config.settings import (
+    PM25_NORM_MAX,
+    PM25_MODERATE,
+    PM25_HIGH,
+    IDW_NEIGHBORS,
+    IDW_POWER,
+    NO2_BLEND_WEIGHT,
+)
+from processing.heat_score import calculate_health_risk, classify_health_risk
+
+EARTH_RADIUS = 6371000.0  # meters
+
+
+# --------------------------------------------------
+# LOCAL PLANAR COORDINATES
+# --------------------------------------------------
+def _to_xy(lon, lat, lat0):
+    """
+    Equirectangular projection (meters) around latitude lat0.
+    Accurate enough for distances within a metro area.
+    """
+
+    x = np.radians(lon) * EARTH_RADIUS * np.cos(np.radians(lat0))
+    y = np.radians(lat) * EARTH_RADIUS
+    return np.column_stack([x, y])
+
+
+# --------------------------------------------------
+# INVERSE-DISTANCE WEIGHTED INTERPOLATION
+# --------------------------------------------------
+def idw_interpolate(
+    station_lon,
+    station_lat,
+    station_values,
+    cell_lon,
+    cell_lat,
+    k=IDW_NEIGHBORS,
+    power=IDW_POWER,
+    chunk_size=250_000
+):
+    """
+    Interpolate station values onto grid cells with inverse-distance
+    weighting over the k nearest stations (KD-tree query, chunked over cells).
+    """
+
+    station_values = np.asarray(station_values, dtype=float)
+    cell_lon = np.asarray(cell_lon, dtype=float)
+    cell_lat = np.asarray(cell_lat, dtype=float)
+
+    lat0 = float(np.mean(station_lat))
+    tree = cKDTree(_to_xy(station_lon, station_lat, lat0))
+    k = min(k, len(station_values))
+
+    result = np.empty(len(cell_lon))
+
+    for start in range(0, len(cell_lon), chunk_size):
+        stop = start + chunk_size
+        xy = _to_xy(cell_lon[start:stop], cell_lat[start:stop], lat0)
+
+        dist, idx = tree.query(xy, k=k, workers=-1)
+        if k == 1:
+            dist, idx = dist[:, None], idx[:, None]
+
+        with np.errstate(divide="ignore"):
+            weights = 1.0 / np.power(dist, power)
+
+        # A cell sitting exactly on a station takes that station's value
+        exact = np.isinf(weights)
+        on_station = exact.any(axis=1)
+        weights[on_station] = exact[on_station]
+
+        values = station_values[idx]
+        result[start:stop] = (weights * values).sum(axis=1) / weights.sum(axis=1)
+
+    return result
+
+
+# --------------------------------------------------
+# POLLUTION LEVEL CLASSIFICATION (PM2.5)
+# --------------------------------------------------
+def classify_pm25(pm25):
+    pm25 = np.asarray(pm25, dtype=float)
+    return np.select(
+        [np.isnan(pm25), pm25 > PM25_HIGH, pm25 > PM25_MODERATE],
+        ["Unknown", "High", "Moderate"],
+        default="Low"
+    )
+
+
+def _min_max(values):
+    values = np.asarray(values, dtype=float)
+    lo, hi = np.nanmin(values), np.nanmax(values)
+    if not np.isfinite(lo) or hi == lo:
+        return np.zeros(len(values))
+    return np.nan_to_num((values - lo) / (hi - lo))
+
+
+# --------------------------------------------------
+# PER-CELL POLLUTION + HEALTH RISK
+# --------------------------------------------------
+def fuse_pollution(df, stations=None, no2_weight=NO2_BLEND_WEIGHT):
+    """
+    Interpolate ground-station PM2.5 onto every grid cell, blend it with the
+    Sentinel-5P NO2 band and derive per-cell health risk.
+
+    `stations` needs latitude, longitude and pm25 columns
+    (the output of fetch_station_aqi or fetch_city_aqi).
+    Adds pm25, pollution_index, pollution_level, health_risk
+    and health_risk_level columns.
+    """
+
+    if stations is not None:
+        stations = stations.dropna(subset=["latitude", "longitude", "pm25"])
+
+    if stations is not None and not stations.empty:
+        df["pm25"] = idw_interpolate(
+            stations["longitude"].to_numpy(dtype=float),
+            stations["latitude"].to_numpy(dtype=float),
+            stations["pm25"].to_numpy(dtype=float),
+            df["longitude"].to_numpy(),
+            df["latitude"].to_numpy()
+        )
+        pm_norm = np.minimum(df["pm25"].to_numpy() / PM25_NORM_MAX, 1)
+    else:
+        df["pm25"] = np.nan
+        pm_norm = np.zeros(len(df))
+
+    if "NO2" in df:
+        no2_norm = _min_max(df["NO2"])
+        df["pollution_index"] = (1 - no2_weight) * pm_norm + no2_weight * no2_norm
+    else:
+        df["pollution_index"] = pm_norm
+
+    df["pollution_level"] = classify_pm25(df["pm25"])
+    df["health_risk"] = calculate_health_risk(df["heat_risk"], df["pollution_index"])
+    df["health_risk_level"] = classify_health_risk(df["health_risk"])
+
+    return df
@@ -0,0 +1,283 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import CancelledError, Future
+
+import numpy as np
+import pandas as pd
+
+from config.settings import GRID_SCALE, PYRAMID_LEVELS
+from processing.cells import cell_center, encode_cell_id, cell_index
+
+STATS = ["sum", "count", "min", "max"]
+
+
+# --------------------------------------------------
+# EXACT AGGREGATION
+# --------------------------------------------------
+def _finish_level(stats, bands, scale):
+    """
+    Add cell centres, IDs and band means to a row/col indexed stats frame.
+    """
+    stats["cell_id"] = encode_cell_id(stats["row"], stats["col"])
+    stats["longitude"], stats["latitude"] = cell_center(stats["row"], stats["col"], scale)
+    for band in bands:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats[band] = stats[f"{band}_sum"] / stats[f"{band}_count"]
+    return stats
+
+
+def aggregate_level(stats, bands, factor, scale):
+    """
+    Coarser level from a finer one: parent cells are factor x factor blocks,
+    combined exactly (sum/count add, min/max of min/max).
+    """
+
+    parent = pd.DataFrame({
+        "row": np.floor_divide(stats["row"].to_numpy(), factor),
+        "col": np.floor_divide(stats["col"].to_numpy(), factor),
+    })
+
+    aggregations = {}
+    for band in bands:
+        for stat in STATS:
+            column = f"{band}_{stat}"
+            parent[column] = stats[column].to_numpy()
+            aggregations[column] = "sum" if stat in ("sum", "count") else stat
+
+    coarse = parent.groupby(["row", "col"], sort=True).agg(aggregations).reset_index()
+    return _finish_level(coarse, bands, scale)
+
+
+def _parent_ids(cells, factor):
+    """
+    Cell ID of the parent (factor x factor coarser) cell of every cell.
+    """
+    return encode_cell_id(
+        np.floor_divide(cells["row"].to_numpy(), factor),
+        np.floor_divide(cells["col"].to_numpy(), factor),
+    )
+
+
+# --------------------------------------------------
+# GRID PYRAMID
+# --------------------------------------------------
+class GridPyramid:
+    """
+    Hierarchical grid (e.g. 2 km -> 1 km -> 500 m -> 100 m) over one city.
+
+    The base level holds exact per-cell pixel stats (<band>_sum/_count/_min/_max);
+    coarser levels are aggregated from it without another remote reduction.
+    Finer levels are computed on demand with `fine_fn(parent_cells, scale)`
+    only for the base cells a user drills into, and cached.
+
+    The base stats and the IDs of the scenes folded into them can be saved
+    and loaded, so a city is reduced in full only once.
+    """
+
+    def __init__(self, base_stats, bands, base_scale=GRID_SCALE, levels=PYRAMID_LEVELS, fine_fn=None):
+        self.bands = list(bands)
+        self.base_scale = base_scale
+        self.fine_fn = fine_fn
+        self.scenes = set(base_stats.attrs.get("scenes", []))
+
+        self._coarse_scales = sorted(s for s in levels if s > base_scale)
+        self._levels = self._aggregate(_finish_level(base_stats.copy(), self.bands, base_scale))
+        self._fine = {}
+        self._fine_parents = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        self.fine_scales = sorted(s for s in levels if s < base_scale)
+
+    def _aggregate(self, base):
+        levels = {self.base_scale: base}
+        finer = self.base_scale
+        for scale in self._coarse_scales:
+            levels[scale] = aggregate_level(levels[finer], self.bands, self._factor(scale, finer), scale)
+            finer = scale
+        return levels
+
+    @staticmethod
+    def _factor(coarse, fine):
+        factor, remainder = divmod(coarse, fine)
+        if remainder:
+            raise ValueError(f"{coarse} m is not a multiple of {fine} m")
+        return factor
+
+    @property
+    def scales(self):
+        return sorted(set(self._levels) | set(self.fine_scales), reverse=True)
+
+    def level(self, scale, stats=False):
+        """
+        Cells at `scale`. Coarser and base levels are complete; finer
+        levels contain only what has been drilled into so far.
+        """
+        columns = ["cell_id", "row", "col", "longitude", "latitude"] + self.bands
+
+        if scale in self._levels:
+            df = self._levels[scale]
+        else:
+            df = self._fine.get(scale, pd.DataFrame(columns=columns))
+
+        return df if stats else df[columns]
+
+    # --------------------------------------------------
+    # ON-DEMAND DRILL-DOWN
+    # --------------------------------------------------
+    def parents_in_bounds(self, min_lon, min_lat, max_lon, max_lat):
+        base = self._levels[self.base_scale]
+        row0, col0 = cell_index(min_lon, min_lat, self.base_scale)
+        row1, col1 = cell_index(max_lon, max_lat, self.base_scale)
+        inside = base["row"].between(int(row0), int(row1)) & base["col"].between(int(col0), int(col1))
+        return base.loc[inside, ["cell_id", "row", "col"]]
+
+    def drill_down(self, bounds, scale=None):
+        """
+        Fine-level cells inside bounds = (min_lon, min_lat, max_lon, max_lat).
+        Only base cells not drilled into before are sent to fine_fn.
+
+        The lock only guards the cache: fine_fn runs outside it, so other
+        sessions are not blocked by a remote reduction. Parents another
+        caller is already reducing are waited for instead of reduced twice.
+        """
+
+        scale = scale or self.fine_scales[0]
+        factor = self._factor(self.base_scale, scale)
+        parents = self.parents_in_bounds(*bounds)
+
+        while self.fine_fn is not None:
+            claimed, future, others = self._claim(parents, scale)
+            if future is not None:
+                self._reduce_fine(claimed, scale, factor, future)
+
+            # A cancelled Future means its caller was interrupted: claim again
+            retry = False
+            for other in others:
+                try:
+                    other.result()
+                except CancelledError:
+                    retry = True
+            if not retry:
+                break
+
+        fine = self.level(scale)
+        return fine[np.isin(_parent_ids(fine, factor), parents["cell_id"].to_numpy())].reset_index(drop=True)
+
+    def _claim(self, parents, scale):
+        """
+        Split parents not drilled into yet into those this caller reduces
+        (with a new Future, or None when there are none) and the Futures of
+        other callers already reducing the rest.
+        """
+
+        with self._lock:
+            done = self._fine_parents.setdefault(scale, set())
+            pending = self._pending.setdefault(scale, {})
+
+            ids = parents["cell_id"].tolist()
+            others = {pending[i] for i in ids if i in pending}
+            claimed = parents[np.array([i not in done and i not in pending for i in ids], dtype=bool)]
+
+            future = None
+            if len(claimed):
+                future = Future()
+                for i in claimed["cell_id"].tolist():
+                    pending[i] = future
+
+        return claimed, future, others
+
+    def _reduce_fine(self, claimed, scale, factor, future):
+        """
+        Run fine_fn for the claimed parents and publish the result. Failures
+        reach the callers waiting on `future`; interruptions cancel it so one
+        of them takes over.
+        """
+
+        try:
+            fine = self.fine_fn(claimed, scale)
+
+            # Keep only children of the requested parents
+            fine = _finish_level(
+                fine[np.isin(_parent_ids(fine, factor), claimed["cell_id"].to_numpy())].copy(), self.bands, scale
+            )
+        except Exception as e:
+            with self._lock:
+                self._release(claimed, scale)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            with self._lock:
+                self._release(claimed, scale)
+            future.cancel()
+            raise
+
+        with self._lock:
+            if scale in self._fine:
+                fine = pd.concat([self._fine[scale], fine], ignore_index=True)
+            self._fine[scale] = fine.reset_index(drop=True)
+            self._fine_parents[scale].update(claimed["cell_id"].tolist())
+            self._release(claimed, scale)
+        future.set_result(None)
+
+    def _release(self, claimed, scale):
+        # Called with the lock held
+        pending = self._pending[scale]
+        for i in claimed["cell_id"].tolist():
+            pending.pop(i, None)
+
+    # --------------------------------------------------
+    # INCREMENTAL UPDATES
+    # --------------------------------------------------
+    def update_base(self, stats, scene_id=None):
+        """
+        Replace (or add) base cells with freshly reduced exact stats, e.g. the
+        cells a new scene covers. Coarser levels are re-aggregated locally and
+        drilled-down cells under the replaced cells are dropped.
+        """
+
+        stats = _finish_level(stats.copy(), self.bands, self.base_scale)
+
+        with self._lock:
+            base = self._levels[self.base_scale]
+            base = pd.concat([base[~base["cell_id"].isin(stats["cell_id"])], stats], ignore_index=True)
+            self._levels = self._aggregate(base.sort_values(["row", "col"]).reset_index(drop=True))
+
+            for scale, fine in self._fine.items():
+                stale = np.isin(_parent_ids(fine, self._factor(self.base_scale, scale)), stats["cell_id"].to_numpy())
+                self._fine[scale] = fine[~stale].reset_index(drop=True)
+                self._fine_parents[scale] -= set(stats["cell_id"].tolist())
+
+            if scene_id is not None:
+                self.scenes.add(scene_id)
+
+    # --------------------------------------------------
+    # PERSISTENCE
+    # --------------------------------------------------
+    def save(self, path):
+        """
+        Write the base stats and folded-in scene IDs; the file is replaced
+        atomically so concurrent loads never see a partial write.
+        """
+
+        columns = ["row", "col"] + [f"{band}_{stat}" for band in self.bands for stat in STATS]
+        with self._lock:
+            stats = self._levels[self.base_scale][columns].copy()
+            stats.attrs = {"scenes": sorted(self.scenes), "scale": self.base_scale}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            stats.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, levels=PYRAMID_LEVELS, fine_fn=None):
+        stats = pd.read_parquet(path)
+        bands = [column[:-len("_sum")] for column in stats.columns if column.endswith("_sum")]
+        return cls(stats, bands, stats.attrs["scale"], levels, fine_fn)
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    TEMP_WEIGHT,
+    NDBI_WEIGHT,
+    NDVI_WEIGHT,
+    HIGH_RISK_THRESHOLD,
+    MODERATE_RISK_THRESHOLD,
+    HEAT_HEALTH_WEIGHT,
+    HIGH_HEALTH_THRESHOLD,
+    SENSITIVITY_SAMPLES,
+    SENSITIVITY_CONCENTRATION,
+    SENSITIVITY_THRESHOLD_SPREAD,
+    SENSITIVITY_ROBUST_SHARE,
+    SENSITIVITY_RANK_SAMPLES,
+    SENSITIVITY_MEMORY_BUDGET,
+)
+
+FEATURES = ["temp_norm", "ndbi_norm", "ndvi_norm"]
+
+
+# --------------------------------------------------
+# SETTINGS SAMPLING
+# --------------------------------------------------
+def sample_settings(n=SENSITIVITY_SAMPLES, concentration=SENSITIVITY_CONCENTRATION,
+                    spread=SENSITIVITY_THRESHOLD_SPREAD, seed=0):
+    """
+    n weight/threshold combinations around the configured ones; row 0 is
+    the configured setting itself.
+
+    Heat weights are Dirichlet around (TEMP, NDBI, NDVI) so they keep
+    summing to 1 (higher concentration = closer to the defaults);
+    thresholds and the health heat weight vary uniformly by +/- spread.
+    """
+
+    rng = np.random.default_rng(seed)
+    base = np.array([TEMP_WEIGHT, NDBI_WEIGHT, NDVI_WEIGHT])
+
+    weights = rng.dirichlet(base * concentration, size=n)
+    high = rng.uniform(HIGH_RISK_THRESHOLD - spread, HIGH_RISK_THRESHOLD + spread, n)
+    moderate = rng.uniform(MODERATE_RISK_THRESHOLD - spread, MODERATE_RISK_THRESHOLD + spread, n)
+    health_weight = rng.uniform(HEAT_HEALTH_WEIGHT - spread, HEAT_HEALTH_WEIGHT + spread, n)
+    health_high = rng.uniform(HIGH_HEALTH_THRESHOLD - spread, HIGH_HEALTH_THRESHOLD + spread, n)
+
+    weights[0] = base
+    high[0], moderate[0] = HIGH_RISK_THRESHOLD, MODERATE_RISK_THRESHOLD
+    health_weight[0], health_high[0] = HEAT_HEALTH_WEIGHT, HIGH_HEALTH_THRESHOLD
+
+    settings = pd.DataFrame(weights, columns=["temp_weight", "ndbi_weight", "ndvi_weight"])
+    settings["high_threshold"] = high
+    settings["moderate_threshold"] = np.minimum(moderate, high)
+    settings["health_heat_weight"] = health_weight
+    settings["health_high_threshold"] = health_high
+    return settings
+
+
+# --------------------------------------------------
+# RANK STATISTICS
+# --------------------------------------------------
+def _ranks(scores):
+    """
+    Ranks along the last axis (0 = lowest); ties broken by position.
+    """
+    ranks = np.empty(scores.shape, dtype=np.float64)
+    order = np.argsort(scores, axis=-1)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[-1], dtype=np.float64), axis=-1)
+    return ranks
+
+
+def _rank_agreement(X, weights, base_scores, k):
+    """
+    Spearman correlation with the baseline ranking and Jaccard overlap of
+    the top-k cells, for each weight vector.
+    """
+
+    n = len(X)
+    base_rank = _ranks(base_scores)
+    base_rank -= base_rank.mean()
+    base_top = np.zeros(n, dtype=bool)
+    base_top[np.argpartition(-base_scores, k - 1)[:k]] = True
+
+    block = max(1, SENSITIVITY_MEMORY_BUDGET // (n * 8 * 3))
+    spearman, jaccard = [], []
+
+    for start in range(0, len(weights), block):
+        # settings x cells, so every sort runs over contiguous memory
+        scores = weights[start:start + block] @ X.T
+
+        ranks = _ranks(scores)
+        ranks -= ranks.mean(axis=1, keepdims=True)
+        spearman.append(
+            ranks @ base_rank / np.sqrt((base_rank @ base_rank) * (ranks * ranks).sum(axis=1))
+        )
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        shared = base_top[top].sum(axis=1)
+        jaccard.append(shared / (2 * k - shared))
+
+    return np.concatenate(spearman), np.concatenate(jaccard)
+
+
+# --------------------------------------------------
+# SENSITIVITY ANALYSIS
+# --------------------------------------------------
+def sensitivity_analysis(df, settings=None, top_k=None, seed=0):
+    """
+    Score every cell under every setting at once: scores = X @ W.T with
+    X the (cells x 3) normalised features, processed in cell chunks.
+
+    Returns (cells, per_setting):
+      cells       - high_share (settings classing the cell High),
+                    class_stability (settings agreeing with its baseline class),
+                    robust_high, and health_high_share when pollution is present
+      per_setting - the settings with spearman / top-k jaccard against the
+                    baseline ranking (for a random subset of settings)
+    """
+
+    settings = sample_settings(seed=seed) if settings is None else settings.reset_index(drop=True)
+
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    valid = np.isfinite(X).all(axis=1)
+    X = np.where(valid[:, None], X, 0)
+
+    weights = settings[["temp_weight", "ndbi_weight", "ndvi_weight"]].to_numpy()
+    high = settings["high_threshold"].to_numpy()
+    moderate = settings["moderate_threshold"].to_numpy()
+    health_weight = settings["health_heat_weight"].to_numpy()
+    health_high = settings["health_high_threshold"].to_numpy()
+
+    pollution = df["pollution_index"].to_numpy(dtype=np.float64) if "pollution_index" in df else None
+    has_pollution = pollution is not None and np.isfinite(pollution).any()
+
+    n, m = len(X), len(settings)
+    high_count = np.zeros(n)
+    same_count = np.zeros(n)
+    health_count = np.zeros(n)
+    baseline_high = np.zeros(n, dtype=bool)
+
+    chunk = max(1, SENSITIVITY_MEMORY_BUDGET // (m * 8 * 4))
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        scores = X[start:stop] @ weights.T
+
+        # Class code per setting: 0 Low, 1 Moderate, 2 High
+        is_high = scores > high
+        classes = is_high.astype(np.int8) + (scores > moderate)
+
+        high_count[start:stop] = is_high.sum(axis=1)
+        baseline_high[start:stop] = is_high[:, 0]
+        same_count[start:stop] = (classes == classes[:, :1]).sum(axis=1)
+
+        if has_pollution:
+            health = health_weight * scores + (1 - health_weight) * pollution[start:stop, None]
+            health_count[start:stop] = (health > health_high).sum(axis=1)
+
+    cells = pd.DataFrame({"cell_id": df["cell_id"].to_numpy()} if "cell_id" in df else {}, index=df.index)
+    cells["high_share"] = np.where(valid, high_count / m, np.nan)
+    cells["class_stability"] = np.where(valid, same_count / m, np.nan)
+    cells["baseline_high"] = baseline_high & valid
+    cells["robust_high"] = cells["high_share"] >= SENSITIVITY_ROBUST_SHARE
+    if has_pollution:
+        cells["health_high_share"] = np.where(valid & np.isfinite(pollution), health_count / m, np.nan)
+    cells.attrs["settings"] = m
+
+    # Rank agreement over the valid cells for a subset of settings (ranking
+    # every setting would cost a full sort per setting)
+    rng = np.random.default_rng(seed)
+    subset = np.r_[0, np.sort(rng.choice(np.arange(1, m), min(SENSITIVITY_RANK_SAMPLES, m - 1), replace=False))]
+    per_setting = settings.iloc[subset].copy()
+
+    if valid.sum() > 1:
+        X_valid = X[valid]
+        base_scores = X_valid @ weights[0]
+        k = top_k or int((base_scores > high[0]).sum()) or max(1, len(X_valid) // 10)
+        k = min(k, len(X_valid))
+        per_setting["spearman"], per_setting["jaccard"] = _rank_agreement(
+            X_valid, weights[subset], base_scores, k
+        )
+        per_setting.attrs["top_k"] = k
+
+    return cells, per_setting
+
+
+def sensitivity_summary(cells, per_setting):
+    """
+    Compact robustness figures for the dashboard and the PDF.
+    """
+
+    baseline_high = int(cells["baseline_high"].sum())
+    robust_high = int(cells["robust_high"].sum())
+
+    summary = {
+        "settings": cells.attrs.get("settings"),
+        "baseline_high_cells": baseline_high,
+        "robust_high_cells": robust_high,
+        "robust_high_pct": robust_high / baseline_high * 100 if baseline_high else float("nan"),
+        "mean_class_stability": float(cells["class_stability"].mean()),
+        "stable_cell_share": float((cells["class_stability"] >= SENSITIVITY_ROBUST_SHARE).mean() * 100),
+    }
+
+    if "spearman" in per_setting:
+        summary.update({
+            "top_k": per_setting.attrs.get("top_k"),
+            "spearman_median": float(per_setting["spearman"].median()),
+            "spearman_p5": float(per_setting["spearman"].quantile(0.05)),
+            "jaccard_median": float(per_setting["jaccard"].median()),
+            "jaccard_p5": float(per_setting["jaccard"].quantile(0.05)),
+        })
+
+    return summary
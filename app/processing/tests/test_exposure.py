@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.transform import from_origin
+
+from config.settings import CITY_WIDE, GRID_CRS
+from processing.cells import encode_cell_id
+from processing.exposure import exposure_summary, population_by_cell, ward_exposure
+
+SCALE = 500
+ROW0, COL0 = 4000, 16000
+
+
+def _grid(levels, heat, ward=None):
+    n = len(levels)
+    df = pd.DataFrame({
+        "cell_id": encode_cell_id(np.full(n, ROW0), COL0 + np.arange(n)),
+        "risk_level": levels,
+        "heat_risk": heat,
+    })
+    if ward is not None:
+        df["ward"] = ward
+    return df
+
+
+def _population_raster(path, values, pixel=100):
+    values = np.asarray(values, dtype=np.float32)
+    with rasterio.open(
+        path, "w", driver="GTiff", width=values.shape[1], height=values.shape[0], count=1,
+        dtype="float32", crs=GRID_CRS, nodata=-1,
+        transform=from_origin(COL0 * SCALE, (ROW0 + 2) * SCALE, pixel, pixel),
+    ) as dst:
+        dst.write(values, 1)
+    return path
+
+
+def test_population_sums_pixels_per_cell(tmp_path):
+    # 2 x 3 cells of 5 x 5 pixels, one person per pixel; the grid only has
+    # three cells of the southern row, so the northern row is dropped
+    values = np.ones((10, 15))
+    values[9, 0] = -1
+    path = _population_raster(str(tmp_path / "pop.tif"), values)
+
+    population = population_by_cell(_grid(["Low"] * 3, [0.1] * 3), path, scale=SCALE, window_rows=3)
+
+    assert population.tolist() == [24.0, 25.0, 25.0]
+
+
+def test_raster_outside_the_grid_gives_no_population(tmp_path):
+    path = _population_raster(str(tmp_path / "pop.tif"), np.ones((10, 15)))
+    df = _grid(["High"] * 3, [0.9] * 3)
+    df["cell_id"] = encode_cell_id(np.full(3, ROW0 + 1000), COL0 + np.arange(3))
+
+    population = population_by_cell(df, path, scale=SCALE)
+
+    assert population.tolist() == [0.0, 0.0, 0.0]
+    assert np.isnan(exposure_summary(df, population)["people_high_risk_pct"])
+
+
+def test_exposure_summary_shares_and_empty_population():
+    df = _grid(["Low", "High", "High"], [0.2, 0.8, np.nan])
+
+    summary = exposure_summary(df, [100, 50, 50])
+    assert summary["people_by_risk"] == {"Low": 100, "Moderate": 0, "High": 100}
+    assert summary["people_high_risk_pct"] == 50
+    assert np.isclose(summary["pop_heat_risk"], (0.2 * 100 + 0.8 * 50) / 150)
+
+    empty = exposure_summary(df, [0, 0, 0])
+    assert np.isnan(empty["people_high_risk_pct"]) and np.isnan(empty["pop_heat_risk"])
+
+
+def test_ward_exposure_ranking_and_city_wide_fallback():
+    df = _grid(["High", "Low", "High"], [0.9, 0.1, 0.7], ward=["a", "b", "b"])
+
+    ranking = ward_exposure(df, [10, 100, 30])
+    assert ranking["ward"].tolist() == ["b", "a"]
+    assert ranking["people_high_risk"].tolist() == [30, 10]
+
+    city = ward_exposure(df.drop(columns="ward"), [10, 100, 30])
+    assert city["ward"].tolist() == [CITY_WIDE]
+    assert city["population"].tolist() == [140]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from processing.hotspots import (
+    _distinct_draws,
+    getis_ord_gi_star,
+    local_moran,
+    spatial_weights,
+)
+
+
+def _grid(size):
+    row, col = np.divmod(np.arange(size * size), size)
+    return row, col
+
+
+def test_queen_weights_count_neighbours():
+    row, col = _grid(3)
+    weights = spatial_weights(row, col, "queen")
+
+    cardinality = np.diff(weights.indptr)
+    assert cardinality[4] == 8          # centre
+    assert cardinality[0] == 3          # corner
+    assert weights.diagonal().sum() == 0
+
+
+def test_distinct_draws_without_replacement_and_never_self():
+    rng = np.random.default_rng(0)
+    cells = np.arange(50)
+    draws = _distinct_draws(rng, 10, cells % 10, 8)
+
+    for cell, row in zip(cells % 10, draws):
+        assert len(set(row)) == 8
+        assert cell not in row
+        assert row.min() >= 0 and row.max() < 10
+
+
+def test_distinct_draws_uniform():
+    rng = np.random.default_rng(1)
+    draws = _distinct_draws(rng, 6, np.zeros(20_000, dtype=np.int64), 3)
+
+    counts = np.bincount(draws.ravel(), minlength=6)
+    assert counts[0] == 0
+    # 60,000 draws over 5 cells
+    assert np.allclose(counts[1:] / counts[1:].sum(), 0.2, atol=0.01)
+
+
+def test_gi_star_matches_direct_formula():
+    rng = np.random.default_rng(2)
+    row, col = _grid(6)
+    weights = spatial_weights(row, col, "rook")
+    x = rng.random(36)
+
+    z, _ = getis_ord_gi_star(x, weights)
+
+    w = weights.toarray() + np.eye(36)
+    n, mean, s = 36, x.mean(), x.std()
+    w_sum = w.sum(axis=1)
+    expected = (w @ x - mean * w_sum) / (s * np.sqrt((n * (w ** 2).sum(axis=1) - w_sum ** 2) / (n - 1)))
+    assert np.allclose(z, expected)
+
+
+def test_local_moran_finds_hot_cluster():
+    row, col = _grid(12)
+    x = np.where((row < 4) & (col < 4), 10.0, 0.0) + np.random.default_rng(3).random(144)
+    weights = spatial_weights(row, col, "queen")
+
+    local_i, p, lag = local_moran(x, weights, permutations=199, seed=0)
+
+    inner = (row == 1) & (col == 1)
+    assert local_i[inner] > 0 and lag[inner] > 0
+    assert p[inner] < 0.05
+    assert np.all((p > 0) & (p <= 1))
+
+
+def test_local_moran_reproducible_with_seed():
+    row, col = _grid(8)
+    x = np.random.default_rng(4).random(64)
+    weights = spatial_weights(row, col, "queen")
+
+    assert np.array_equal(local_moran(x, weights, 99, seed=5)[1], local_moran(x, weights, 99, seed=5)[1])
+
+
+@pytest.mark.parametrize("n", [1, 2])
+def test_local_moran_tiny_grids(n):
+    row, col = np.zeros(n, dtype=np.int64), np.arange(n)
+    weights = spatial_weights(row, col, "queen")
+
+    _, p, _ = local_moran(np.arange(n, dtype=float), weights, permutations=19, seed=0)
+    assert p.shape == (n,)
+    assert np.all(p <= 1)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from processing.cells import encode_cell_id
+from processing.incremental import IncrementalGrid, pixel_cell_ids, zonal_means
+
+
+def _state(temps):
+    n = len(temps)
+    df = pd.DataFrame({
+        "cell_id": encode_cell_id(np.zeros(n), np.arange(n)),
+        "ST_B10": np.asarray(temps, dtype=float),
+        "NDVI": np.full(n, 0.3),
+        "NDBI": np.full(n, 0.1),
+        "pollution_index": np.zeros(n),
+    })
+    grid = IncrementalGrid(df)
+    grid._score(np.arange(n))
+    return grid
+
+
+def test_zonal_means_skip_invalid_and_sparse_cells():
+    cells = np.array([[1, 1, 2], [1, 2, 3]])
+    bands = {"ST_B10": np.array([[30.0, 32.0, 40.0], [np.nan, 42.0, 50.0]])}
+    valid = np.array([[True, True, True], [True, True, False]])
+
+    stats = zonal_means(bands, cells, valid, min_valid_pixels=2)
+
+    assert stats["cell_id"].tolist() == [1, 2]
+    assert stats["ST_B10"].tolist() == [31.0, 41.0]
+
+
+def test_pixel_cell_ids_shape():
+    ids = pixel_cell_ids((77.0, 0.001, 0, 28.7, 0, -0.001), (4, 5))
+    assert ids.shape == (4, 5)
+    assert len(np.unique(ids)) <= 20
+
+
+def test_update_rescores_only_covered_cells():
+    grid = _state([30, 35, 40, 45])
+    before = grid.df["heat_risk"].to_numpy().copy()
+
+    changes = grid.update(pd.DataFrame({"cell_id": grid.cell_ids[1:2], "ST_B10": [36.0]}), "scene-1")
+
+    after = grid.df["heat_risk"].to_numpy()
+    assert after[1] > before[1]
+    assert np.array_equal(np.delete(after, 1), np.delete(before, 1))
+    assert "scene-1" in grid.scenes
+    assert set(changes.columns) >= {"cell_id", "old_risk_level", "risk_level"}
+
+
+def test_update_new_extreme_rescales_every_cell():
+    grid = _state([30, 35, 40, 45])
+
+    grid.update(pd.DataFrame({"cell_id": grid.cell_ids[3:], "ST_B10": [50.0]}))
+
+    assert (grid.temp_min, grid.temp_max) == (30, 50)
+    assert np.isclose(grid.df["temp_norm"].iloc[2], 0.5)
+
+
+def test_update_unknown_cells_and_empty_state():
+    grid = _state([30, 40])
+    assert grid.update(pd.DataFrame({"cell_id": [12345], "ST_B10": [1.0]})).empty
+
+    empty = IncrementalGrid(_state([30]).df.iloc[:0])
+    assert empty.update(pd.DataFrame({"cell_id": [12345], "ST_B10": [1.0]})).empty
+
+
+def test_update_without_thermal_band():
+    grid = _state([30, 35, 40])
+
+    grid.update(pd.DataFrame({"cell_id": grid.cell_ids[:1], "NDVI": [0.9]}))
+
+    assert grid.df["NDVI"].iloc[0] == 0.9
+    assert (grid.temp_min, grid.temp_max) == (30, 40)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from processing.pollution_fusion import _to_xy, idw_interpolate, fuse_pollution
+
+STATION_LON = np.array([77.0, 77.1, 77.2])
+STATION_LAT = np.array([28.6, 28.7, 28.6])
+STATION_PM25 = np.array([40.0, 80.0, 120.0])
+
+
+def test_idw_matches_direct_weights():
+    lon, lat = np.array([77.05, 77.15]), np.array([28.62, 28.66])
+
+    result = idw_interpolate(STATION_LON, STATION_LAT, STATION_PM25, lon, lat, k=3, power=2)
+
+    lat0 = STATION_LAT.mean()
+    stations = _to_xy(STATION_LON, STATION_LAT, lat0)
+    for i, cell in enumerate(_to_xy(lon, lat, lat0)):
+        weights = 1 / np.linalg.norm(stations - cell, axis=1) ** 2
+        assert np.isclose(result[i], (weights * STATION_PM25).sum() / weights.sum())
+
+
+def test_idw_cell_on_station_takes_its_value():
+    result = idw_interpolate(STATION_LON, STATION_LAT, STATION_PM25, STATION_LON[1:2], STATION_LAT[1:2])
+    assert result[0] == 80.0
+
+
+def test_idw_chunking_and_single_neighbour():
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(77, 77.2, 1000), rng.uniform(28.6, 28.7, 1000)
+
+    whole = idw_interpolate(STATION_LON, STATION_LAT, STATION_PM25, lon, lat)
+    chunked = idw_interpolate(STATION_LON, STATION_LAT, STATION_PM25, lon, lat, chunk_size=97)
+    assert np.allclose(whole, chunked)
+    assert whole.min() >= 40 and whole.max() <= 120
+
+    nearest = idw_interpolate(STATION_LON, STATION_LAT, STATION_PM25, lon, lat, k=1)
+    assert np.allclose(np.abs(nearest[:, None] - STATION_PM25).min(axis=1), 0)
+
+
+def test_fuse_pollution_without_stations_is_heat_only():
+    df = pd.DataFrame({"longitude": [77.0], "latitude": [28.6], "heat_risk": [0.8]})
+
+    df = fuse_pollution(df, stations=None)
+
+    assert np.isnan(df["pm25"].iloc[0])
+    assert df["pollution_level"].iloc[0] == "Unknown"
+    assert df["pollution_index"].iloc[0] == 0
+
+
+def test_fuse_pollution_interpolates_stations():
+    stations = pd.DataFrame({"longitude": STATION_LON, "latitude": STATION_LAT, "pm25": STATION_PM25})
+    df = pd.DataFrame({"longitude": [77.2], "latitude": [28.6], "heat_risk": [0.5]})
+
+    df = fuse_pollution(df, stations)
+
+    assert df["pm25"].iloc[0] == 120.0
+    assert df["pollution_level"].iloc[0] == "High"
+    assert 0 < df["health_risk"].iloc[0] < 1
@@ -0,0 +1,198 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing.pyramid import GridPyramid, aggregate_level
+
+
+def _stats(size, scale=500, seed=0):
+    rng = np.random.default_rng(seed)
+    row, col = np.divmod(np.arange(size * size), size)
+    count = rng.integers(1, 20, size * size)
+    values = rng.random(size * size) * 40
+    return pd.DataFrame({
+        "row": row + 1000,
+        "col": col + 2000,
+        "ST_B10_sum": values * count,
+        "ST_B10_count": count,
+        "ST_B10_min": values - 1,
+        "ST_B10_max": values + 1,
+    })
+
+
+def _fine_block(parents, value=30.0):
+    rows = parents["row"].to_numpy() * 5
+    cols = parents["col"].to_numpy() * 5
+    n = len(rows)
+    return pd.DataFrame({
+        "row": rows, "col": cols,
+        "ST_B10_sum": np.full(n, value), "ST_B10_count": np.ones(n),
+        "ST_B10_min": np.full(n, value), "ST_B10_max": np.full(n, value),
+    })
+
+
+def test_aggregate_level_is_exact():
+    stats = _stats(4)
+
+    coarse = aggregate_level(stats, ["ST_B10"], 2, 1000)
+
+    assert len(coarse) == 4
+    block = stats[(stats["row"] // 2 == 500) & (stats["col"] // 2 == 1000)]
+    first = coarse.iloc[0]
+    assert first["ST_B10_count"] == block["ST_B10_count"].sum()
+    assert np.isclose(first["ST_B10"], block["ST_B10_sum"].sum() / block["ST_B10_count"].sum())
+    assert first["ST_B10_min"] == block["ST_B10_min"].min()
+    assert first["ST_B10_max"] == block["ST_B10_max"].max()
+
+
+def test_pyramid_levels_preserve_totals():
+    stats = _stats(8)
+    pyramid = GridPyramid(stats, ["ST_B10"], 500, levels=[2000, 1000, 500, 100])
+
+    assert pyramid.scales == [2000, 1000, 500, 100]
+    for scale in (500, 1000, 2000):
+        level = pyramid.level(scale, stats=True)
+        assert np.isclose(level["ST_B10_sum"].sum(), stats["ST_B10_sum"].sum())
+    assert len(pyramid.level(2000)) == 4
+
+
+def test_pyramid_rejects_non_multiple_levels():
+    with pytest.raises(ValueError):
+        GridPyramid(_stats(2), ["ST_B10"], 500, levels=[750, 500])
+
+
+def test_drill_down_reduces_each_parent_once():
+    calls = []
+
+    def fine_fn(parents, scale):
+        calls.append(sorted(parents["cell_id"]))
+        rows, cols = [], []
+        for row, col in zip(parents["row"], parents["col"]):
+            for dr in range(5):
+                for dc in range(5):
+                    rows.append(row * 5 + dr)
+                    cols.append(col * 5 + dc)
+        n = len(rows)
+        return pd.DataFrame({
+            "row": rows, "col": cols,
+            "ST_B10_sum": np.full(n, 30.0), "ST_B10_count": np.ones(n),
+            "ST_B10_min": np.full(n, 30.0), "ST_B10_max": np.full(n, 30.0),
+        })
+
+    pyramid = GridPyramid(_stats(4), ["ST_B10"], 500, levels=[500, 100], fine_fn=fine_fn)
+    base = pyramid.level(500)
+    first = base.iloc[0]
+    bounds = (first["longitude"], first["latitude"], first["longitude"], first["latitude"])
+
+    fine = pyramid.drill_down(bounds)
+    again = pyramid.drill_down(bounds)
+
+    assert len(fine) == 25 and len(again) == 25
+    assert len(calls) == 1
+    assert (fine["ST_B10"] == 30.0).all()
+
+
+def test_update_base_reaggregates_and_drops_stale_drill_downs():
+    stats = _stats(4)
+
+    pyramid = GridPyramid(stats, ["ST_B10"], 500, levels=[1000, 500, 100], fine_fn=lambda p, s: _fine_block(p))
+    base = pyramid.level(500)
+    bounds = (base["longitude"].min(), base["latitude"].min(), base["longitude"].max(), base["latitude"].max())
+    assert len(pyramid.drill_down(bounds)) == 16
+
+    fresh = stats.iloc[:2].copy()
+    fresh["ST_B10_sum"] = 45.0 * fresh["ST_B10_count"]
+    pyramid.update_base(fresh, "scene-1")
+
+    level = pyramid.level(500).set_index(["row", "col"])
+    assert (level.loc[list(zip(fresh["row"], fresh["col"])), "ST_B10"] == 45.0).all()
+    assert len(level) == 16
+    assert "scene-1" in pyramid.scenes
+
+    total = stats["ST_B10_sum"].sum() - stats["ST_B10_sum"].iloc[:2].sum() + fresh["ST_B10_sum"].sum()
+    assert np.isclose(pyramid.level(1000, stats=True)["ST_B10_sum"].sum(), total)
+    # Only the children of the replaced cells are reduced again
+    assert len(pyramid.level(100)) == 14
+    assert len(pyramid.drill_down(bounds)) == 16
+
+
+def test_save_and_load_keep_base_and_scenes(tmp_path):
+    stats = _stats(4)
+    stats.attrs["scenes"] = ["scene-1"]
+    pyramid = GridPyramid(stats, ["ST_B10"], 500, levels=[1000, 500])
+    path = str(tmp_path / "grid" / "pune_500.parquet")
+
+    pyramid.save(path)
+    loaded = GridPyramid.load(path, levels=[1000, 500])
+
+    assert loaded.bands == ["ST_B10"] and loaded.base_scale == 500
+    assert loaded.scenes == {"scene-1"}
+    pd.testing.assert_frame_equal(loaded.level(1000, stats=True), pyramid.level(1000, stats=True))
+    assert [p.name for p in (tmp_path / "grid").iterdir()] == ["pune_500.parquet"]
+
+
+def test_drill_down_runs_fine_reductions_outside_the_lock():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fine_fn(parents, scale):
+        calls.append(sorted(parents["cell_id"]))
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return _fine_block(parents)
+
+    pyramid = GridPyramid(_stats(4), ["ST_B10"], 500, levels=[500, 100], fine_fn=fine_fn)
+    base = pyramid.level(500)
+    first, last = base.iloc[0], base.iloc[-1]
+    slow = (first["longitude"], first["latitude"], first["longitude"], first["latitude"])
+    other = (last["longitude"], last["latitude"], last["longitude"], last["latitude"])
+
+    with ThreadPoolExecutor(3) as pool:
+        leader = pool.submit(pyramid.drill_down, slow)
+        started.wait(5)
+        follower = pool.submit(pyramid.drill_down, slow)
+
+        # Another parent is reduced while the first reduction is still running
+        assert len(pool.submit(pyramid.drill_down, other).result(5)) == 1
+        assert not follower.done()
+
+        release.set()
+        assert len(leader.result(5)) == 1 and len(follower.result(5)) == 1
+
+    # The follower waited for the leader instead of reducing the parent again
+    assert len(calls) == 2
+
+
+def test_failed_drill_down_reaches_waiters_and_is_retried():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fine_fn(parents, scale):
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+            raise RuntimeError("quota")
+        return _fine_block(parents)
+
+    pyramid = GridPyramid(_stats(2), ["ST_B10"], 500, levels=[500, 100], fine_fn=fine_fn)
+    first = pyramid.level(500).iloc[0]
+    bounds = (first["longitude"], first["latitude"], first["longitude"], first["latitude"])
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(pyramid.drill_down, bounds)
+        started.wait(5)
+        follower = pool.submit(pyramid.drill_down, bounds)
+        time.sleep(0.05)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result(5)
+
+    assert len(pyramid.drill_down(bounds)) == 1
+    assert len(calls) == 2
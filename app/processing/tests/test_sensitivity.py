@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import TEMP_WEIGHT, NDBI_WEIGHT, NDVI_WEIGHT, HIGH_RISK_THRESHOLD
+from processing import sensitivity
+from processing.sensitivity import sample_settings, sensitivity_analysis, sensitivity_summary
+
+
+def _grid(n=300, seed=1, pollution=True):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "cell_id": np.arange(n),
+        "temp_norm": rng.random(n),
+        "ndbi_norm": rng.random(n),
+        "ndvi_norm": rng.random(n),
+    })
+    if pollution:
+        df["pollution_index"] = rng.random(n)
+    return df
+
+
+def _brute_force(df, settings):
+    X = df[sensitivity.FEATURES].to_numpy()
+    high_share, stability, health_share = [], [], []
+    for x, pollution in zip(X, df["pollution_index"]):
+        classes, high, health = [], 0, 0
+        for s in settings.itertuples():
+            score = x @ [s.temp_weight, s.ndbi_weight, s.ndvi_weight]
+            classes.append(2 if score > s.high_threshold else 1 if score > s.moderate_threshold else 0)
+            high += score > s.high_threshold
+            health += s.health_heat_weight * score + (1 - s.health_heat_weight) * pollution > s.health_high_threshold
+        high_share.append(high / len(settings))
+        stability.append(np.mean(np.array(classes) == classes[0]))
+        health_share.append(health / len(settings))
+    return np.array(high_share), np.array(stability), np.array(health_share)
+
+
+def test_sample_settings_keep_the_configured_setting_first():
+    settings = sample_settings(n=500, seed=3)
+
+    weights = settings[["temp_weight", "ndbi_weight", "ndvi_weight"]].to_numpy()
+    assert np.allclose(weights[0], [TEMP_WEIGHT, NDBI_WEIGHT, NDVI_WEIGHT])
+    assert settings["high_threshold"].iat[0] == HIGH_RISK_THRESHOLD
+    assert np.allclose(weights.sum(axis=1), 1)
+    assert (settings["moderate_threshold"] <= settings["high_threshold"]).all()
+    assert settings.equals(sample_settings(n=500, seed=3))
+
+
+def test_shares_match_per_setting_loop(monkeypatch):
+    df = _grid(120)
+    settings = sample_settings(n=40, seed=2)
+    # A few cells per chunk, so chunk boundaries are exercised
+    monkeypatch.setattr(sensitivity, "SENSITIVITY_MEMORY_BUDGET", 40 * 8 * 4 * 7)
+
+    cells, _ = sensitivity_analysis(df, settings)
+
+    high_share, stability, health_share = _brute_force(df, settings)
+    assert np.allclose(cells["high_share"], high_share)
+    assert np.allclose(cells["class_stability"], stability)
+    assert np.allclose(cells["health_high_share"], health_share)
+    assert cells.attrs["settings"] == 40
+
+
+def test_invalid_cells_and_missing_pollution():
+    df = _grid(50, pollution=False)
+    df.loc[3, "ndvi_norm"] = np.nan
+
+    cells, _ = sensitivity_analysis(df, sample_settings(n=20))
+
+    assert np.isnan(cells.loc[3, "high_share"])
+    assert not cells.loc[3, "baseline_high"]
+    assert "health_high_share" not in cells
+
+
+def test_baseline_agrees_with_itself_and_summary():
+    df = _grid(400)
+    cells, per_setting = sensitivity_analysis(df, sample_settings(n=60), top_k=25)
+
+    assert per_setting["spearman"].iat[0] == pytest.approx(1)
+    assert per_setting["jaccard"].iat[0] == pytest.approx(1)
+    assert per_setting["jaccard"].between(0, 1).all()
+
+    # Spearman of a sampled setting against a direct rank correlation
+    X = df[sensitivity.FEATURES].to_numpy()
+    base = X @ per_setting.iloc[0][["temp_weight", "ndbi_weight", "ndvi_weight"]].to_numpy(dtype=float)
+    other = X @ per_setting.iloc[1][["temp_weight", "ndbi_weight", "ndvi_weight"]].to_numpy(dtype=float)
+    expected = np.corrcoef(base.argsort().argsort(), other.argsort().argsort())[0, 1]
+    assert per_setting["spearman"].iat[1] == pytest.approx(expected)
+
+    summary = sensitivity_summary(cells, per_setting)
+    assert summary["top_k"] == 25
+    assert summary["robust_high_cells"] <= len(cells)
+    assert 0 <= summary["stable_cell_share"] <= 100
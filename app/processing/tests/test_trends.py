@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing.trends import (
+    TREND_COLUMNS,
+    cell_trends,
+    classify_heat_persistence,
+    directory_trends,
+    linear_trend,
+    stack_trends,
+    theil_sen_slope,
+    _years,
+)
+
+
+def _times(n, start="2018-01-01", step=90):
+    return np.datetime64(start) + np.arange(n) * np.timedelta64(step, "D")
+
+
+def _stack(scenes=24, cells=40, seed=0):
+    rng = np.random.default_rng(seed)
+    t = _years(_times(scenes))
+    slopes = rng.normal(0.2, 0.5, cells)
+    block = 30 + np.outer(t, slopes) + rng.normal(0, 0.5, (scenes, cells))
+    block[rng.random(block.shape) < 0.1] = np.nan
+    return block
+
+
+def test_linear_trend_matches_polyfit():
+    block = _stack()
+    t = _years(_times(len(block)))
+
+    slopes = linear_trend(block, t)
+
+    for cell in range(block.shape[1]):
+        valid = np.isfinite(block[:, cell])
+        assert slopes[cell] == pytest.approx(np.polyfit(t[valid], block[valid, cell], 1)[0])
+
+
+def test_theil_sen_is_median_of_pairwise_slopes():
+    block = _stack(scenes=12, cells=10)
+    t = _years(_times(len(block)))
+    # One outlier scene barely moves the robust slope
+    block[5, 0] = 80
+
+    slopes = theil_sen_slope(block, t)
+
+    for cell in range(block.shape[1]):
+        pairs = [
+            (block[j, cell] - block[i, cell]) / (t[j] - t[i])
+            for i in range(len(t)) for j in range(i + 1, len(t))
+            if np.isfinite(block[i, cell]) and np.isfinite(block[j, cell])
+        ]
+        # Slopes are computed in float32
+        assert slopes[cell] == pytest.approx(np.median(pairs), abs=1e-4)
+
+
+def test_too_few_observations_give_nan():
+    block = np.full((6, 2), np.nan)
+    block[:2, 0] = [30, 31]
+    block[:, 1] = np.arange(6)
+
+    values = cell_trends(block, _times(6))
+
+    assert np.isnan(values[0, :2]).all()
+    assert np.isfinite(values[1, :2]).all()
+
+
+def test_anomaly_against_seasonal_climatology():
+    # Yearly scenes in the same month; the latest is far above the others
+    times = np.array([f"{year}-05-01" for year in range(2015, 2024)], dtype="datetime64[D]")
+    block = np.array([[30.0, 31.0, 30.5, 29.5, 30.0, 31.0, 30.5, 29.5, 36.0]]).T
+
+    trend, _, climatology, clim_std, anomaly, n_obs = cell_trends(block, times)[0]
+
+    assert climatology == pytest.approx(block[:-1].mean())
+    assert clim_std == pytest.approx(block[:-1].std(ddof=1))
+    assert anomaly == pytest.approx((36.0 - climatology) / clim_std)
+    assert n_obs == 9
+
+
+def test_stack_chunks_and_workers_agree(tmp_path):
+    block = _stack(scenes=16, cells=50)
+    times = _times(16)
+    path = str(tmp_path / "ST_B10.npy")
+    np.save(path, block)
+
+    whole = stack_trends(path, times, max_workers=1, chunk_cells=50)
+    chunked = stack_trends(path, times, max_workers=1, chunk_cells=7)
+    parallel = stack_trends(path, times, max_workers=2, chunk_cells=13)
+
+    assert list(whole.columns) == TREND_COLUMNS
+    pd.testing.assert_frame_equal(whole, chunked)
+    pd.testing.assert_frame_equal(whole, parallel)
+
+    with pytest.raises(ValueError):
+        stack_trends(path, times[::-1], max_workers=1)
+
+
+def test_directory_trends_and_persistence_classes(tmp_path):
+    # Monthly scenes over three years, so the season has earlier years
+    scenes, cells = 36, 20
+    times = _times(scenes, step=30)
+    block = np.full((scenes, cells), 30.0) + np.random.default_rng(0).normal(0, 0.2, (scenes, cells))
+    block[:, 0] += 10          # chronically hot
+    block[-1, 1] += 5          # anomalous latest scene
+    block[:, 2] += np.linspace(-3, 0, scenes)  # warming ~1 °C / year from a cool start
+
+    np.save(tmp_path / "dates.npy", times)
+    np.save(tmp_path / "cell_ids.npy", np.arange(cells))
+    np.save(tmp_path / "ST_B10.npy", block)
+
+    trends = directory_trends(str(tmp_path), max_workers=1)
+    assert "NDVI_trend" not in trends
+    assert trends["cell_id"].tolist() == list(range(cells))
+
+    classes = classify_heat_persistence(trends)
+    assert classes[0] == "Chronic"
+    assert classes[1] == "Anomaly"
+    assert classes[2] == "Warming"
+    # The chronic class is the top CHRONIC_HEAT_QUANTILE, so it may take one more cell
+    assert set(classes[3:]) <= {"Typical", "Chronic"}
+    assert (classes == "Chronic").sum() <= 2
@@ -0,0 +1,233 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    TREND_MIN_OBS,
+    TREND_SEASON_MONTHS,
+    TREND_MEMORY_BUDGET,
+    TREND_WARMING_RATE,
+    ANOMALY_Z,
+    CHRONIC_HEAT_QUANTILE,
+)
+from satellite.composite import _nan_percentile
+
+TREND_COLUMNS = ["trend", "sen_slope", "climatology", "clim_std", "anomaly", "n_obs"]
+
+
+# --------------------------------------------------
+# PER-CELL STATISTICS ON A (time, cells) BLOCK
+# --------------------------------------------------
+def _years(times):
+    times = np.asarray(times, dtype="datetime64[D]")
+    return (times - times[0]).astype(float) / 365.25
+
+
+def _months(times):
+    return np.asarray(times, dtype="datetime64[M]").astype(int) % 12
+
+
+def linear_trend(block, t):
+    """
+    Least-squares slope per cell (units per year) from closed-form sums;
+    NaN observations are ignored.
+    """
+
+    valid = np.isfinite(block)
+    y = np.where(valid, block, 0)
+    t = t - t.mean()
+
+    n = valid.sum(axis=0)
+    st = t @ valid
+    stt = (t * t) @ valid
+    sy = y.sum(axis=0)
+    sty = t @ y
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n * sty - st * sy) / (n * stt - st * st)
+    return np.where(n >= TREND_MIN_OBS, slope, np.nan)
+
+
+def theil_sen_slope(block, t):
+    """
+    Median of pairwise slopes per cell (units per year); robust to the
+    odd cloud-contaminated or heat-wave scene that skews least squares.
+    """
+
+    # Pairs of distinct dates only; NaN observations give NaN slopes
+    i, j = np.triu_indices(len(t), k=1)
+    distinct = t[j] > t[i]
+    i, j = i[distinct], j[distinct]
+    dt = (t[j] - t[i]).astype(np.float32)
+
+    values = np.asarray(block, dtype=np.float32)
+    slopes = (values[j] - values[i]) / dt[:, None]
+
+    slope = _nan_percentile(slopes, 50)
+    return np.where(np.isfinite(block).sum(axis=0) >= TREND_MIN_OBS, slope, np.nan)
+
+
+def _monthly_sums(block, months):
+    valid = np.isfinite(block)
+    y = np.where(valid, block, 0)
+    onehot = (months[None, :] == np.arange(12)[:, None]).astype(float)
+    return onehot @ valid, onehot @ y, onehot @ (y * y)
+
+
+def _mean_std(count, total, squares):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0) * count / (count - 1))
+    return mean, std
+
+
+def monthly_climatology(block, months):
+    """
+    Per-cell mean, standard deviation and count for each calendar month,
+    as (12, cells) arrays from one-hot month sums.
+    """
+    count, total, squares = _monthly_sums(block, months)
+    mean, std = _mean_std(count, total, squares)
+    return mean, std, count
+
+
+def cell_trends(block, times):
+    """
+    Trend, Theil-Sen slope, seasonal climatology of earlier scenes and
+    the z-score anomaly of the latest scene for a (time, cells) block
+    with times in ascending order. The season is the latest scene's
+    month +/- TREND_SEASON_MONTHS.
+    """
+
+    block = np.asarray(block, dtype=np.float64)
+    t = _years(times)
+    months = _months(times)
+
+    # Baseline excludes the latest scene so the anomaly is not judged against itself
+    count, total, squares = _monthly_sums(block[:-1], months[:-1])
+    distance = np.abs(np.arange(12) - months[-1])
+    season = np.minimum(distance, 12 - distance) <= TREND_SEASON_MONTHS
+
+    count = count[season].sum(axis=0)
+    climatology, clim_std = _mean_std(count, total[season].sum(axis=0), squares[season].sum(axis=0))
+    climatology[count < TREND_MIN_OBS] = np.nan
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        anomaly = (block[-1] - climatology) / clim_std
+    anomaly[~np.isfinite(anomaly)] = np.nan
+
+    return np.column_stack([
+        linear_trend(block, t),
+        theil_sen_slope(block, t),
+        climatology,
+        np.where(count >= TREND_MIN_OBS, clim_std, np.nan),
+        anomaly,
+        np.isfinite(block).sum(axis=0),
+    ])
+
+
+# --------------------------------------------------
+# CHUNKED, PROCESS-PARALLEL STACKS
+# --------------------------------------------------
+def _chunk_cells(scenes):
+    # Pairwise slopes dominate: two gathers, the slopes and their sorted copy,
+    # each pairs x cells float32
+    pairs = max(scenes * (scenes - 1) // 2, 1)
+    return max(1, TREND_MEMORY_BUDGET // (pairs * 4 * 4))
+
+
+def _stack_chunk(path, times, start, stop):
+    stack = np.load(path, mmap_mode="r")
+    return start, cell_trends(stack[:, start:stop], times)
+
+
+def stack_trends(path, times, max_workers=None, chunk_cells=None):
+    """
+    Per-cell trend columns for a (time, cells) .npy stack of one band.
+
+    The stack is memory-mapped by every worker and split into cell chunks
+    sized from TREND_MEMORY_BUDGET, so peak memory per process stays
+    bounded regardless of the number of cells.
+    """
+
+    stack = np.load(path, mmap_mode="r")
+    scenes, cells = stack.shape
+    if len(times) != scenes:
+        raise ValueError(f"{len(times)} dates for a stack of {scenes} scenes")
+    if np.any(np.diff(np.asarray(times, dtype="datetime64[D]")) < np.timedelta64(0, "D")):
+        raise ValueError("Scene dates must be in ascending order")
+
+    chunk_cells = chunk_cells or _chunk_cells(scenes)
+    max_workers = max_workers or os.cpu_count() or 1
+    results = np.empty((cells, len(TREND_COLUMNS)))
+
+    starts = range(0, cells, chunk_cells)
+    if max_workers == 1 or len(starts) == 1:
+        for start in starts:
+            results[start:start + chunk_cells] = cell_trends(stack[:, start:start + chunk_cells], times)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_stack_chunk, path, times, start, min(start + chunk_cells, cells))
+                for start in starts
+            ]
+            for future in futures:
+                start, values = future.result()
+                results[start:start + len(values)] = values
+
+    return pd.DataFrame(results, columns=TREND_COLUMNS)
+
+
+def band_trends(cell_ids, stacks, times, max_workers=None):
+    """
+    Trend columns for several bands, e.g. {"ST_B10": "lst.npy", ...};
+    columns are prefixed with the band name (ST_B10_trend, ...).
+    """
+
+    trends = pd.DataFrame({"cell_id": np.asarray(cell_ids)})
+    for band, path in stacks.items():
+        values = stack_trends(path, times, max_workers)
+        trends[[f"{band}_{column}" for column in TREND_COLUMNS]] = values.to_numpy()
+    return trends
+
+
+def directory_trends(directory, bands=("ST_B10", "NDVI", "NDBI"), max_workers=None):
+    """
+    Trends for a stack directory holding dates.npy (datetime64), cell_ids.npy
+    and one (time, cells) <band>.npy per band; missing bands are skipped.
+    """
+
+    times = np.load(os.path.join(directory, "dates.npy"))
+    cell_ids = np.load(os.path.join(directory, "cell_ids.npy"))
+    stacks = {
+        band: os.path.join(directory, f"{band}.npy")
+        for band in bands
+        if os.path.exists(os.path.join(directory, f"{band}.npy"))
+    }
+    return band_trends(cell_ids, stacks, times, max_workers)
+
+
+# --------------------------------------------------
+# CHRONIC vs ANOMALOUS HEAT
+# --------------------------------------------------
+def classify_heat_persistence(trends, band="ST_B10"):
+    """
+    Chronic: seasonal climatology in the city's top CHRONIC_HEAT_QUANTILE;
+    Anomaly: latest scene >= ANOMALY_Z standard deviations above it;
+    Warming: Theil-Sen slope >= TREND_WARMING_RATE per year.
+    """
+
+    climatology = trends[f"{band}_climatology"]
+    chronic = climatology >= climatology.quantile(CHRONIC_HEAT_QUANTILE)
+
+    return np.select(
+        [
+            chronic,
+            trends[f"{band}_anomaly"] >= ANOMALY_Z,
+            trends[f"{band}_sen_slope"] >= TREND_WARMING_RATE,
+        ],
+        ["Chronic", "Anomaly", "Warming"],
+        default="Typical"
+    )
@@ -10,45 +10,25 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 
-import matplotlib.pyplot as plt
-import os
+import io
+import math
+
+from cities.registry import get_registry
+from config.settings import SENSITIVITY_ROBUST_SHARE
+from visualization.charts import render_chart
 
 # --------------------------------------------------
 # GENERATE BUDGET vs COOLING CHART
 # --------------------------------------------------
 def generate_budget_chart(budget, cooling):
-    chart_path = "budget_vs_cooling.png"
-
-    plt.figure(figsize=(5, 3))
-    plt.bar(["Budget (₹ Cr)"], [budget], color="#3498db")
-    plt.bar(["Cooling (°C)"], [cooling], color="#2ecc71")
-    plt.title("Budget vs Temperature Reduction")
-    plt.ylabel("Impact")
-    plt.tight_layout()
-    plt.savefig(chart_path)
-    plt.close()
-
-    return chart_path
+    return io.BytesIO(render_chart("budget_vs_cooling", budget=budget, cooling=cooling))
 
 
 # --------------------------------------------------
 # GENERATE POLLUTION CHART
 # --------------------------------------------------
 def generate_pollution_chart(pm25):
-    chart_path = "pollution_level.png"
-
-    plt.figure(figsize=(5, 3))
-    plt.bar(["PM2.5"], [pm25], color="#e74c3c")
-    plt.axhline(60, color="orange", linestyle="--", label="Moderate limit")
-    plt.axhline(30, color="green", linestyle="--", label="Good limit")
-    plt.ylabel("µg/m³")
-    plt.title("Ground Air Pollution (PM2.5)")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(chart_path)
-    plt.close()
-
-    return chart_path
+    return io.BytesIO(render_chart("pm25_status", pm25=pm25))
 
 
 # --------------------------------------------------
@@ -79,33 +59,16 @@ def build_action_plan_table(selected_actions):
 # CITY-SPECIFIC GUIDELINES
 # --------------------------------------------------
 def get_city_guidelines(city):
-    if city.lower() == "delhi":
-        return """
-<b>City-Specific Focus (Delhi)</b><br/><br/>
-• Prioritize dust suppression and traffic emission control<br/>
-• Expand urban forests along highways and industrial zones<br/>
-• Cool roofs for slum clusters and government schools<br/>
-• Strengthen Heatwave + Smog early warning integration
-"""
-    elif city.lower() == "mumbai":
-        return """
-<b>City-Specific Focus (Mumbai)</b><br/><br/>
-• Focus on coastal heat stress and dense slum redevelopment<br/>
-• Increase shaded corridors and waterfront cooling zones<br/>
-• Reflective roofing in Dharavi and transit hubs<br/>
-• Integrate drainage + cooling for monsoon resilience
-"""
-    elif city.lower() == "pune":
-        return """
-<b>City-Specific Focus (Pune)</b><br/><br/>
-• Protect hill slopes and green buffers from construction<br/>
-• Promote rooftop gardens in IT corridors<br/>
-• Increase tree cover along major roads<br/>
-• Target industrial PM2.5 hotspots
-"""
-    else:
+    guidelines = get_registry().guidelines(city)
+    if not guidelines:
         return ""
 
+    name = get_registry().get(city)["name"]
+    bullets = "".join(f"• {item}<br/>\n" for item in guidelines)
+    return f"""
+<b>City-Specific Focus ({name})</b><br/><br/>
+{bullets}"""
+
 
 # --------------------------------------------------
 # MAIN PDF GENERATOR
@@ -117,7 +80,12 @@ def generate_heat_pollution_action_plan(
     avg_pm25,
     budget,
     estimated_cooling,
-    selected_actions
+    selected_actions,
+    exposed_pct=None,
+    wards=False,
+    sensitivity=None,
+    persistence=None,
+    charts=None
 ):
     file_path = f"{city}_Heat_Pollution_Action_Plan.pdf"
     styles = getSampleStyleSheet()
@@ -142,6 +110,15 @@ def generate_heat_pollution_action_plan(
     # --------------------------------------------------
     # EXECUTIVE SUMMARY
     # --------------------------------------------------
+    optional_lines = ""
+    if exposed_pct is not None and math.isfinite(exposed_pct):
+        optional_lines += f"• Residents in high-risk heat zones: <b>{exposed_pct:.0f}%</b><br/>"
+    if persistence:
+        optional_lines += (
+            f"• Chronically hot areas: <b>{persistence.get('Chronic', 0):.0f}%</b>, "
+            f"anomalous in the latest scene: <b>{persistence.get('Anomaly', 0):.0f}%</b><br/>"
+        )
+
     summary_text = f"""
 <b>Executive Summary</b><br/><br/>
 This plan integrates satellite-based urban heat assessment with
@@ -150,20 +127,40 @@ for <b>{city}</b>.<br/><br/>
 
 • Average surface temperature: <b>{avg_temp:.1f} °C</b><br/>
 • High-risk heat zones: <b>{hot_pct:.0f}%</b> of the city<br/>
-• Average PM2.5 level: <b>{avg_pm25:.1f} µg/m³</b><br/>
+{optional_lines}• Average PM2.5 level: <b>{avg_pm25:.1f} µg/m³</b><br/>
 • Proposed policy budget: <b>₹{budget} crore</b><br/>
 • Expected average cooling: <b>{estimated_cooling:.1f} °C</b>
 """
     story.append(Paragraph(summary_text, styles["Normal"]))
     story.append(Spacer(1, 16))
 
+    # --------------------------------------------------
+    # ROBUSTNESS OF HOTSPOTS
+    # --------------------------------------------------
+    if sensitivity:
+        story.append(Paragraph("<b>Robustness of High-Risk Zones</b>", styles["Heading2"]))
+        story.append(Paragraph(
+            f"""
+Heat risk was recomputed under <b>{sensitivity['settings']}</b> alternative
+weight and threshold settings. <b>{sensitivity['robust_high_cells']}</b> of
+{sensitivity['baseline_high_cells']} high-risk cells
+(<b>{sensitivity['robust_high_pct']:.0f}%</b>) stay high-risk in at least
+{SENSITIVITY_ROBUST_SHARE:.0%} of them, and {sensitivity['stable_cell_share']:.0f}% of all cells keep their risk class.
+Median overlap of the hotspot list with the default one is
+<b>{sensitivity.get('jaccard_median', float('nan')):.2f}</b>; these robust cells are the
+safest priorities for intervention.
+""",
+            styles["Normal"]
+        ))
+        story.append(Spacer(1, 16))
+
     # --------------------------------------------------
     # BUDGET vs COOLING VISUAL
     # --------------------------------------------------
     story.append(Paragraph("<b>Budget vs Cooling Impact</b>", styles["Heading2"]))
     story.append(Spacer(1, 8))
-    chart_path = generate_budget_chart(budget, estimated_cooling)
-    story.append(Image(chart_path, width=320, height=200))
+    budget_chart = generate_budget_chart(budget, estimated_cooling)
+    story.append(Image(budget_chart, width=320, height=200))
     story.append(Spacer(1, 16))
 
     # --------------------------------------------------
@@ -175,6 +172,15 @@ for <b>{city}</b>.<br/><br/>
     story.append(Image(pollution_chart, width=320, height=200))
     story.append(Spacer(1, 16))
 
+    # --------------------------------------------------
+    # DASHBOARD CHARTS (same cached images as the app)
+    # --------------------------------------------------
+    for title, image in charts or []:
+        story.append(Paragraph(f"<b>{title}</b>", styles["Heading2"]))
+        story.append(Spacer(1, 8))
+        story.append(Image(io.BytesIO(image), width=320, height=240))
+        story.append(Spacer(1, 16))
+
     # --------------------------------------------------
     # ACTION PLAN TABLE
     # --------------------------------------------------
@@ -202,9 +208,12 @@ for <b>{city}</b>.<br/><br/>
     # --------------------------------------------------
     # IMPLEMENTATION GUIDELINES
     # --------------------------------------------------
-    guidelines = """
+    ward_note = "" if wards else (
+        " (ward boundaries are not available yet, so exposure is reported city-wide only)"
+    )
+    guidelines = f"""
 <b>Implementation Guidelines</b><br/><br/>
-1. Focus interventions in wards with highest heat & pollution overlap<br/>
+1. Focus interventions in wards with highest heat & pollution overlap{ward_note}<br/>
 2. Prioritize schools, hospitals, and slum areas<br/>
 3. Integrate heat action plans with AQI advisories<br/>
 4. Use satellite data annually to update hotspots<br/>
@@ -217,9 +226,4 @@ for <b>{city}</b>.<br/><br/>
     # --------------------------------------------------
     doc.build(story)
 
-    if os.path.exists(chart_path):
-        os.remove(chart_path)
-    if os.path.exists(pollution_chart):
-        os.remove(pollution_chart)
-
     return file_path
@@ -0,0 +1,307 @@
+"""
+Cloud-Optimized GeoTIFF export of the analysis grid for GIS tools.
+
+One float32 COG per continuous layer (ST_B10, heat_risk, health_risk,
+temp_after) and one uint8 COG with a band per class layer, on the grid's
+web-mercator raster (GRID_CRS, one pixel per cell).
+
+Run from the app/ directory to export a saved snapshot:
+
+    python -m reporting.raster_export Delhi [date] [--out DIR]
+"""
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import rasterio
+import rasterio.shutil
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.transform import Affine
+from rasterio.windows import Window
+
+from config.settings import (
+    GRID_SCALE,
+    GRID_CRS,
+    EXPORT_DIR,
+    EXPORT_BLOCK_SIZE,
+    EXPORT_COMPRESS,
+    EXPORT_WINDOW_ROWS,
+    EXPORT_CHUNK_ROWS,
+    EXPORT_GDAL_CACHE,
+)
+from processing.cells import decode_cell_id
+
+EXPORT_ROOT = os.path.join(os.path.dirname(__file__), "..", EXPORT_DIR)
+
+VALUE_LAYERS = ["ST_B10", "heat_risk", "health_risk", "temp_after"]
+CLASS_LAYERS = ["risk_level", "health_risk_level", "pollution_level"]
+
+# uint8 class codes; 0 is nodata (no cell, or "Unknown")
+CLASS_CODES = {"Low": 1, "Moderate": 2, "High": 3, "Severe": 4}
+
+VALUE_NODATA = -9999.0
+CLASS_NODATA = 0
+
+
+# --------------------------------------------------
+# GRID SOURCES
+# --------------------------------------------------
+def _source_columns(source):
+    if isinstance(source, pd.DataFrame):
+        return list(source.columns)
+    return pq.ParquetFile(source).schema_arrow.names
+
+
+def _iter_chunks(source, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    DataFrame chunks of a grid frame (in cell_id order, so chunks are
+    compact row bands) or streamed record batches of a parquet snapshot.
+    """
+
+    if isinstance(source, pd.DataFrame):
+        order = np.argsort(source["cell_id"].to_numpy(), kind="stable")
+        for start in range(0, len(order), chunk_rows):
+            yield source[columns].iloc[order[start:start + chunk_rows]]
+        return
+
+    # Without pre-buffering, so row groups are read as consumed instead of
+    # the whole file being fetched ahead
+    parquet = pq.ParquetFile(source, pre_buffer=False, buffer_size=1 << 20)
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns, use_threads=False):
+        yield batch.to_pandas()
+
+
+def grid_extent(source):
+    """
+    (row_min, row_max, col_min, col_max) of the cells in a grid source.
+    """
+
+    row_min = col_min = np.iinfo(np.int64).max
+    row_max = col_max = np.iinfo(np.int64).min
+
+    for chunk in _iter_chunks(source, ["cell_id"]):
+        rows, cols = decode_cell_id(chunk["cell_id"].to_numpy())
+        if len(rows):
+            row_min, row_max = min(row_min, rows.min()), max(row_max, rows.max())
+            col_min, col_max = min(col_min, cols.min()), max(col_max, cols.max())
+
+    if row_min > row_max:
+        raise ValueError("Grid has no cells to export")
+    return int(row_min), int(row_max), int(col_min), int(col_max)
+
+
+def overview_factors(width, height, block=EXPORT_BLOCK_SIZE):
+    """
+    Power-of-two decimations until the coarsest level fits in one tile.
+    """
+
+    factors, factor = [], 2
+    while max(width, height) / (factor // 2) > block:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+# --------------------------------------------------
+# WINDOWED WRITER
+# --------------------------------------------------
+class _CogWriter:
+    """
+    One output file: cells are written window by window into a tiled,
+    uncompressed scratch GeoTIFF (rewritten tiles stay in place), which
+    gets overviews and is then copied to a compressed COG.
+    """
+
+    def __init__(self, path, columns, profile, classes=False):
+        self.path = path
+        self.columns = columns
+        self.classes = classes
+        self.nodata = CLASS_NODATA if classes else VALUE_NODATA
+        self.dtype = "uint8" if classes else "float32"
+        self.scratch = f"{path}.{threading.get_ident()}.scratch.tif"
+        self._touched = set()
+
+        with rasterio.Env(GDAL_CACHEMAX=EXPORT_GDAL_CACHE):
+            self.dst = rasterio.open(
+                self.scratch, "w+", driver="GTiff",
+                count=len(columns), dtype=self.dtype, nodata=self.nodata,
+                tiled=True, blockxsize=EXPORT_BLOCK_SIZE, blockysize=EXPORT_BLOCK_SIZE,
+                BIGTIFF="IF_SAFER", **profile
+            )
+        for band, column in enumerate(columns, start=1):
+            self.dst.set_band_description(band, column)
+            if classes:
+                self.dst.update_tags(band, **{str(code): label for label, code in CLASS_CODES.items()})
+
+    def _values(self, chunk, order):
+        if self.classes:
+            values = np.column_stack([
+                chunk[column].map(CLASS_CODES).fillna(CLASS_NODATA).to_numpy(dtype=np.uint8)
+                for column in self.columns
+            ])
+        else:
+            values = chunk[self.columns].to_numpy(dtype=np.float32)
+            values = np.where(np.isfinite(values), values, np.float32(self.nodata))
+        return values[order]
+
+    def write(self, chunk, rows, cols, order, bounds):
+        """
+        Write one chunk; rows / cols are raster indices sorted by `order`,
+        bounds the [start, stop) slices of each EXPORT_WINDOW_ROWS band.
+        """
+
+        values = self._values(chunk, order)
+
+        with rasterio.Env(GDAL_CACHEMAX=EXPORT_GDAL_CACHE):
+            for start, stop in bounds:
+                r, c = rows[start:stop], cols[start:stop]
+                r0, c0 = r[0], c.min()
+                window = Window(c0, r0, c.max() - c0 + 1, r[-1] - r0 + 1)
+
+                # Bands written by an earlier chunk are read back and merged
+                band = r0 // EXPORT_WINDOW_ROWS
+                if band in self._touched:
+                    data = self.dst.read(window=window)
+                else:
+                    data = np.full((len(self.columns), window.height, window.width), self.nodata, dtype=self.dtype)
+                self._touched.add(band)
+
+                data[:, r - r0, c - c0] = values[start:stop].T
+                self.dst.write(data, window=window)
+
+    def finish(self):
+        """
+        Build overviews and write the COG next to its final path (.part);
+        publish() moves it into place.
+        """
+        with rasterio.Env(GDAL_CACHEMAX=EXPORT_GDAL_CACHE):
+            self.dst.close()
+
+            # Overviews on a fresh handle: libtiff cannot add directories to a
+            # file whose tiles were read back while it was being written
+            factors = overview_factors(self.dst.width, self.dst.height)
+            if factors:
+                with rasterio.open(self.scratch, "r+") as dst:
+                    dst.build_overviews(factors, Resampling.mode if self.classes else Resampling.average)
+
+            rasterio.shutil.copy(
+                self.scratch, f"{self.path}.part", driver="COG",
+                COMPRESS=EXPORT_COMPRESS,
+                PREDICTOR="NO" if self.classes else "YES",
+                BLOCKSIZE=EXPORT_BLOCK_SIZE,
+                BIGTIFF="IF_SAFER",
+            )
+        os.remove(self.scratch)
+
+    def publish(self):
+        os.replace(f"{self.path}.part", self.path)
+
+    def abort(self):
+        if not self.dst.closed:
+            self.dst.close()
+        for path in (self.scratch, f"{self.path}.part"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# --------------------------------------------------
+# EXPORT
+# --------------------------------------------------
+def _window_bands(rows):
+    """
+    [start, stop) runs of row-sorted cells falling in the same band of
+    EXPORT_WINDOW_ROWS raster rows.
+    """
+    band = rows // EXPORT_WINDOW_ROWS
+    edges = np.flatnonzero(np.diff(band)) + 1
+    starts = np.r_[0, edges]
+    stops = np.r_[edges, len(rows)]
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def export_rasters(source, directory=EXPORT_ROOT, prefix="grid", scale=GRID_SCALE, max_workers=None):
+    """
+    Write the grid's layers as Cloud-Optimized GeoTIFFs; returns
+    {layer: path} with "classes" for the multi-band class-code file.
+
+    source is a scored grid DataFrame or a parquet snapshot path. Cells
+    are streamed in chunks and written per EXPORT_WINDOW_ROWS band, so
+    memory depends on the chunk and window sizes, not on the raster;
+    the output files are written concurrently, one thread each.
+    """
+
+    available = set(_source_columns(source))
+    values = [column for column in VALUE_LAYERS if column in available]
+    classes = [column for column in CLASS_LAYERS if column in available]
+    if not values and not classes:
+        raise ValueError("Grid has none of the exportable layers")
+
+    row_min, row_max, col_min, col_max = grid_extent(source)
+    profile = {
+        "width": col_max - col_min + 1,
+        "height": row_max - row_min + 1,
+        "crs": CRS.from_string(GRID_CRS),
+        # North-up: raster row 0 is the northernmost grid row
+        "transform": Affine(scale, 0, col_min * scale, 0, -scale, (row_max + 1) * scale),
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    outputs = {column: os.path.join(directory, f"{prefix}_{column}.tif") for column in values}
+    if classes:
+        outputs["classes"] = os.path.join(directory, f"{prefix}_classes.tif")
+
+    writers = [_CogWriter(outputs[column], [column], profile) for column in values]
+    if classes:
+        writers.append(_CogWriter(outputs["classes"], classes, profile, classes=True))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or len(writers)) as pool:
+            for chunk in _iter_chunks(source, ["cell_id", *values, *classes]):
+                grid_rows, grid_cols = decode_cell_id(chunk["cell_id"].to_numpy())
+                rows = row_max - grid_rows
+                order = np.argsort(rows, kind="stable")
+                rows, cols = rows[order], (grid_cols - col_min)[order]
+                bounds = _window_bands(rows)
+
+                futures = [pool.submit(writer.write, chunk, rows, cols, order, bounds) for writer in writers]
+                for future in futures:
+                    future.result()
+
+            list(pool.map(_CogWriter.finish, writers))
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+
+    # Only once every file is complete, so a failed export never leaves
+    # some layers updated and others not
+    for writer in writers:
+        writer.publish()
+
+    return outputs
+
+
+if __name__ == "__main__":
+    from storage.snapshots import snapshot_path
+
+    parser = argparse.ArgumentParser(description="Export a grid snapshot as Cloud-Optimized GeoTIFFs")
+    parser.add_argument("city")
+    parser.add_argument("date", nargs="?")
+    parser.add_argument("--out", default=EXPORT_ROOT)
+    args = parser.parse_args()
+
+    try:
+        path = snapshot_path(args.city, args.date)
+    except ValueError as e:
+        parser.error(str(e))
+    if path is None:
+        parser.error(f"No snapshot for {args.city} {args.date or ''}".strip())
+
+    date = os.path.basename(path)[:-len(".parquet")]
+    for layer, output in export_rasters(path, os.path.join(args.out, args.city), prefix=date).items():
+        print(f"{layer}: {output}")
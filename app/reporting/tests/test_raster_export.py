@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+
+from processing.cells import decode_cell_id, encode_cell_id
+from reporting import raster_export
+from reporting.raster_export import CLASS_CODES, VALUE_NODATA, export_rasters, overview_factors
+
+SCALE = 500
+ROW0, COL0 = 4000, 16000
+
+
+def _grid(rows=30, cols=40, seed=0):
+    rng = np.random.default_rng(seed)
+    r, c = np.divmod(np.arange(rows * cols), cols)
+    keep = rng.random(len(r)) > 0.2
+    r, c = r[keep], c[keep]
+
+    df = pd.DataFrame({
+        "cell_id": encode_cell_id(ROW0 + r, COL0 + c),
+        "ST_B10": rng.uniform(25, 45, len(r)),
+        "heat_risk": rng.random(len(r)),
+        "risk_level": rng.choice(["Low", "Moderate", "High", "Unknown"], len(r)),
+    })
+    df.loc[::17, "ST_B10"] = np.nan
+    # Shuffled, as grids come out of the pipeline
+    return df.sample(frac=1, random_state=1).reset_index(drop=True), r, c
+
+
+def _pixels(df, grid_rows, grid_cols):
+    """
+    Raster (row, col) of each cell: row 0 is the northernmost grid row.
+    """
+    rows, cols = decode_cell_id(df["cell_id"].to_numpy())
+    return grid_rows.max() + ROW0 - rows, cols - (grid_cols.min() + COL0)
+
+
+def _check(outputs, df, r, c):
+    rows, cols = _pixels(df, r, c)
+
+    with rasterio.open(outputs["ST_B10"]) as src:
+        assert src.crs.to_string() == "EPSG:3857"
+        assert (src.width, src.height) == (c.max() - c.min() + 1, r.max() - r.min() + 1)
+        assert src.transform.c == (COL0 + c.min()) * SCALE
+        assert src.transform.f == (ROW0 + r.max() + 1) * SCALE
+        band = src.read(1)
+
+    expected = df["ST_B10"].fillna(VALUE_NODATA).to_numpy(dtype=np.float32)
+    assert np.array_equal(band[rows, cols], expected)
+
+    # Pixels without a cell are nodata
+    empty = np.ones(band.shape, dtype=bool)
+    empty[rows, cols] = False
+    assert (band[empty] == VALUE_NODATA).all()
+
+    with rasterio.open(outputs["classes"]) as src:
+        assert src.descriptions == ("risk_level",)
+        classes = src.read(1)
+    codes = df["risk_level"].map(CLASS_CODES).fillna(0).to_numpy(dtype=np.uint8)
+    assert np.array_equal(classes[rows, cols], codes)
+
+
+def test_export_places_every_cell(tmp_path):
+    df, r, c = _grid()
+
+    outputs = export_rasters(df, str(tmp_path), prefix="pune")
+
+    assert set(outputs) == {"ST_B10", "heat_risk", "classes"}
+    _check(outputs, df, r, c)
+
+
+def test_small_chunks_and_windows_give_the_same_rasters(tmp_path, monkeypatch):
+    df, r, c = _grid()
+    path = str(tmp_path / "2024-05-01.parquet")
+    df.to_parquet(path, index=False)
+
+    # Chunks and windows that cut through bands written by earlier chunks
+    monkeypatch.setattr(raster_export, "EXPORT_WINDOW_ROWS", 4)
+    monkeypatch.setattr(raster_export._iter_chunks, "__defaults__", (97,))
+
+    from_frame = export_rasters(df, str(tmp_path / "frame"), max_workers=1)
+    from_parquet = export_rasters(path, str(tmp_path / "parquet"))
+
+    _check(from_frame, df, r, c)
+    _check(from_parquet, df, r, c)
+
+
+def test_export_leaves_no_scratch_files(tmp_path):
+    df, _, _ = _grid(5, 5)
+    export_rasters(df, str(tmp_path))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "grid_ST_B10.tif", "grid_classes.tif", "grid_heat_risk.tif",
+    ]
+
+
+def test_failed_writer_publishes_nothing(tmp_path, monkeypatch):
+    df, _, _ = _grid(5, 5)
+    finish = raster_export._CogWriter.finish
+
+    def failing_finish(writer):
+        # The class-code file is finished last, after the value layers
+        if writer.classes:
+            raise OSError("disk full")
+        return finish(writer)
+
+    monkeypatch.setattr(raster_export._CogWriter, "finish", failing_finish)
+
+    with pytest.raises(OSError):
+        export_rasters(df, str(tmp_path), max_workers=1)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_nothing_to_export(tmp_path):
+    df, _, _ = _grid(3, 3)
+
+    with pytest.raises(ValueError):
+        export_rasters(df[["cell_id"]], str(tmp_path))
+    with pytest.raises(ValueError):
+        export_rasters(df.iloc[:0], str(tmp_path))
+
+
+def test_overview_factors():
+    assert overview_factors(100, 80, block=512) == []
+    assert overview_factors(2000, 600, block=512) == [2, 4]
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config.settings import COMPOSITE_MEMORY_BUDGET
+
+# QA_PIXEL bits: 0 fill, 1 dilated cloud, 2 cirrus, 3 cloud, 4 cloud shadow
+QA_CLOUD_BITS = 0b11111
+
+
+# --------------------------------------------------
+# EARTH ENGINE: CLOUD-MASKED COMPOSITES
+# --------------------------------------------------
+def mask_landsat_clouds(image):
+    """
+    Mask fill, cloud, dilated cloud, cirrus and cloud-shadow pixels
+    using the Collection 2 QA_PIXEL band.
+    """
+    clear = image.select("QA_PIXEL").bitwiseAnd(QA_CLOUD_BITS).eq(0)
+    return image.updateMask(clear)
+
+
+def composite_collection(collection, percentile=50):
+    """
+    Per-pixel median (or other percentile) over a cloud-masked collection,
+    keeping the original band names.
+    """
+    masked = collection.map(mask_landsat_clouds)
+    if percentile == 50:
+        return masked.median()
+
+    import ee
+
+    band_names = masked.first().bandNames()
+    return masked.reduce(ee.Reducer.percentile([percentile])).rename(band_names)
+
+
+# --------------------------------------------------
+# LOCAL RASTERS: CHUNKED NaN-AWARE REDUCTIONS
+# --------------------------------------------------
+def qa_clear_mask(qa):
+    return (np.asarray(qa).astype(np.uint16) & QA_CLOUD_BITS) == 0
+
+
+def _nan_percentile(block, percentile):
+    """
+    Percentile along axis 0 ignoring NaNs (linear interpolation).
+    Sort-based, much faster than np.nanpercentile on large blocks.
+    """
+
+    valid = (~np.isnan(block)).sum(axis=0)
+    ordered = np.sort(block, axis=0)  # NaNs sort last
+
+    position = (np.maximum(valid, 1) - 1) * (percentile / 100.0)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.ceil(position).astype(np.intp)
+
+    low = np.take_along_axis(ordered, lower[None], axis=0)[0]
+    high = np.take_along_axis(ordered, upper[None], axis=0)[0]
+
+    result = low + (high - low) * (position - lower)
+    result[valid == 0] = np.nan
+    return result
+
+
+def composite_stack(
+    stack,
+    qa=None,
+    percentile=50,
+    nodata=None,
+    window_rows=None,
+    max_workers=None,
+    out=None
+):
+    """
+    Cloud-masked percentile composite of a (time, rows, cols) scene stack.
+
+    `stack` and `qa` can be np.memmap (or any array supporting slicing), so
+    only one row window per worker is in memory at a time. Windows are sized
+    from COMPOSITE_MEMORY_BUDGET and reduced in a thread pool.
+    """
+
+    scenes, rows, cols = stack.shape
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if window_rows is None:
+        row_bytes = scenes * cols * 4 * 3  # window + sorted copy + mask
+        window_rows = max(1, COMPOSITE_MEMORY_BUDGET // (row_bytes * max_workers))
+
+    if out is None:
+        out = np.empty((rows, cols), dtype=np.float32)
+
+    def reduce_window(start):
+        stop = min(start + window_rows, rows)
+        block = np.array(stack[:, start:stop, :], dtype=np.float32)
+
+        if nodata is not None:
+            block[block == nodata] = np.nan
+        if qa is not None:
+            block[~qa_clear_mask(qa[:, start:stop, :])] = np.nan
+
+        out[start:stop] = _nan_percentile(block, percentile)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(reduce_window, range(0, rows, window_rows)))
+
+    return out
+
+
+def composite_bands(bands, qa=None, percentile=50, nodata=None, **kwargs):
+    """
+    Composite several band stacks ({name: (time, rows, cols)}) that share one QA stack.
+    """
+    return {
+        name: composite_stack(stack, qa, percentile, nodata, **kwargs)
+        for name, stack in bands.items()
+    }
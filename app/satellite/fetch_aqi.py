@@ -1,5 +1,6 @@
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 
 AQICN_TOKEN = "bf7a2a4705829975685ffd7847fa1ed86548e272"
@@ -42,3 +43,72 @@ def fetch_city_aqi(city):
         "aqi": aqi,
         "pm25": pm25
     }])
+
+
+def _fetch_station_pm25(station):
+    """
+    Fetch the latest PM2.5 reading for one AQICN station.
+    """
+
+    url = f"https://api.waqi.info/feed/@{station['uid']}/"
+    params = {"token": AQICN_TOKEN}
+
+    try:
+        r = requests.get(url, params=params, timeout=10)
+        r.raise_for_status()
+        data = r.json()
+    except Exception:
+        return None
+
+    if data.get("status") != "ok":
+        return None
+
+    pm25 = data["data"].get("iaqi", {}).get("pm25", {}).get("v")
+    if pm25 is None:
+        return None
+
+    aqi = station.get("aqi")
+    return {
+        "station": station.get("station", {}).get("name"),
+        "latitude": station["lat"],
+        "longitude": station["lon"],
+        "aqi": pd.to_numeric(aqi, errors="coerce"),
+        "pm25": pm25
+    }
+
+
+def fetch_station_aqi(bounds, max_workers=8):
+    """
+    Fetch PM2.5 for every AQICN ground station inside
+    bounds = (min_lon, min_lat, max_lon, max_lat)
+    """
+
+    min_lon, min_lat, max_lon, max_lat = bounds
+
+    url = "https://api.waqi.info/map/bounds/"
+    params = {
+        "token": AQICN_TOKEN,
+        "latlng": f"{min_lat},{min_lon},{max_lat},{max_lon}"
+    }
+
+    try:
+        r = requests.get(url, params=params, timeout=10)
+        r.raise_for_status()
+        data = r.json()
+    except Exception:
+        return None
+
+    if data.get("status") != "ok":
+        return None
+
+    stations = [s for s in data.get("data", []) if s.get("uid") is not None]
+    if not stations:
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        rows = [row for row in pool.map(_fetch_station_pm25, stations) if row]
+
+    if not rows:
+        return None
+
+    return pd.DataFrame(rows)
@@ -1,33 +1,66 @@
 import ee
 from datetime import datetime, timedelta
 
+from config.settings import (
+    COMPOSITE_DAYS,
+    COMPOSITE_MAX_SCENE_CLOUD,
+    COMPOSITE_PERCENTILE,
+)
+from satellite.composite import mask_landsat_clouds, composite_collection
+
+
+# --------------------------------------------------
+# LANDSAT COLLECTION
+# --------------------------------------------------
+def _landsat_collection(roi, start_date, end_date):
+    return (
+        ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
+        .filterBounds(roi)
+        .filterDate(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        .filter(ee.Filter.lt("CLOUD_COVER", COMPOSITE_MAX_SCENE_CLOUD))
+    )
+
 
 # --------------------------------------------------
-# FETCH NEAR-REAL-TIME LANDSAT IMAGE
+# FETCH CLOUD-FREE LANDSAT COMPOSITE
 # --------------------------------------------------
-def fetch_landsat(roi, start_date=None, end_date=None):
+def fetch_landsat(roi, start_date=None, end_date=None, percentile=COMPOSITE_PERCENTILE):
     """
-    Fetch the most recent Landsat 8 surface reflectance image
-    (near-real-time, last 30 days).
+    Cloud- and shadow-masked Landsat 8 composite (median by default)
+    over the last COMPOSITE_DAYS days, or start_date..end_date.
+    Returns None when no scene covers the ROI.
     """
 
     # Use Python datetime (Earth Engine does NOT support ee.Date.now())
+    end_date = end_date or datetime.utcnow()
+    start_date = start_date or end_date - timedelta(days=COMPOSITE_DAYS)
+
+    collection = _landsat_collection(roi, start_date, end_date)
+
+    if collection.size().getInfo() == 0:
+        return None
+
+    return composite_collection(collection, percentile)
+
+
+# --------------------------------------------------
+# FETCH LATEST SINGLE SCENE
+# --------------------------------------------------
+def fetch_latest_scene(roi, days=30):
+    """
+    Most recent cloud-masked Landsat 8 scene (keeps system:index and
+    footprint, for incremental updates). Returns None when there is none.
+    """
+
     end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
+    start_date = end_date - timedelta(days=days)
 
-    start_str = start_date.strftime("%Y-%m-%d")
-    end_str = end_date.strftime("%Y-%m-%d")
+    collection = _landsat_collection(roi, start_date, end_date).sort("system:time_start", False)
 
-    collection = (
-        ee.ImageCollection("LANDSAT/LC08/C02/T1_L2")
-        .filterBounds(roi)
-        .filterDate(start_str, end_str)
-        .filter(ee.Filter.lt("CLOUD_COVER", 30))
-        .sort("system:time_start", False)
-    )
+    if collection.size().getInfo() == 0:
+        return None
 
-    image = collection.first()
-    return image
+    return mask_landsat_clouds(collection.first())
 
 
 # --------------------------------------------------
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from satellite.composite import _nan_percentile, composite_stack, composite_bands, qa_clear_mask
+
+
+@pytest.mark.parametrize("percentile", [0, 25, 50, 90, 100])
+def test_nan_percentile_matches_numpy(percentile):
+    rng = np.random.default_rng(0)
+    block = rng.random((7, 20, 30))
+    block[rng.random(block.shape) < 0.3] = np.nan
+    block[:, 0, 0] = np.nan
+
+    with np.errstate(invalid="ignore"), pytest.warns(RuntimeWarning):
+        expected = np.nanpercentile(block, percentile, axis=0)
+
+    assert np.allclose(_nan_percentile(block, percentile), expected, equal_nan=True)
+
+
+def test_qa_clear_mask_bits():
+    qa = np.array([0, 1 << 3, 1 << 4, 1 << 5, 1 << 6])
+    assert qa_clear_mask(qa).tolist() == [True, False, False, True, True]
+
+
+def test_composite_stack_masks_clouds_and_nodata():
+    stack = np.array([
+        [[10.0, 20.0]],
+        [[30.0, -1.0]],
+        [[50.0, 40.0]],
+    ])
+    qa = np.zeros(stack.shape, dtype=np.uint16)
+    qa[2, 0, 0] = 1 << 3  # cloud over the 50
+
+    out = composite_stack(stack, qa, percentile=50, nodata=-1)
+
+    assert out.tolist() == [[20.0, 30.0]]
+
+
+def test_composite_windows_and_workers_agree():
+    rng = np.random.default_rng(1)
+    stack = rng.random((5, 37, 11)).astype(np.float32)
+
+    whole = composite_stack(stack, window_rows=37, max_workers=1)
+    windowed = composite_stack(stack, window_rows=4, max_workers=3)
+
+    assert np.array_equal(whole, windowed)
+    assert np.allclose(whole, np.median(stack, axis=0))
+
+
+def test_composite_bands_share_qa():
+    stack = np.ones((3, 2, 2))
+    bands = composite_bands({"a": stack, "b": stack * 2}, qa=np.zeros(stack.shape, dtype=np.uint16))
+    assert set(bands) == {"a", "b"}
+    assert np.all(bands["b"] == 2)
@@ -0,0 +1,280 @@
+import heapq
+import math
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from config.costs import COST_MODEL
+from config.settings import (
+    SITING_PROGRAM_CELLS,
+    SITING_MAX_COOLING,
+    SITING_BUILT_NDBI,
+    SITING_GREEN_NDVI,
+    SITING_COST_STEP,
+    SITING_EXACT_MAX_PAIRS,
+    SITING_EXACT_MAX_STATES,
+)
+
+PLAN_COLUMNS = [
+    "rank", "cell_id", "latitude", "longitude", "intervention",
+    "cost", "cooling", "gain", "gain_per_crore", "cumulative_cost",
+]
+
+
+# --------------------------------------------------
+# PER-CELL SUITABILITY AND BENEFIT
+# --------------------------------------------------
+def intervention_suitability(df):
+    """
+    0-1 suitability of each cell for each intervention from NDVI / NDBI:
+    roofs and pavements need built-up land, greening needs room to add
+    vegetation (easier on open land), water bodies need unbuilt land.
+    """
+
+    built = np.clip(df["NDBI"].to_numpy(dtype=float) / SITING_BUILT_NDBI, 0, 1)
+    room = np.clip(1 - df["NDVI"].to_numpy(dtype=float) / SITING_GREEN_NDVI, 0, 1)
+
+    suitability = pd.DataFrame({
+        "green_cover_10": room * (1 - built / 2),
+        "cool_roof": built,
+        "green_roof": built,
+        "water_bodies": 1 - built,
+        "cool_pavement": built,
+    }, index=df.index)
+    return suitability.fillna(0)
+
+
+def cell_weights(df, population=None):
+    """
+    Value of 1 °C of cooling per cell: health risk (heat risk without
+    pollution data), times people per cell when given.
+    """
+
+    column = "health_risk" if "health_risk" in df and df["health_risk"].notna().any() else "heat_risk"
+    weights = np.nan_to_num(df[column].to_numpy(dtype=float), nan=0.0).clip(min=0)
+    if population is not None:
+        weights = weights * np.asarray(population, dtype=float)
+    return weights
+
+
+def _saturate(cooling):
+    """
+    Effective cooling of stacked interventions; concave, so every added
+    intervention in a cell is worth less than the one before.
+    """
+    return SITING_MAX_COOLING * (1 - np.exp(-np.asarray(cooling) / SITING_MAX_COOLING))
+
+
+def candidate_pairs(df, population=None, interventions=None):
+    """
+    One row per useful (cell, intervention): position in df, per-cell
+    cost (₹ crore), standalone cooling (°C) and the cell weight.
+    """
+
+    interventions = list(interventions or COST_MODEL)
+    suitability = intervention_suitability(df)[interventions].to_numpy()
+    weights = cell_weights(df, population)
+
+    impact = np.array([COST_MODEL[name]["impact"] for name in interventions])
+    cost = np.array([COST_MODEL[name]["cost"] for name in interventions]) / SITING_PROGRAM_CELLS
+
+    cooling = suitability * impact
+    cell, kind = np.nonzero((cooling > 0) & (weights[:, None] > 0))
+
+    return pd.DataFrame({
+        "cell": cell,
+        "kind": kind,
+        "intervention": np.asarray(interventions)[kind],
+        "cost": cost[kind],
+        "cooling": cooling[cell, kind],
+        "weight": weights[cell],
+    })
+
+
+# --------------------------------------------------
+# SOLVERS
+# --------------------------------------------------
+def _lazy_greedy(pairs, budget):
+    """
+    Best marginal gain per ₹ first, from a heap of possibly stale ratios.
+
+    Gains only shrink as a cell accumulates interventions, so a popped
+    pair whose cell changed since it was scored is re-scored and pushed
+    back; one that is still current is the true best and is taken.
+    Returns the selected pair positions and their marginal gains.
+    """
+
+    cost = pairs["cost"].tolist()
+    cooling = pairs["cooling"].tolist()
+    weight = pairs["weight"].tolist()
+    cell = pairs["cell"].tolist()
+
+    initial = pairs["weight"].to_numpy() * _saturate(pairs["cooling"].to_numpy())
+    heap = list(zip((-initial / pairs["cost"].to_numpy()).tolist(), range(len(pairs)), [0] * len(pairs)))
+    heapq.heapify(heap)
+
+    cooled, version = {}, {}
+    selected, gains = [], []
+    remaining = budget
+    min_cost = min(cost, default=math.inf)
+    scale = SITING_MAX_COOLING
+
+    while heap and remaining >= min_cost:
+        ratio, p, seen = heapq.heappop(heap)
+        if cost[p] > remaining:
+            # The budget only shrinks, so this pair will never fit again
+            continue
+
+        c = cell[p]
+        current = version.get(c, 0)
+        if seen == current:
+            remaining -= cost[p]
+            cooled[c] = cooled.get(c, 0.0) + cooling[p]
+            version[c] = current + 1
+            selected.append(p)
+            gains.append(-ratio * cost[p])
+            continue
+
+        before = cooled.get(c, 0.0)
+        gain = weight[p] * scale * (math.exp(-before / scale) - math.exp(-(before + cooling[p]) / scale))
+        if gain > 0:
+            heapq.heappush(heap, (-gain / cost[p], p, current))
+
+    return np.array(selected, dtype=np.int64), np.array(gains)
+
+
+def _options(group):
+    """
+    Every non-empty subset of a cell's candidate pairs with its cost
+    (budget steps) and saturated value.
+    """
+
+    positions = group.index.to_numpy()
+    steps = np.ceil(group["cost"].to_numpy() / SITING_COST_STEP - 1e-9).astype(np.int64)
+    cooling = group["cooling"].to_numpy()
+    weight = group["weight"].iat[0]
+
+    options = []
+    for size in range(1, len(positions) + 1):
+        for subset in combinations(range(len(positions)), size):
+            subset = list(subset)
+            options.append((positions[subset], steps[subset].sum(), weight * _saturate(cooling[subset].sum())))
+    return options
+
+
+def _exact(pairs, budget):
+    """
+    Optimal plan by multiple-choice knapsack DP: each cell picks one
+    subset of its interventions, costs rounded up to SITING_COST_STEP.
+    """
+
+    capacity = int(math.floor(budget / SITING_COST_STEP + 1e-9))
+    groups = [_options(group) for _, group in pairs.groupby("cell", sort=False)]
+
+    best = np.zeros(capacity + 1)
+    choices = np.zeros((len(groups), capacity + 1), dtype=np.int16)
+
+    for g, options in enumerate(groups):
+        previous = best.copy()
+        for o, (_, steps, value) in enumerate(options, start=1):
+            if steps > capacity:
+                continue
+            candidate = previous[:capacity + 1 - steps] + value
+            better = candidate > best[steps:]
+            best[steps:][better] = candidate[better]
+            choices[g, steps:][better] = o
+
+    selected = []
+    b = capacity
+    for g in range(len(groups) - 1, -1, -1):
+        o = choices[g, b]
+        if o:
+            positions, steps, _ = groups[g][o - 1]
+            selected.extend(positions)
+            b -= steps
+
+    return _marginal_gains(pairs, np.array(sorted(selected), dtype=np.int64))
+
+
+def _marginal_gains(pairs, selected):
+    """
+    Gains of selected pairs taken in order of standalone gain per ₹
+    within each cell, so they add up to the plan's total value.
+    """
+
+    chosen = pairs.loc[selected].copy()
+    chosen["order"] = chosen["cooling"] / chosen["cost"]
+    chosen = chosen.sort_values(["cell", "order"], ascending=[True, False])
+
+    after = chosen.groupby("cell")["cooling"].cumsum().to_numpy()
+    before = after - chosen["cooling"].to_numpy()
+    gains = chosen["weight"].to_numpy() * (_saturate(after) - _saturate(before))
+    return chosen.index.to_numpy(), gains
+
+
+# --------------------------------------------------
+# SITING PLAN
+# --------------------------------------------------
+def optimize_siting(df, budget, interventions=None, population=None, mode="auto"):
+    """
+    Where to spend `budget` (₹ crore): a ranked list of (cell,
+    intervention) sites maximising risk-weighted cooling.
+
+    A site's value is its cooling (COST_MODEL impact x suitability)
+    weighted by the cell's health risk; interventions stacked in one cell
+    saturate at SITING_MAX_COOLING. mode "greedy" uses lazy greedy,
+    "exact" the knapsack DP, "auto" exact for small instances only.
+    """
+
+    pairs = candidate_pairs(df, population, interventions)
+
+    if mode == "auto":
+        cells = pairs["cell"].nunique()
+        states = cells * (budget / SITING_COST_STEP + 1)
+        small = len(pairs) <= SITING_EXACT_MAX_PAIRS and states <= SITING_EXACT_MAX_STATES
+        mode = "exact" if small else "greedy"
+
+    if mode == "exact":
+        selected, gains = _exact(pairs, budget)
+    elif mode == "greedy":
+        selected, gains = _lazy_greedy(pairs, budget)
+    else:
+        raise ValueError(f"Unknown siting mode: {mode}")
+
+    chosen = pairs.loc[selected]
+    rows = df.iloc[chosen["cell"].to_numpy()]
+
+    plan = pd.DataFrame({
+        "cell_id": rows["cell_id"].to_numpy() if "cell_id" in df else chosen["cell"].to_numpy(),
+        "latitude": rows["latitude"].to_numpy(),
+        "longitude": rows["longitude"].to_numpy(),
+        "intervention": chosen["intervention"].to_numpy(),
+        "cost": chosen["cost"].to_numpy(),
+        "cooling": chosen["cooling"].to_numpy(),
+        "gain": gains,
+    })
+    plan["gain_per_crore"] = plan["gain"] / plan["cost"]
+    plan = plan.sort_values("gain_per_crore", ascending=False, kind="stable").reset_index(drop=True)
+    plan["rank"] = np.arange(1, len(plan) + 1)
+    plan["cumulative_cost"] = plan["cost"].cumsum()
+
+    plan = plan[PLAN_COLUMNS]
+    plan.attrs.update(mode=mode, budget=budget, candidates=len(pairs))
+    return plan
+
+
+def siting_summary(plan):
+    """
+    Sites, spend, cooling and risk-weighted gain per intervention.
+    """
+
+    if plan.empty:
+        return pd.DataFrame(columns=["sites", "cost", "mean_cooling", "gain"])
+
+    return plan.groupby("intervention").agg(
+        sites=("cell_id", "size"),
+        cost=("cost", "sum"),
+        mean_cooling=("cooling", "mean"),
+        gain=("gain", "sum"),
+    ).sort_values("gain", ascending=False)
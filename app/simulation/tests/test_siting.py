@@ -0,0 +1,118 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation.siting import (
+    PLAN_COLUMNS,
+    _saturate,
+    candidate_pairs,
+    optimize_siting,
+    siting_summary,
+)
+
+INTERVENTIONS = ["green_cover_10", "cool_roof", "water_bodies"]
+
+
+def _grid(n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "cell_id": 1000 + np.arange(n),
+        "latitude": 18.5 + rng.random(n) / 10,
+        "longitude": 73.8 + rng.random(n) / 10,
+        "NDVI": rng.uniform(0, 0.5, n),
+        "NDBI": rng.uniform(-0.1, 0.3, n),
+        "heat_risk": rng.uniform(0.2, 1, n),
+        "health_risk": rng.uniform(0.2, 1, n),
+    })
+
+
+def _value(pairs, subset):
+    cooled = {}
+    for p in subset:
+        cooled.setdefault(pairs["cell"].iat[p], []).append(p)
+    return sum(
+        pairs["weight"].iat[ps[0]] * _saturate(pairs["cooling"].to_numpy()[ps].sum())
+        for ps in cooled.values()
+    )
+
+
+def _brute_force(pairs, budget):
+    best = 0.0
+    for size in range(1, len(pairs) + 1):
+        for subset in combinations(range(len(pairs)), size):
+            if pairs["cost"].to_numpy()[list(subset)].sum() <= budget + 1e-9:
+                best = max(best, _value(pairs, subset))
+    return best
+
+
+def _naive_greedy(pairs, budget):
+    """
+    Greedy by marginal gain per cost, every gain recomputed each step.
+    """
+    chosen, remaining = [], budget
+    while True:
+        candidates = [
+            ((_value(pairs, chosen + [p]) - _value(pairs, chosen)) / pairs["cost"].iat[p], p)
+            for p in range(len(pairs))
+            if p not in chosen and pairs["cost"].iat[p] <= remaining
+        ]
+        candidates = [c for c in candidates if c[0] > 0]
+        if not candidates:
+            return _value(pairs, chosen)
+        _, p = max(candidates)
+        chosen.append(p)
+        remaining -= pairs["cost"].iat[p]
+
+
+@pytest.mark.parametrize("budget", [0.02, 0.045, 0.08])
+def test_exact_matches_brute_force_and_bounds_greedy(budget):
+    df = _grid()
+    pairs = candidate_pairs(df, interventions=INTERVENTIONS)
+
+    exact = optimize_siting(df, budget, INTERVENTIONS, mode="exact")
+    greedy = optimize_siting(df, budget, INTERVENTIONS, mode="greedy")
+
+    assert exact["gain"].sum() == pytest.approx(_brute_force(pairs, budget))
+    assert greedy["gain"].sum() <= exact["gain"].sum() + 1e-9
+    assert greedy["gain"].sum() == pytest.approx(_naive_greedy(pairs, budget))
+
+    for plan in (exact, greedy):
+        assert plan["cost"].sum() <= budget + 1e-9
+        assert list(plan.columns) == PLAN_COLUMNS
+        assert plan["rank"].tolist() == list(range(1, len(plan) + 1))
+        assert plan["gain_per_crore"].is_monotonic_decreasing
+
+
+def test_population_weights_move_the_plan():
+    df = _grid(6, seed=3)
+    population = np.ones(len(df))
+    population[2] = 1000
+
+    plan = optimize_siting(df, 0.02, INTERVENTIONS, population=population, mode="exact")
+
+    assert plan["cell_id"].iat[0] == df["cell_id"].iat[2]
+
+
+def test_auto_mode_and_empty_budget():
+    df = _grid()
+
+    assert optimize_siting(df, 0.05, INTERVENTIONS).attrs["mode"] == "exact"
+
+    plan = optimize_siting(df, 0.0, INTERVENTIONS, mode="greedy")
+    assert plan.empty
+    assert siting_summary(plan).empty
+
+    with pytest.raises(ValueError):
+        optimize_siting(df, 0.05, mode="fastest")
+
+
+def test_summary_adds_up_the_plan():
+    df = _grid(8, seed=1)
+    plan = optimize_siting(df, 0.1, mode="greedy")
+    summary = siting_summary(plan)
+
+    assert summary["sites"].sum() == len(plan)
+    assert summary["cost"].sum() == pytest.approx(plan["cost"].sum())
+    assert summary["gain"].is_monotonic_decreasing
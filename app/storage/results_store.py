@@ -0,0 +1,358 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import date as Date
+
+import pandas as pd
+
+from config.settings import RESULTS_DB
+from storage.snapshots import DATE_PATTERN
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "..", RESULTS_DB)
+
+# Per-cell outputs kept for every run (missing columns are stored as NULL)
+CELL_COLUMNS = [
+    "cell_id", "longitude", "latitude",
+    "ST_B10", "NDVI", "NDBI",
+    "heat_risk", "risk_level",
+    "pm25", "pollution_index", "pollution_level",
+    "health_risk", "health_risk_level",
+    "heat_risk_hotspot", "health_risk_hotspot",
+]
+TEXT_COLUMNS = {
+    "risk_level", "pollution_level", "health_risk_level",
+    "heat_risk_hotspot", "health_risk_hotspot",
+}
+# Columns with a (run_id, column) index for top-k queries
+RANKED_COLUMNS = ["ST_B10", "heat_risk", "pm25", "health_risk"]
+# Columns with a (run_id, column) index for class / persistence queries
+LEVEL_COLUMNS = ["risk_level", "health_risk_level"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id   INTEGER PRIMARY KEY,
+    city     TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    day      INTEGER NOT NULL,
+    updated  INTEGER NOT NULL,
+    UNIQUE (city, run_date)
+);
+
+CREATE TABLE IF NOT EXISTS cells (
+    id      INTEGER PRIMARY KEY,
+    run_id  INTEGER NOT NULL REFERENCES runs(run_id),
+    {", ".join(f"{c} {'TEXT' if c in TEXT_COLUMNS else 'INTEGER' if c == 'cell_id' else 'REAL'}" for c in CELL_COLUMNS)}
+);
+
+-- lon / lat / run day: bounding-box and time-range queries in one index
+CREATE VIRTUAL TABLE IF NOT EXISTS cells_rtree USING rtree (
+    id, min_lon, max_lon, min_lat, max_lat, min_day, max_day
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS cells_run_cell ON cells (run_id, cell_id);
+CREATE INDEX IF NOT EXISTS cells_cell ON cells (cell_id, run_id);
+{"".join(f"CREATE INDEX IF NOT EXISTS cells_run_{c} ON cells (run_id, {c});" for c in RANKED_COLUMNS + LEVEL_COLUMNS)}
+"""
+
+
+def _day(run_date):
+    """
+    Day ordinal of a YYYY-MM-DD run date; ValueError for anything else.
+    """
+    try:
+        if DATE_PATTERN.fullmatch(run_date):
+            return Date.fromisoformat(run_date).toordinal()
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(f"Invalid run date {run_date!r}: expected YYYY-MM-DD")
+
+
+# --------------------------------------------------
+# RESULTS STORE (SQLite + R-tree)
+# --------------------------------------------------
+class ResultsStore:
+    """
+    Persistent per-cell grid outputs by city and run date.
+
+    One row per (run, cell) in `cells`; an R-tree over (lon, lat, day)
+    answers bounding-box + date-range queries, and (run_id, column)
+    indexes answer top-k and risk-class queries without scanning runs.
+    Connections are per thread, so the store can be shared by API workers.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-65536")
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._connect(), params=params)
+
+    # --------------------------------------------------
+    # WRITES
+    # --------------------------------------------------
+    def insert_run(self, df, city, run_date):
+        """
+        Store a scored grid as the run for city/run_date (YYYY-MM-DD),
+        replacing any earlier run for the same day. Returns the run_id.
+        """
+
+        # Plain Python values column by column; NaN is stored as NULL
+        columns = [df[c].tolist() if c in df else [None] * len(df) for c in CELL_COLUMNS]
+        day = _day(run_date)
+
+        connection = self._connect()
+        with connection:
+            self._begin_write(connection)
+            self._delete_run(connection, city, run_date)
+            run_id = connection.execute(
+                "INSERT INTO runs (city, run_date, day, updated) VALUES (?, ?, ?, ?)",
+                (city, run_date, day, time.time_ns()),
+            ).lastrowid
+
+            # Contiguous ids for this run so the R-tree rows can be bulk-inserted
+            first = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM cells").fetchone()[0]
+            ids = range(first, first + len(df))
+
+            connection.executemany(
+                f"INSERT INTO cells (id, run_id, {', '.join(CELL_COLUMNS)}) "
+                f"VALUES ({', '.join(['?'] * (len(CELL_COLUMNS) + 2))})",
+                ((i, run_id, *row) for i, row in zip(ids, zip(*columns))),
+            )
+            connection.executemany(
+                "INSERT INTO cells_rtree VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (i, lon, lon, lat, lat, day, day)
+                    for i, lon, lat in zip(ids, df["longitude"].tolist(), df["latitude"].tolist())
+                ),
+            )
+
+        return run_id
+
+    @staticmethod
+    def _begin_write(connection):
+        # Take the write lock before looking up the day's run, so concurrent
+        # writers for the same city/day run one after the other instead of
+        # both seeing no run and colliding on UNIQUE (city, run_date)
+        connection.execute("BEGIN IMMEDIATE")
+
+    @staticmethod
+    def _delete_run(connection, city, run_date):
+        row = connection.execute(
+            "SELECT run_id FROM runs WHERE city = ? AND run_date = ?", (city, run_date)
+        ).fetchone()
+        if row is None:
+            return
+
+        connection.execute(
+            "DELETE FROM cells_rtree WHERE id IN (SELECT id FROM cells WHERE run_id = ?)", row
+        )
+        connection.execute("DELETE FROM cells WHERE run_id = ?", row)
+        connection.execute("DELETE FROM runs WHERE run_id = ?", row)
+
+    def delete_run(self, city, run_date):
+        connection = self._connect()
+        with connection:
+            self._begin_write(connection)
+            self._delete_run(connection, city, run_date)
+
+    # --------------------------------------------------
+    # RUNS
+    # --------------------------------------------------
+    def version(self):
+        """
+        Changes whenever a run is inserted or deleted (for response caching).
+        """
+        return self._connect().execute("SELECT COUNT(*), MAX(updated) FROM runs").fetchone()
+
+    def runs(self, city=None, start=None, end=None):
+        """
+        Stored runs, optionally for one city and a run_date range (inclusive).
+        """
+
+        where, params = self._run_filter(city, start, end)
+        return self._query(
+            f"SELECT run_id, city, run_date FROM runs WHERE {where} ORDER BY city, run_date", params
+        )
+
+    @staticmethod
+    def _run_filter(city, start, end):
+        clauses, params = ["1"], []
+        if city:
+            clauses.append("runs.city = ?")
+            params.append(city)
+        # Dates are compared as text, so only canonical ones are accepted
+        if start:
+            _day(start)
+            clauses.append("runs.run_date >= ?")
+            params.append(start)
+        if end:
+            _day(end)
+            clauses.append("runs.run_date <= ?")
+            params.append(end)
+        return " AND ".join(clauses), params
+
+    def load_run(self, city, run_date=None):
+        """
+        Cells of the latest run on or before run_date (or overall).
+        """
+
+        run = self._latest_runs(city, 1, run_date)
+        if not run:
+            return pd.DataFrame(columns=CELL_COLUMNS)
+        return self._query(
+            f"SELECT {', '.join(CELL_COLUMNS)} FROM cells WHERE run_id = ? ORDER BY cell_id", run
+        )
+
+    def _latest_runs(self, city, n, end=None):
+        where, params = self._run_filter(city, None, end)
+        rows = self._connect().execute(
+            f"SELECT run_id FROM runs WHERE {where} ORDER BY run_date DESC LIMIT ?", (*params, n)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    # --------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------
+    def query_bbox(self, bounds, city=None, start=None, end=None, columns=CELL_COLUMNS):
+        """
+        Cells with centres inside bounds = (min_lon, min_lat, max_lon, max_lat)
+        for runs between start and end, via the R-tree.
+        """
+
+        min_lon, min_lat, max_lon, max_lat = bounds
+        min_day = _day(start) if start else -1
+        max_day = _day(end) if end else 10 ** 7
+        where, params = self._run_filter(city, start, end)
+
+        # R-tree coordinates are float32 and rounded outwards, so a point on
+        # the edge of the box may be stored just outside it: candidates are
+        # boxes overlapping the query, and the exact centre test on `cells`
+        # drops the few extra ones
+        return self._query(
+            f"""
+            SELECT runs.city, runs.run_date, {', '.join(f'cells.{c}' for c in columns)}
+            FROM cells_rtree r
+            JOIN cells ON cells.id = r.id
+            JOIN runs ON runs.run_id = cells.run_id
+            WHERE r.max_lon >= ? AND r.min_lon <= ? AND r.max_lat >= ? AND r.min_lat <= ?
+              AND r.max_day >= ? AND r.min_day <= ?
+              AND cells.longitude BETWEEN ? AND ? AND cells.latitude BETWEEN ? AND ?
+              AND {where}
+            ORDER BY runs.run_date, cells.cell_id
+            """,
+            (min_lon, max_lon, min_lat, max_lat, min_day, max_day,
+             min_lon, max_lon, min_lat, max_lat, *params),
+        )
+
+    def top_k(self, city, column="ST_B10", k=100, start=None, end=None, ascending=False):
+        """
+        k distinct cells with the highest (or lowest) value of `column`
+        over runs between start and end, each with the run it peaked in.
+        """
+
+        if column not in RANKED_COLUMNS:
+            raise ValueError(f"Top-k is indexed only for {RANKED_COLUMNS}")
+
+        where, params = self._run_filter(city, start, end)
+        run_ids = [row[0] for row in self._connect().execute(
+            f"SELECT run_id FROM runs WHERE {where}", params
+        )]
+        if not run_ids:
+            return pd.DataFrame(columns=["city", "run_date"] + CELL_COLUMNS)
+
+        # A cell in the overall top k is always within the top k of the run
+        # it peaks in, so k rows per run (each an index range scan) suffice
+        order = "ASC" if ascending else "DESC"
+        candidates = pd.concat(
+            [
+                self._query(
+                    f"""
+                    SELECT runs.city, runs.run_date, {', '.join(f'cells.{c}' for c in CELL_COLUMNS)}
+                    FROM cells JOIN runs ON runs.run_id = cells.run_id
+                    WHERE cells.run_id = ? AND cells.{column} IS NOT NULL
+                    ORDER BY cells.{column} {order} LIMIT ?
+                    """,
+                    (run_id, k),
+                )
+                for run_id in run_ids
+            ],
+            ignore_index=True,
+        )
+
+        return (
+            candidates.sort_values(column, ascending=ascending, kind="stable")
+            .drop_duplicates("cell_id")
+            .head(k)
+            .reset_index(drop=True)
+        )
+
+    def persistent_cells(self, city, level="High", runs=3, column="risk_level", end=None):
+        """
+        Cells classed `level` in each of the last `runs` consecutive runs
+        (up to and including `end`).
+        """
+
+        if column not in LEVEL_COLUMNS:
+            raise ValueError(f"Persistence is indexed only for {LEVEL_COLUMNS}")
+
+        run_ids = self._latest_runs(city, runs, end)
+        if len(run_ids) < runs:
+            return pd.DataFrame(columns=["cell_id", "longitude", "latitude", "runs"])
+
+        placeholders = ", ".join(["?"] * runs)
+        return self._query(
+            f"""
+            SELECT cell_id, AVG(longitude) AS longitude, AVG(latitude) AS latitude, COUNT(*) AS runs
+            FROM cells
+            WHERE run_id IN ({placeholders}) AND {column} = ?
+            GROUP BY cell_id
+            HAVING COUNT(*) = ?
+            ORDER BY cell_id
+            """,
+            (*run_ids, level, runs),
+        )
+
+    def cell_history(self, city, cell_id, start=None, end=None):
+        """
+        One cell's values across runs, oldest first.
+        """
+
+        where, params = self._run_filter(city, start, end)
+        return self._query(
+            f"""
+            SELECT runs.run_date, {', '.join(f'cells.{c}' for c in CELL_COLUMNS)}
+            FROM cells JOIN runs ON runs.run_id = cells.run_id
+            WHERE cells.cell_id = ? AND {where}
+            ORDER BY runs.run_date
+            """,
+            (int(cell_id), *params),
+        )
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store():
+    """
+    Process-wide results store.
+    """
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ResultsStore()
+    return _STORE
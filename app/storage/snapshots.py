@@ -0,0 +1,125 @@
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from config.settings import RESULTS_DIR
+
+SNAPSHOT_ROOT = os.path.join(os.path.dirname(__file__), "..", RESULTS_DIR)
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+_LOADED = OrderedDict()
+_LOADED_SIZE = 16
+_LOADED_LOCK = threading.Lock()
+
+
+# --------------------------------------------------
+# GRID SNAPSHOTS (one parquet file per city and run date)
+# --------------------------------------------------
+def _city_folder(city):
+    """
+    Snapshot folder of a city; raises ValueError for names that would
+    resolve outside SNAPSHOT_ROOT (separators, "..", absolute paths).
+    """
+
+    root = os.path.realpath(SNAPSHOT_ROOT)
+    folder = os.path.realpath(os.path.join(root, city))
+    if os.path.dirname(folder) != root:
+        raise ValueError(f"Invalid city name: {city!r}")
+    return folder
+
+
+def _snapshot_path(city, date):
+    if not DATE_PATTERN.fullmatch(str(date)):
+        raise ValueError(f"Invalid snapshot date: {date!r} (expected YYYY-MM-DD)")
+    return os.path.join(_city_folder(city), f"{date}.parquet")
+
+
+def save_snapshot(df, city, date=None):
+    """
+    Persist a scored grid for city/date (YYYY-MM-DD, default today UTC).
+    The file is replaced atomically so readers never see partial writes.
+    """
+
+    date = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    path = _snapshot_path(city, date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Unique scratch name, so concurrent saves of the same snapshot never
+    # write into each other's file
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    return path
+
+
+def snapshot_dates(city):
+    folder = _city_folder(city)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name[:-len(".parquet")] for name in os.listdir(folder) if name.endswith(".parquet"))
+
+
+def snapshot_cities():
+    if not os.path.isdir(SNAPSHOT_ROOT):
+        return []
+    return sorted(name for name in os.listdir(SNAPSHOT_ROOT) if snapshot_dates(name))
+
+
+def snapshot_version(city, date):
+    """
+    Modification time of a snapshot, or None when it does not exist.
+    """
+    try:
+        return os.stat(_snapshot_path(city, date)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_path(city, date=None):
+    """
+    Parquet file of a snapshot (latest when date is None), or None.
+    """
+    date = date or (snapshot_dates(city) or [None])[-1]
+    return _snapshot_path(city, date) if date and snapshot_version(city, date) else None
+
+
+def load_snapshot(city, date=None):
+    """
+    Scored grid for city/date (latest when date is None), or None.
+    Recently loaded snapshots are kept in memory until the file changes.
+    """
+
+    date = date or (snapshot_dates(city) or [None])[-1]
+    version = snapshot_version(city, date) if date else None
+    if version is None:
+        return None
+
+    key = (city, date)
+    with _LOADED_LOCK:
+        cached = _LOADED.get(key)
+        if cached is not None and cached[0] == version:
+            _LOADED.move_to_end(key)
+            return cached[1]
+
+    df = pd.read_parquet(_snapshot_path(city, date))
+    df.attrs.update({"city": city, "date": date})
+
+    with _LOADED_LOCK:
+        _LOADED[key] = (version, df)
+        _LOADED.move_to_end(key)
+        while len(_LOADED) > _LOADED_SIZE:
+            _LOADED.popitem(last=False)
+
+    return df
@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage.results_store import ResultsStore
+
+
+def _grid(lons, lats, temps, levels=None):
+    return pd.DataFrame({
+        "cell_id": np.arange(len(lons)),
+        "longitude": lons,
+        "latitude": lats,
+        "ST_B10": temps,
+        "risk_level": levels or ["Low"] * len(lons),
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "results.db"))
+
+
+def test_bbox_keeps_cells_on_the_edge(store):
+    # Not representable in float32: the R-tree rounds these boxes outwards
+    lons = [73.1, 73.3, 73.7, 74.1]
+    lats = [18.1, 18.3, 18.7, 19.1]
+    store.insert_run(_grid(lons, lats, [30.0, 31.0, 32.0, 33.0]), "Pune", "2024-05-01")
+
+    cells = store.query_bbox((73.1, 18.1, 73.7, 18.7))
+    assert cells["cell_id"].tolist() == [0, 1, 2]
+
+    cells = store.query_bbox((73.3, 18.3, 73.3, 18.3))
+    assert cells["cell_id"].tolist() == [1]
+
+
+def test_bbox_filters_by_city_and_date(store):
+    grid = _grid([73.5], [18.5], [30.0])
+    store.insert_run(grid, "Pune", "2024-05-01")
+    store.insert_run(grid, "Pune", "2024-05-02")
+    store.insert_run(grid, "Mumbai", "2024-05-02")
+
+    bounds = (73.0, 18.0, 74.0, 19.0)
+    assert len(store.query_bbox(bounds)) == 3
+    assert store.query_bbox(bounds, "Pune", "2024-05-02", "2024-05-02")["run_date"].tolist() == ["2024-05-02"]
+    assert store.query_bbox(bounds, start="2024-05-03").empty
+
+
+def test_malformed_dates_raise_value_error(store):
+    grid = _grid([73.5], [18.5], [30.0])
+    with pytest.raises(ValueError, match="YYYY-MM-DD"):
+        store.insert_run(grid, "Pune", "May 1st")
+    with pytest.raises(ValueError, match="YYYY-MM-DD"):
+        store.query_bbox((73.0, 18.0, 74.0, 19.0), start="2024-5-1")
+    with pytest.raises(ValueError, match="YYYY-MM-DD"):
+        store.runs(end="2024-02-30")
+
+
+def test_top_k_distinct_cells_across_runs(store):
+    lons, lats = [73.1, 73.2, 73.3], [18.1, 18.2, 18.3]
+    store.insert_run(_grid(lons, lats, [30.0, 45.0, 35.0]), "Pune", "2024-05-01")
+    store.insert_run(_grid(lons, lats, [44.0, 31.0, 36.0]), "Pune", "2024-05-02")
+
+    top = store.top_k("Pune", "ST_B10", k=2)
+    assert top["cell_id"].tolist() == [1, 0]
+    assert top["run_date"].tolist() == ["2024-05-01", "2024-05-02"]
+
+    bottom = store.top_k("Pune", "ST_B10", k=1, ascending=True)
+    assert bottom["cell_id"].tolist() == [0]
+
+    with pytest.raises(ValueError):
+        store.top_k("Pune", "risk_level")
+
+
+def test_rerun_replaces_the_day_and_persistence(store):
+    lons, lats = [73.1, 73.2], [18.1, 18.2]
+    for day in ["2024-05-01", "2024-05-02", "2024-05-03"]:
+        store.insert_run(_grid(lons, lats, [30.0, 40.0], ["Low", "High"]), "Pune", day)
+    store.insert_run(_grid(lons, lats, [30.0, 40.0], ["High", "High"]), "Pune", "2024-05-03")
+
+    assert len(store.runs("Pune")) == 3
+    assert len(store.query_bbox((73.0, 18.0, 74.0, 19.0), "Pune", "2024-05-03")) == 2
+    assert store.persistent_cells("Pune", "High", runs=3)["cell_id"].tolist() == [1]
+    assert store.persistent_cells("Pune", "High", runs=1)["cell_id"].tolist() == [0, 1]
+
+
+def test_concurrent_inserts_of_the_same_day(store, monkeypatch):
+    # Both writers look up the day's run before either inserts, unless the
+    # lookup already holds the write lock (then the barrier just times out)
+    barrier = threading.Barrier(2, timeout=1)
+    delete_run = ResultsStore._delete_run
+
+    def racing_delete_run(connection, city, run_date):
+        delete_run(connection, city, run_date)
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+
+    monkeypatch.setattr(ResultsStore, "_delete_run", staticmethod(racing_delete_run))
+    grids = [_grid([73.5, 73.6], [18.5, 18.6], [30.0 + i, 31.0 + i]) for i in range(2)]
+
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(lambda grid: store.insert_run(grid, "Pune", "2024-05-01"), grids))
+
+    assert len(store.runs("Pune")) == 1
+    assert len(store.query_bbox((73.0, 18.0, 74.0, 19.0))) == 2
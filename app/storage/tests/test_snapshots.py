@@ -0,0 +1,46 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from storage import snapshots
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_ROOT", str(tmp_path / "results"))
+    return tmp_path
+
+
+def test_save_and_load_latest(root):
+    df = pd.DataFrame({"cell_id": [1, 2], "ST_B10": [30.0, 31.0]})
+    snapshots.save_snapshot(df, "Pune", "2024-05-01")
+    snapshots.save_snapshot(df.assign(ST_B10=[40.0, 41.0]), "Pune", "2024-05-02")
+
+    assert snapshots.snapshot_dates("Pune") == ["2024-05-01", "2024-05-02"]
+    assert snapshots.snapshot_cities() == ["Pune"]
+    assert snapshots.load_snapshot("Pune")["ST_B10"].tolist() == [40.0, 41.0]
+    assert snapshots.load_snapshot("Pune", "2024-04-30") is None
+
+
+@pytest.mark.parametrize("city", ["..", "../etc", "a/b", "/tmp", ""])
+def test_city_outside_root_is_rejected(root, city):
+    with pytest.raises(ValueError):
+        snapshots.snapshot_version(city, "2024-05-01")
+
+
+@pytest.mark.parametrize("date", ["../../secret", "2024-5-1", "2024-05-01/x", "2024-05-01\n"])
+def test_malformed_date_is_rejected(root, date):
+    with pytest.raises(ValueError):
+        snapshots.snapshot_version("Pune", date)
+
+
+def test_concurrent_saves_do_not_collide(root):
+    frames = [pd.DataFrame({"cell_id": range(2000), "ST_B10": float(i)}) for i in range(8)]
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda df: snapshots.save_snapshot(df, "Pune", "2024-05-01"), frames))
+
+    assert os.listdir(root / "results" / "Pune") == ["2024-05-01.parquet"]
+    assert snapshots.load_snapshot("Pune")["ST_B10"].nunique() == 1
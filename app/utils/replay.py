@@ -0,0 +1,488 @@
+"""
+Record / replay of outbound HTTP calls at the transport level.
+
+    UHI_REPLAY=record  streamlit run app/main.py   # capture live responses
+    UHI_REPLAY=replay  streamlit run app/main.py   # serve them offline
+
+Covered transports: requests.Session.send (AQICN, Nominatim via geopy,
+Google auth), httplib2.Http.request (Earth Engine API client) and
+httpx.Client.send (OpenAI). Response bodies are stored gzip-compressed
+under their SHA-256, so identical responses are kept once; index.jsonl
+maps request keys to responses in recorded order.
+
+Request keys leave out what changes from run to run without changing the
+answer: credentials in the query string and the bodies of OAuth token
+requests (signed JWTs). Requests built from "now" (holding today's date,
+e.g. the last N days of scenes) are keyed by their dates' day offsets from
+today, so a recording keeps replaying on later days while windows of other
+lengths or positions keep their own keys; other dates are kept as they
+are. Token values and credential headers are redacted before writing.
+
+UHI_REPLAY_DIR overrides the archive directory and UHI_REPLAY_LATENCY
+injects latency on replay: a number of seconds per call, or "recorded"
+to reproduce the recorded response times.
+
+    python -m utils.replay stats [archive_dir]   # recorded cost per host
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import date as Date, datetime, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import pandas as pd
+
+from config.settings import (
+    REPLAY_DIR,
+    REPLAY_IGNORED_PARAMS,
+    REPLAY_TOKEN_URLS,
+    REPLAY_REDACTED_FIELDS,
+    REPLAY_REDACTED_HEADERS,
+)
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), "..", REPLAY_DIR)
+
+# Response headers that no longer apply to the stored (decoded) body
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "set-cookie"}
+
+# YYYY-MM-DD, optionally with a time of day and zone (2024-05-01T06:30:00.000Z)
+_DATE_LITERAL = re.compile(rb"(\d{4}-\d{2}-\d{2})(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?")
+
+REDACTED = "REDACTED"
+
+
+class ReplayMissError(RuntimeError):
+    """
+    A request that was never recorded was made in replay mode.
+    """
+
+
+# --------------------------------------------------
+# REQUEST KEYS
+# --------------------------------------------------
+def _clean_url(url):
+    """
+    URL without credentials in the query string, parameters sorted.
+    """
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in REPLAY_IGNORED_PARAMS
+    )
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _as_bytes(body):
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode()
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return bytes(body)
+    # Generators / file-like bodies cannot be keyed without consuming them
+    return repr(type(body)).encode()
+
+
+def is_token_request(url):
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}" in REPLAY_TOKEN_URLS
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def _literal_day(match):
+    try:
+        return Date.fromisoformat(match.group(1).decode())
+    except ValueError:
+        return None
+
+
+def _relative_dates(data, today):
+    """
+    Date literals as day offsets from today (<today-90>); the time of day
+    is dropped, as it is "now" too.
+    """
+
+    def offset(match):
+        day = _literal_day(match)
+        return match.group(0) if day is None else b"<today%+d>" % (day - today).days
+
+    return _DATE_LITERAL.sub(offset, data)
+
+
+def request_key(method, url, body=None):
+    """
+    Archive key of a request: method, cleaned URL and body; token requests
+    are keyed without their body. Requests holding today's date are keyed
+    with their dates relative to today.
+    """
+
+    head = f"{method.upper()} {_clean_url(url)}\n".encode()
+    body = b"" if is_token_request(url) else _as_bytes(body)
+
+    today = _today()
+    if any(_literal_day(match) == today for match in _DATE_LITERAL.finditer(head + body)):
+        head, body = _relative_dates(head, today), _relative_dates(body, today)
+
+    digest = hashlib.sha256(head)
+    digest.update(body)
+    return digest.hexdigest()
+
+
+# --------------------------------------------------
+# REDACTION
+# --------------------------------------------------
+def _redact_token_body(content):
+    """
+    Token response with its secrets replaced (JSON, else field=value pairs).
+    """
+
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        payload = None
+
+    if isinstance(payload, dict):
+        return json.dumps({
+            k: REDACTED if k in REPLAY_REDACTED_FIELDS else v for k, v in payload.items()
+        }).encode()
+
+    fields = "|".join(re.escape(field) for field in sorted(REPLAY_REDACTED_FIELDS))
+    return re.sub(rf"\b({fields})=[^&\s]*".encode(), rf"\1={REDACTED}".encode(), content)
+
+
+def _stored_headers(headers):
+    return {
+        k: REDACTED if k.lower() in REPLAY_REDACTED_HEADERS else v
+        for k, v in headers.items()
+        if k.lower() not in _DROPPED_HEADERS
+    }
+
+
+# --------------------------------------------------
+# CONTENT-ADDRESSED ARCHIVE
+# --------------------------------------------------
+class ReplayArchive:
+    """
+    blobs/<sha[:2]>/<sha>.gz response bodies plus an append-only index.jsonl.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+
+    def _blob_path(self, sha):
+        return os.path.join(self.directory, "blobs", sha[:2], f"{sha}.gz")
+
+    def put_blob(self, content):
+        sha = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return sha
+
+    def get_blob(self, sha):
+        with gzip.open(self._blob_path(sha), "rb") as f:
+            return f.read()
+
+    def append(self, entry):
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def responses(self, key):
+        return self._entries.get(key, [])
+
+    def entries(self):
+        return [entry for entries in self._entries.values() for entry in entries]
+
+
+# --------------------------------------------------
+# RECORDER / REPLAYER
+# --------------------------------------------------
+class HttpReplay:
+    """
+    Patches the HTTP transports to record to, or replay from, an archive,
+    and keeps per-host call statistics in both modes.
+
+    Repeated identical requests are answered with their recorded responses
+    in order (the last one repeats), so replays are deterministic.
+    """
+
+    def __init__(self, mode, archive=None, latency=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay mode: {mode}")
+
+        self.mode = mode
+        self.archive = archive or ReplayArchive()
+        self.latency = latency
+        self._cursors = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._patches = []
+
+    # --------------------------------------------------
+    # CORE
+    # --------------------------------------------------
+    def _count(self, host, seconds, size, miss=False):
+        with self._lock:
+            stats = self._stats.setdefault(host, {"calls": 0, "seconds": 0.0, "bytes": 0, "misses": 0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["bytes"] += size
+            stats["misses"] += miss
+
+    def _record(self, method, url, body, send):
+        """
+        Perform the live call; send() returns (status, headers, content, reply).
+        """
+
+        started = time.perf_counter()
+        status, headers, content, reply = send()
+        elapsed = time.perf_counter() - started
+
+        # The caller gets the live reply; only the archived copy is redacted
+        stored = _redact_token_body(content) if is_token_request(url) else content
+
+        self.archive.append({
+            "key": request_key(method, url, body),
+            "method": method.upper(),
+            "url": _clean_url(url),
+            "host": urlsplit(url).netloc,
+            "status": status,
+            "headers": _stored_headers(headers),
+            "body": self.archive.put_blob(stored),
+            "size": len(stored),
+            "elapsed": elapsed,
+        })
+        self._count(urlsplit(url).netloc, elapsed, len(content))
+        return reply
+
+    def _replay(self, method, url, body):
+        """
+        Recorded (status, headers, content) for a request.
+        """
+
+        started = time.perf_counter()
+        key = request_key(method, url, body)
+        host = urlsplit(url).netloc
+
+        responses = self.archive.responses(key)
+        if not responses:
+            self._count(host, 0.0, 0, miss=True)
+            raise ReplayMissError(f"No recorded response for {method.upper()} {_clean_url(url)}")
+
+        with self._lock:
+            position = self._cursors.get(key, 0)
+            self._cursors[key] = position + 1
+        entry = responses[min(position, len(responses) - 1)]
+
+        content = self.archive.get_blob(entry["body"])
+
+        if self.latency == "recorded":
+            time.sleep(entry["elapsed"])
+        elif self.latency:
+            time.sleep(float(self.latency))
+
+        self._count(host, time.perf_counter() - started, len(content))
+        return entry["status"], entry["headers"], content
+
+    def call_stats(self):
+        """
+        Calls, total / mean seconds and bytes per host in this process.
+        """
+        with self._lock:
+            stats = pd.DataFrame.from_dict(self._stats, orient="index")
+        if stats.empty:
+            return stats
+        stats["mean_seconds"] = stats["seconds"] / stats["calls"]
+        return stats.sort_values("seconds", ascending=False)
+
+    # --------------------------------------------------
+    # TRANSPORT PATCHES
+    # --------------------------------------------------
+    def _patch(self, owner, name, wrapper):
+        original = getattr(owner, name)
+        setattr(owner, name, wrapper(original))
+        self._patches.append((owner, name, original))
+
+    def _patch_requests(self):
+        try:
+            import requests
+            from requests.structures import CaseInsensitiveDict
+            from requests.utils import get_encoding_from_headers
+        except ImportError:
+            return
+
+        replay = self
+
+        def wrapper(original):
+            def send(session, request, **kwargs):
+                if replay.mode == "record":
+                    def live():
+                        response = original(session, request, **kwargs)
+                        return response.status_code, dict(response.headers), response.content, response
+                    return replay._record(request.method, request.url, request.body, live)
+
+                status, headers, content = replay._replay(request.method, request.url, request.body)
+                response = requests.Response()
+                response.status_code = status
+                response.headers = CaseInsensitiveDict(headers)
+                response._content = content
+                # Already read, so iter_content / iter_lines serve _content;
+                # raw is there for code that reads the stream directly
+                response._content_consumed = True
+                response.raw = io.BytesIO(content)
+                response.encoding = get_encoding_from_headers(response.headers)
+                response.url = request.url
+                response.request = request
+                response.reason = "Replayed"
+                return response
+            return send
+
+        self._patch(requests.Session, "send", wrapper)
+
+    def _patch_httplib2(self):
+        try:
+            import httplib2
+        except ImportError:
+            return
+
+        replay = self
+
+        def wrapper(original):
+            def request(http, uri, method="GET", body=None, headers=None, *args, **kwargs):
+                if replay.mode == "record":
+                    def live():
+                        response, content = original(http, uri, method, body, headers, *args, **kwargs)
+                        return response.status, dict(response), content, (response, content)
+                    return replay._record(method, uri, body, live)
+
+                status, headers, content = replay._replay(method, uri, body)
+                return httplib2.Response({**headers, "status": str(status)}), content
+            return request
+
+        self._patch(httplib2.Http, "request", wrapper)
+
+    def _patch_httpx(self):
+        try:
+            import httpx
+        except ImportError:
+            return
+
+        replay = self
+
+        def wrapper(original):
+            def send(client, request, *args, **kwargs):
+                body = request.read()
+
+                if replay.mode == "record":
+                    def live():
+                        response = original(client, request, *args, **kwargs)
+                        content = response.read()
+                        return response.status_code, dict(response.headers), content, response
+                    return replay._record(request.method, str(request.url), body, live)
+
+                status, headers, content = replay._replay(request.method, str(request.url), body)
+                return httpx.Response(status, headers=headers, content=content, request=request)
+            return send
+
+        self._patch(httpx.Client, "send", wrapper)
+
+    def install(self):
+        self._patch_requests()
+        self._patch_httplib2()
+        self._patch_httpx()
+        return self
+
+    def uninstall(self):
+        while self._patches:
+            owner, name, original = self._patches.pop()
+            setattr(owner, name, original)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+
+# --------------------------------------------------
+# ACTIVATION
+# --------------------------------------------------
+_ACTIVE = None
+_ACTIVE_LOCK = threading.Lock()
+
+
+def install_from_env(environ=os.environ):
+    """
+    Install record/replay once per process when UHI_REPLAY is set;
+    returns the active HttpReplay or None.
+    """
+    global _ACTIVE
+
+    mode = environ.get("UHI_REPLAY")
+    if not mode:
+        return None
+
+    with _ACTIVE_LOCK:
+        if _ACTIVE is None:
+            latency = environ.get("UHI_REPLAY_LATENCY")
+            if latency and latency != "recorded":
+                latency = float(latency)
+            archive = ReplayArchive(environ.get("UHI_REPLAY_DIR", ARCHIVE_DIR))
+            _ACTIVE = HttpReplay(mode, archive, latency).install()
+    return _ACTIVE
+
+
+def recorded_stats(archive):
+    """
+    Recorded cost per host: calls, unique bodies, bytes and response times.
+    """
+
+    entries = pd.DataFrame(archive.entries())
+    if entries.empty:
+        return entries
+
+    stats = entries.groupby("host").agg(
+        calls=("key", "size"),
+        unique_requests=("key", "nunique"),
+        unique_bodies=("body", "nunique"),
+        bytes=("size", "sum"),
+        seconds=("elapsed", "sum"),
+        mean_seconds=("elapsed", "mean"),
+        p95_seconds=("elapsed", lambda s: s.quantile(0.95)),
+    )
+    return stats.sort_values("seconds", ascending=False)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "stats":
+        print(__doc__)
+        sys.exit(1)
+
+    directory = sys.argv[2] if len(sys.argv) > 2 else ARCHIVE_DIR
+    print(recorded_stats(ReplayArchive(directory)).to_string())
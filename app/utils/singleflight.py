@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+
+import pandas as pd
+
+from config.settings import SHARED_RESULT_SIZE, SHARED_RESULT_TTL
+
+
+# --------------------------------------------------
+# SINGLE-FLIGHT WITH SHARED RESULTS
+# --------------------------------------------------
+class SingleFlight:
+    """
+    Process-wide request coalescing for Streamlit sessions (which are
+    threads of one process).
+
+    The first caller for a key runs the computation; concurrent callers
+    with the same key wait on its Future instead of starting their own.
+    Results other than None are kept for `ttl` seconds in a bounded LRU
+    and handed to every later caller; failures are raised to all waiters
+    and never cached. When the leader is interrupted instead (a Streamlit
+    rerun or stop of its own session), the waiters retry and one of them
+    takes over the computation.
+    """
+
+    def __init__(self, size=SHARED_RESULT_SIZE, ttl=SHARED_RESULT_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._inflight = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "hits": 0}
+
+    def do(self, key, fn, *args, ttl=None, **kwargs):
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            self.stats["calls"] += 1
+
+        while True:
+            with self._lock:
+                cached = self._results.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    self._results.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return cached[1]
+
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = Future()
+                    self.stats["executions"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+
+            if leader:
+                break
+            try:
+                return future.result()
+            except CancelledError:
+                continue
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Control flow of the leader's session, not a failure of the work:
+            # it must not be raised in other sessions, so they retry instead
+            with self._lock:
+                del self._inflight[key]
+            future.cancel()
+            raise
+
+        with self._lock:
+            if ttl > 0 and result is not None:
+                self._results[key] = (time.monotonic() + ttl, result)
+                self._results.move_to_end(key)
+                while len(self._results) > self.size:
+                    self._results.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(result)
+
+        return result
+
+
+_FLIGHTS = SingleFlight()
+
+
+def single_flight(key, fn, *args, ttl=None, **kwargs):
+    """
+    fn(*args, **kwargs) computed once per key across all sessions.
+    """
+    return _FLIGHTS.do(key, fn, *args, ttl=ttl, **kwargs)
+
+
+# --------------------------------------------------
+# SHARED READ-ONLY FRAMES
+# --------------------------------------------------
+_COW_LOCK = threading.Lock()
+_COW_ENABLED = False
+
+
+def enable_copy_on_write():
+    """
+    Turn on pandas copy-on-write (always on from pandas 3), so shallow
+    copies of a shared frame never write through to it. The option is
+    process-wide; it is set once, by the app at startup.
+    """
+    global _COW_ENABLED
+    with _COW_LOCK:
+        if not _COW_ENABLED and int(pd.__version__.split(".")[0]) < 3:
+            pd.set_option("mode.copy_on_write", True)
+        _COW_ENABLED = True
+
+
+def shared_view(df):
+    """
+    Per-session handle on a shared DataFrame without copying its data.
+    Under copy-on-write the column buffers stay shared until a session
+    modifies a column, and only that column is copied.
+    """
+    return df.copy(deep=False)
@@ -0,0 +1,178 @@
+import gzip
+import json
+import os
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from utils import replay
+from utils.replay import HttpReplay, ReplayArchive, ReplayMissError, request_key
+
+SECRET = "ya29.live-access-token"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._reply(b"")
+
+    def do_POST(self):
+        self._reply(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+    def _reply(self, body):
+        self.server.calls += 1
+        if self.path.startswith("/token"):
+            content = json.dumps({"access_token": SECRET, "expires_in": 3600, "token_type": "Bearer"}).encode()
+        else:
+            payload = {"path": self.path, "body": body.decode(), "call": self.server.calls}
+            content = (json.dumps(payload) + "\nline two\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-Goog-Api-Key", "live-key")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def live(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    server.calls = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(replay, "REPLAY_TOKEN_URLS", {f"127.0.0.1:{server.server_port}/token"})
+    yield base, server
+    server.shutdown()
+    server.server_close()
+
+
+def _token_body(issued):
+    return f"grant_type=jwt-bearer&assertion=header.{{\"iat\": {issued}, \"exp\": {issued + 3600}}}.sig"
+
+
+def _round_trip(tmp_path, live, monkeypatch, call):
+    """
+    Record call(base, day, issued) against the live server on one day, stop
+    it, then replay on the next day (with that day's date in the request)
+    and a fresh token assertion.
+    """
+
+    base, server = live
+    monkeypatch.setattr(replay, "_today", lambda: date(2024, 5, 1))
+    with HttpReplay("record", ReplayArchive(str(tmp_path))):
+        recorded = call(base, "2024-05-01", 1714521600)
+    server.shutdown()
+
+    monkeypatch.setattr(replay, "_today", lambda: date(2024, 5, 2))
+    with HttpReplay("replay", ReplayArchive(str(tmp_path))) as replayer:
+        replayed = call(base, "2024-05-02", 1714608000)
+    return recorded, replayed, replayer
+
+
+def _archived_text(directory):
+    parts = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            opener = gzip.open if name.endswith(".gz") else open
+            with opener(path, "rb") as f:
+                parts.append(f.read().decode())
+    return "\n".join(parts)
+
+
+def _check(tmp_path, recorded, replayed, replayer):
+    (data, token), (replayed_data, replayed_token) = recorded, replayed
+
+    assert replayed_data == data
+    assert json.loads(token)["access_token"] == SECRET
+    assert json.loads(replayed_token)["access_token"] == replay.REDACTED
+
+    archived = _archived_text(tmp_path)
+    assert SECRET not in archived and "live-key" not in archived
+    for entry in replayer.archive.entries():
+        assert entry["size"] == len(replayer.archive.get_blob(entry["body"]))
+    assert replayer.call_stats()["misses"].sum() == 0
+
+
+def test_requests_round_trip(tmp_path, live, monkeypatch):
+    requests = pytest.importorskip("requests")
+
+    def call(base, day, issued):
+        data = requests.post(f"{base}/data?start={day}", data=json.dumps({"end": day}))
+        token = requests.post(f"{base}/token", data=_token_body(issued))
+        # Streaming helpers must work on replayed responses too
+        assert list(data.iter_lines())[1] == b"line two"
+        assert b"".join(data.iter_content(7)) == data.content
+        return data.text, token.text
+
+    recorded, replayed, replayer = _round_trip(tmp_path, live, monkeypatch, call)
+    _check(tmp_path, recorded, replayed, replayer)
+
+
+def test_httplib2_round_trip(tmp_path, live, monkeypatch):
+    httplib2 = pytest.importorskip("httplib2")
+
+    def call(base, day, issued):
+        http = httplib2.Http()
+        _, data = http.request(f"{base}/data?start={day}", "POST", body=json.dumps({"end": day}))
+        _, token = http.request(f"{base}/token", "POST", body=_token_body(issued))
+        return data.decode(), token.decode()
+
+    recorded, replayed, replayer = _round_trip(tmp_path, live, monkeypatch, call)
+    _check(tmp_path, recorded, replayed, replayer)
+
+
+def test_httpx_round_trip(tmp_path, live, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+
+    def call(base, day, issued):
+        with httpx.Client() as client:
+            data = client.post(f"{base}/data?start={day}", content=json.dumps({"end": day}))
+            token = client.post(f"{base}/token", content=_token_body(issued))
+        return data.text, token.text
+
+    recorded, replayed, replayer = _round_trip(tmp_path, live, monkeypatch, call)
+    _check(tmp_path, recorded, replayed, replayer)
+
+
+def test_request_keys():
+    assert request_key("get", "http://h/a?b=1&token=x") == request_key("GET", "http://h/a?b=1")
+    assert request_key("POST", "http://h/a", "x") != request_key("POST", "http://h/a", "y")
+
+
+def _window_key(start, end):
+    return request_key("POST", f"http://h/a?start={start}", json.dumps({"end": end}))
+
+
+def test_now_relative_windows_keep_their_key_on_later_days(monkeypatch):
+    monkeypatch.setattr(replay, "_today", lambda: date(2024, 5, 1))
+    last_90 = _window_key("2024-02-01", "2024-05-01T06:30:00Z")
+    last_30 = _window_key("2024-04-01", "2024-05-01T06:30:00Z")
+    fixed = [_window_key("2023-01-01", "2023-12-31"), _window_key("2022-01-01", "2022-12-31")]
+
+    monkeypatch.setattr(replay, "_today", lambda: date(2024, 5, 2))
+    assert _window_key("2024-02-02", "2024-05-02T09:00:00Z") == last_90
+    assert _window_key("2024-04-02", "2024-05-02T09:00:00Z") == last_30
+    assert last_30 != last_90
+
+    # Dates not relative to today are part of the key as they are
+    assert fixed[0] != fixed[1]
+    assert _window_key("2023-01-01", "2023-12-31") == fixed[0]
+
+
+def test_form_encoded_token_is_redacted():
+    content = b"access_token=secret&expires_in=3600&refresh_token=r1"
+    assert replay._redact_token_body(content) == b"access_token=REDACTED&expires_in=3600&refresh_token=REDACTED"
+
+
+def test_unrecorded_request_raises(tmp_path):
+    replayer = HttpReplay("replay", ReplayArchive(str(tmp_path)))
+    with pytest.raises(ReplayMissError):
+        replayer._replay("GET", "http://h/missing", None)
+    assert replayer.call_stats()["misses"].sum() == 1
@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from utils.singleflight import SingleFlight, enable_copy_on_write, shared_view
+
+
+class _Rerun(BaseException):
+    """
+    Stands in for Streamlit's RerunException / StopException.
+    """
+
+
+def _wait_for_followers(flights, count):
+    deadline = time.monotonic() + 5
+    while flights.stats["coalesced"] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    release, runs = threading.Event(), []
+
+    def work():
+        runs.append(1)
+        release.wait(5)
+        return "grid"
+
+    with ThreadPoolExecutor(6) as pool:
+        futures = [pool.submit(flights.do, "key", work) for _ in range(6)]
+        _wait_for_followers(flights, 5)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["grid"] * 6
+    assert len(runs) == 1
+    assert flights.do("key", work) == "grid"
+    assert flights.stats["hits"] == 1
+
+
+def test_failures_reach_waiters_and_are_not_cached():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("no scene")
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(flights.do, "key", fail) for _ in range(3)]
+        _wait_for_followers(flights, 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert flights.do("key", lambda: "ok") == "ok"
+
+
+def test_interrupted_leader_hands_over_to_a_waiter():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def work():
+        runs.append(threading.get_ident())
+        if len(runs) == 1:
+            started.set()
+            release.wait(5)
+            raise _Rerun()
+        return "grid"
+
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(flights.do, "key", work)
+        started.wait(5)
+        followers = [pool.submit(flights.do, "key", work) for _ in range(3)]
+        _wait_for_followers(flights, 3)
+        release.set()
+
+        with pytest.raises(_Rerun):
+            leader.result()
+        # The rerun is not raised in other sessions; one of them recomputes
+        assert [future.result() for future in followers] == ["grid"] * 3
+
+    assert len(runs) == 2
+    assert not flights._inflight
+
+
+def test_none_and_zero_ttl_results_are_not_kept():
+    flights = SingleFlight()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        return value
+
+    flights.do("none", work, None)
+    flights.do("none", work, None)
+    flights.do("fresh", work, 1, ttl=0)
+    flights.do("fresh", work, 1, ttl=0)
+
+    assert calls == [None, None, 1, 1]
+
+
+def test_lru_keeps_the_most_recent_results():
+    flights = SingleFlight(size=2)
+    for key in "abc":
+        flights.do(key, str.upper, key)
+
+    assert list(flights._results) == ["b", "c"]
+
+
+def test_shared_view_does_not_write_through():
+    enable_copy_on_write()
+    shared = pd.DataFrame({"ST_B10": [30.0, 31.0]})
+
+    view = shared_view(shared)
+    view["ST_B10"] = view["ST_B10"] + 1
+    view.loc[0, "ST_B10"] = 99.0
+    view["heat_risk"] = 0.5
+
+    assert shared["ST_B10"].tolist() == [30.0, 31.0]
+    assert list(shared.columns) == ["ST_B10"]
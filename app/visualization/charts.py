@@ -1,11 +1,25 @@
-import matplotlib.pyplot as plt
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from config.settings import CHART_CACHE_SIZE, CHART_WORKERS, CHART_DPI
 
 
+# --------------------------------------------------
+# CHARTS
+# --------------------------------------------------
 def plot_risk_distribution(df):
     counts = df["risk_level"].value_counts()
 
-    fig, ax = plt.subplots()
+    fig = Figure()
+    ax = fig.subplots()
     counts.plot(kind="bar", ax=ax)
     ax.set_title("Heat Risk Distribution")
     ax.set_xlabel("Risk Level")
@@ -14,11 +28,21 @@ def plot_risk_distribution(df):
     return fig
 
 
-def plot_temperature_comparison(df):
-    fig, ax = plt.subplots()
+def plot_temperature_comparison(df, bins=20):
+    before = df["ST_B10"].to_numpy(dtype=float)
+    after = df["temp_after"].to_numpy(dtype=float)
+
+    # Shared edges, binned up front instead of handing raw columns to hist
+    values = np.concatenate([before, after])
+    edges = np.histogram_bin_edges(values[np.isfinite(values)], bins=bins)
+    before_counts, _ = np.histogram(before, bins=edges)
+    after_counts, _ = np.histogram(after, bins=edges)
 
-    ax.hist(df["ST_B10"], bins=20, alpha=0.6, label="Before")
-    ax.hist(df["temp_after"], bins=20, alpha=0.6, label="After")
+    fig = Figure()
+    ax = fig.subplots()
+
+    ax.stairs(before_counts, edges, fill=True, alpha=0.6, label="Before")
+    ax.stairs(after_counts, edges, fill=True, alpha=0.6, label="After")
 
     ax.set_title("Temperature Distribution: Before vs After")
     ax.set_xlabel("Temperature (°C)")
@@ -31,9 +55,153 @@ def plot_temperature_comparison(df):
 def plot_sdg_impact(df):
     impact_counts = df["sdg_impact"].value_counts()
 
-    fig, ax = plt.subplots()
+    fig = Figure()
+    ax = fig.subplots()
     impact_counts.plot(kind="pie", autopct="%1.1f%%", ax=ax)
     ax.set_title("SDG Impact Assessment")
     ax.set_ylabel("")
 
     return fig
+
+
+def plot_pollution_levels(df):
+    pollution_counts = df["pollution_level"].value_counts().reindex(
+        ["Low", "Moderate", "High"], fill_value=0
+    )
+
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    ax.bar(
+        pollution_counts.index,
+        pollution_counts.values,
+        color=["#2ecc71", "#f1c40f", "#e74c3c"],
+        edgecolor="black"
+    )
+
+    ax.set_ylabel("Number of Locations")
+    ax.set_xlabel("Pollution Level")
+    ax.set_title("Ground-Level Air Pollution (PM2.5)")
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+
+    return fig
+
+
+def plot_budget_vs_cooling(budget, cooling):
+    fig = Figure(figsize=(5, 3))
+    ax = fig.subplots()
+    ax.bar(["Budget (₹ Cr)"], [budget], color="#3498db")
+    ax.bar(["Cooling (°C)"], [cooling], color="#2ecc71")
+    ax.set_title("Budget vs Temperature Reduction")
+    ax.set_ylabel("Impact")
+    fig.tight_layout()
+
+    return fig
+
+
+def plot_pm25_status(pm25):
+    fig = Figure(figsize=(5, 3))
+    ax = fig.subplots()
+    ax.bar(["PM2.5"], [pm25], color="#e74c3c")
+    ax.axhline(60, color="orange", linestyle="--", label="Moderate limit")
+    ax.axhline(30, color="green", linestyle="--", label="Good limit")
+    ax.set_ylabel("µg/m³")
+    ax.set_title("Ground Air Pollution (PM2.5)")
+    ax.legend()
+    fig.tight_layout()
+
+    return fig
+
+
+# chart name -> (plot function, dataframe columns it reads; None for charts
+# drawn from parameters only)
+CHARTS = {
+    "risk_distribution": (plot_risk_distribution, ["risk_level"]),
+    "temperature_comparison": (plot_temperature_comparison, ["ST_B10", "temp_after"]),
+    "sdg_impact": (plot_sdg_impact, ["sdg_impact"]),
+    "pollution_levels": (plot_pollution_levels, ["pollution_level"]),
+    "budget_vs_cooling": (plot_budget_vs_cooling, None),
+    "pm25_status": (plot_pm25_status, None),
+}
+
+
+# --------------------------------------------------
+# CACHED RENDERING
+# --------------------------------------------------
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_POOL = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="charts")
+
+
+def chart_fingerprint(name, df=None, fmt="png", **params):
+    """
+    Hash of the chart name, the columns it reads and its parameters.
+    """
+
+    digest = hashlib.sha1(f"{name}|{fmt}|{sorted(params.items())}".encode())
+
+    columns = (CHARTS[name][1] or []) if df is not None else []
+    for column in columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            digest.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+        else:
+            codes, uniques = pd.factorize(values)
+            digest.update(codes.tobytes())
+            digest.update(repr(list(uniques)).encode())
+
+    return digest.hexdigest()
+
+
+def _render(name, df, fmt, params):
+    plot, columns = CHARTS[name]
+    fig = plot(**params) if columns is None else plot(df, **params)
+    FigureCanvasAgg(fig)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=CHART_DPI, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def _cache_get(key):
+    with _CACHE_LOCK:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            return _CACHE[key]
+    return None
+
+
+def _cache_put(key, image):
+    with _CACHE_LOCK:
+        _CACHE[key] = image
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > CHART_CACHE_SIZE:
+            _CACHE.popitem(last=False)
+
+
+def render_chart(name, df=None, fmt="png", **params):
+    """
+    PNG/SVG bytes of a chart; unchanged inputs are served from the LRU cache.
+    """
+    return render_charts([(name, df, params)], fmt)[0]
+
+
+def render_charts(requests, fmt="png"):
+    """
+    Render several (name, df, params) charts; cache misses are drawn
+    in parallel on the Agg worker pool.
+    """
+
+    keys = [chart_fingerprint(name, df, fmt, **params) for name, df, params in requests]
+    images = [_cache_get(key) for key in keys]
+
+    futures = {
+        i: _POOL.submit(_render, name, df, fmt, params)
+        for i, (name, df, params) in enumerate(requests)
+        if images[i] is None
+    }
+
+    for i, future in futures.items():
+        images[i] = future.result()
+        _cache_put(keys[i], images[i])
+
+    return images
@@ -41,3 +41,79 @@ def create_heatmap(df):
     m.get_root().html.add_child(folium.Element(legend_html))
 
     return m
+
+
+HOTSPOT_COLORS = {
+    "Hot Spot (99%)": "#b2182b",
+    "Hot Spot (95%)": "#ef8a62",
+    "Hot Spot (90%)": "#fddbc7",
+    "Cold Spot (99%)": "#2166ac",
+    "Cold Spot (95%)": "#67a9cf",
+    "Cold Spot (90%)": "#d1e5f0",
+    "High-High": "#b2182b",
+    "Low-Low": "#2166ac",
+    "High-Low": "#ef8a62",
+    "Low-High": "#67a9cf",
+    "Not Significant": "#bdbdbd",
+}
+
+
+PERSISTENCE_COLORS = {
+    "Chronic": "#b2182b",
+    "Anomaly": "#f4a582",
+    "Warming": "#fddbc7",
+    "Typical": "#bdbdbd",
+}
+
+
+SITING_COLORS = {
+    "cool_roof": "#d73027",
+    "cool_pavement": "#fc8d59",
+    "green_roof": "#91cf60",
+    "green_cover_10": "#1a9850",
+    "water_bodies": "#4575b4",
+}
+
+
+def create_cluster_map(df, column, colors=HOTSPOT_COLORS, title="Hotspot Guide"):
+    """
+    Map of a label column (Gi* hotspot, LISA cluster, heat persistence).
+    """
+    center = [df["latitude"].mean(), df["longitude"].mean()]
+    m = folium.Map(location=center, zoom_start=11, tiles="cartodbpositron")
+
+    for lat, lon, label in zip(df["latitude"], df["longitude"], df[column]):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=5,
+            color=colors.get(label, "#bdbdbd"),
+            fill=True,
+            fill_opacity=0.7,
+            popup=label
+        ).add_to(m)
+
+    labels = [label for label in colors if label in set(df[column])]
+    legend_rows = "".join(
+        f'<span style="color:{colors[label]}">&#9679;</span> {label}<br>'
+        for label in labels
+    )
+    legend_html = f"""
+    <div style="
+        position: fixed;
+        bottom: 40px;
+        left: 40px;
+        width: 200px;
+        background-color: white;
+        padding: 10px;
+        border-radius: 8px;
+        box-shadow: 2px 2px 6px rgba(0,0,0,0.3);
+        font-size: 14px;
+    ">
+    <b>{title}</b><br>
+    {legend_rows}
+    </div>
+    """
+
+    m.get_root().html.add_child(folium.Element(legend_html))
+
+    return m
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from visualization.charts import chart_fingerprint, render_chart, render_charts
+
+
+def _df(levels):
+    return pd.DataFrame({"risk_level": levels, "ST_B10": range(len(levels))})
+
+
+def test_fingerprint_follows_only_the_columns_read():
+    df = _df(["Low", "High"])
+
+    same = chart_fingerprint("risk_distribution", df.assign(ST_B10=[9, 9]))
+    assert chart_fingerprint("risk_distribution", df) == same
+    assert chart_fingerprint("risk_distribution", _df(["High", "High"])) != same
+
+
+def test_parameter_charts_ignore_frames():
+    assert chart_fingerprint("pm25_status", pm25=40) == chart_fingerprint("pm25_status", _df(["Low"]), pm25=40)
+    assert chart_fingerprint("pm25_status", pm25=40) != chart_fingerprint("pm25_status", pm25=41)
+
+
+def test_render_is_cached_and_png():
+    first = render_chart("budget_vs_cooling", budget=5, cooling=1.2)
+    second = render_chart("budget_vs_cooling", budget=5, cooling=1.2)
+
+    assert first.startswith(b"\x89PNG")
+    assert first is second
+
+
+def test_render_charts_keeps_request_order():
+    df = _df(["Low", "Moderate", "High"])
+    images = render_charts([
+        ("risk_distribution", df, {}),
+        ("pm25_status", None, {"pm25": 55}),
+    ])
+
+    assert images[0] == render_chart("risk_distribution", df)
+    assert images[1] == render_chart("pm25_status", pm25=55)